@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+自适应并发控制
+按主机限制同时进行的请求数，并用加性增、乘性减（AIMD）调整上限：
+- 开始时上限每轮翻倍（慢启动），第一次减小后改为每轮加1
+- 超时/连接错误、5xx、429立即让上限乘以退避系数
+- 每完成一轮（上限个）请求看一次这一轮耗时的中位数：超过空载耗时的若干倍说明服务器开始排队，同样乘性减；
+  否则如果这一轮上限被用满，上限增加
+- 上次减小之前发出的请求是在旧上限下排队的，它们的结果不再重复减小
+固定的--window要么太保守，要么把论坛压到报错再由safe_request重试；自适应上限会停在站点能承受的并发附近，
+运行结束时输出每个主机收敛到的并发数
+"""
+
+import time
+import logging
+import statistics
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+from metrics_exporter import metrics
+
+DEFAULT_INITIAL = 4
+DEFAULT_BACKOFF = 0.7
+# 耗时超过空载耗时的这个倍数视为服务器开始排队
+DEFAULT_LATENCY_TOLERANCE = 1.5
+# 空载耗时很短时允许的绝对抖动（秒），避免线程调度的抖动被当成排队
+LATENCY_FLOOR = 0.02
+# 每个样本让空载耗时上浮的比例：站点整体变慢后，旧的最小值不会让上限一直被压低
+MIN_LATENCY_DRIFT = 0.001
+# 统计收敛并发数时使用的最近样本数
+SETTLED_WINDOW = 200
+
+
+def is_overload_response(response) -> bool:
+    """请求结果是否说明主机已经过载：超时或连接错误（response为None）、5xx、429"""
+    return response is None or response.status_code == 429 or response.status_code >= 500
+
+
+def is_queueing(latency: float, min_latency: float) -> bool:
+    """耗时是否明显高于空载耗时（服务器在排队）"""
+    return latency > max(min_latency * DEFAULT_LATENCY_TOLERANCE, min_latency + LATENCY_FLOOR)
+
+
+class AdaptiveLimiter:
+    """一个主机的AIMD并发上限（线程安全）"""
+
+    def __init__(self, name: str = '', initial: int = DEFAULT_INITIAL, min_limit: int = 1, max_limit: int = 64,
+                 backoff: float = DEFAULT_BACKOFF):
+        """
+        Args:
+            name: 主机名（用于日志）
+            initial: 初始并发上限
+            min_limit: 上限的最小值
+            max_limit: 上限的最大值（批量运行时为线程窗口大小）
+            backoff: 过载时上限乘以的系数
+        """
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.in_flight = 0
+        self.min_latency = None
+        self.decreases = 0
+        self.peak = self.limit
+        self.slow_start = True
+        self._last_decrease = 0.0
+        self._round = []  # 本轮正常返回的请求耗时
+        self._round_saturated = False
+        self._samples = deque(maxlen=SETTLED_WINDOW)
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """
+        等待到同时进行的请求数低于上限
+
+        Returns:
+            float: 请求开始的时间，release()时传回
+        """
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, latency: float, response=None):
+        """
+        请求结束，按结果调整上限
+
+        Args:
+            started: acquire()的返回值
+            latency: 请求耗时（秒）
+            response: 响应，请求抛出异常时为None
+        """
+        with self._cond:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            # 上次减小之前发出的请求不参与判断
+            if started >= self._last_decrease:
+                if is_overload_response(response):
+                    self._decrease('请求失败或服务器过载')
+                else:
+                    self._observe(latency, saturated)
+            self._samples.append(self.limit)
+            # 只唤醒空出的名额数量的等待者，避免几十个线程同时醒来再睡下
+            self._cond.notify(max(0, int(self.limit) - self.in_flight))
+
+    def _observe(self, latency: float, saturated: bool):
+        """记录一次正常返回的耗时，一轮结束时决定加还是减"""
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        else:
+            self.min_latency *= 1 + MIN_LATENCY_DRIFT
+        self._round.append(latency)
+        self._round_saturated = self._round_saturated or saturated
+        if len(self._round) < int(self.limit):
+            return
+        # 单个请求的耗时受线程调度影响抖动很大，按整轮的中位数判断
+        if is_queueing(statistics.median(self._round), self.min_latency):
+            self._decrease('耗时升高')
+        else:
+            # 只有上限被用满时才增加，并发本身不足时上限不会虚涨
+            if self._round_saturated:
+                self.limit = min(self.max_limit, self.limit * 2 if self.slow_start else self.limit + 1)
+                self.peak = max(self.peak, self.limit)
+            self._round, self._round_saturated = [], False
+
+    def _decrease(self, reason: str):
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self.slow_start = False
+        self._last_decrease = time.monotonic()
+        self._round, self._round_saturated = [], False
+        self.decreases += 1
+        logging.debug(f"🎚️ {self.name} {reason}，并发上限降到 {self.limit:.1f}")
+
+    def settled(self) -> int:
+        """最近一段时间上限的中位数，即收敛到的并发数"""
+        with self._cond:
+            if not self._samples:
+                return int(self.limit)
+            return int(statistics.median(self._samples))
+
+    def summary(self) -> dict:
+        with self._cond:
+            min_latency = round(self.min_latency * 1000, 1) if self.min_latency is not None else None
+            return {'limit': round(self.limit, 1), 'peak': round(self.peak, 1), 'decreases': self.decreases,
+                    'min_latency_ms': min_latency}
+
+
+class AdaptiveConcurrency:
+    """按主机分别控制的自适应并发（每个主机一个AdaptiveLimiter）"""
+
+    def __init__(self, **options):
+        """
+        Args:
+            options: 传给每个AdaptiveLimiter的参数（initial / min_limit / max_limit / backoff）
+        """
+        self.options = options
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, url: str) -> AdaptiveLimiter:
+        """请求URL所属主机的并发限制器"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = AdaptiveLimiter(host, **self.options)
+            return limiter
+
+    def summaries(self) -> dict:
+        """每个主机收敛到的并发数和调整情况"""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {host: dict(limiter.summary(), settled=limiter.settled()) for host, limiter in limiters.items()}
+
+    def report(self) -> dict:
+        """输出每个主机收敛到的并发数并写入指标，返回summaries()"""
+        summaries = self.summaries()
+        for host, summary in summaries.items():
+            metrics.set('acgfun_concurrency_limit', summary['settled'], host=host)
+            logging.info(
+                f"🎚️ 自适应并发 {host}: 收敛到 {summary['settled']} (最高 {summary['peak']}, "
+                f"降低 {summary['decreases']} 次, 空载耗时 {summary['min_latency_ms']} ms)"
+            )
+        return summaries
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流量统计和压缩协商模块
+- accept_encoding(): 按负责解压的库实际支持的编码生成Accept-Encoding，安装了brotli时额外协商br，
+  能解压zstd时协商zstd（requests/urllib3需要backports.zstd或Python 3.14，HTTP/2传输的httpx需要zstandard），
+  未安装时退回gzip, deflate（服务器不会返回我们解不开的编码）
+- response_bytes(): 一个响应在线路上传输的正文字节数（压缩后）和解码后的字节数
+- BandwidthCounter: 按页面累计一次运行的流量
+
+线路字节数只统计响应正文，不含响应头和TLS/HTTP2分帧开销
+"""
+
+import threading
+
+from metrics_exporter import endpoint_label
+
+try:
+    # urllib3按实际能解压的库生成列表（brotli/brotlicffi -> br，backports.zstd / compression.zstd -> zstd）
+    from urllib3.util.request import ACCEPT_ENCODING
+except ImportError:
+    ACCEPT_ENCODING = 'gzip,deflate'
+
+
+def accept_encoding(transport=None) -> str:
+    """
+    会话请求头中使用的Accept-Encoding
+
+    Args:
+        transport: 共享传输（如Http2Transport），由它解压响应时使用它支持的编码
+    """
+    encodings = getattr(transport, 'accept_encoding', None) or ACCEPT_ENCODING
+    return ', '.join(encodings.split(','))
+
+
+def _wire_bytes(response) -> int:
+    # Http2Transport转换的响应带有wire_bytes；requests响应从urllib3读取已读的原始字节数
+    wire = getattr(response, 'wire_bytes', None)
+    if wire is not None:
+        return wire
+    tell = getattr(response.raw, 'tell', None)
+    if tell is not None:
+        try:
+            return tell()
+        except Exception:
+            pass
+    return len(response.content or b'')
+
+
+def response_bytes(response):
+    """
+    统计响应（包括跟随的跳转）的流量
+
+    Returns:
+        tuple: (线路字节数, 解码后字节数)
+    """
+    wire = decoded = 0
+    for item in (*response.history, response):
+        # 读取content确保正文已完整接收，再取线路字节数
+        decoded += len(item.content or b'')
+        wire += _wire_bytes(item)
+    return wire, decoded
+
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+class BandwidthCounter:
+    """一次运行的流量，按页面分类（线程安全，登录验证和签到状态检查并发请求）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.endpoints = {}
+
+    def add(self, url: str, wire: int, decoded: int):
+        endpoint = endpoint_label(url)
+        with self._lock:
+            self.requests += 1
+            self.wire_bytes += wire
+            self.decoded_bytes += decoded
+            counts = self.endpoints.setdefault(endpoint, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += wire
+            counts[2] += decoded
+
+    def summary(self) -> str:
+        """一行流量摘要，用于运行结束时的日志"""
+        with self._lock:
+            ratio = f', 压缩比 {self.decoded_bytes / self.wire_bytes:.1f}x' if self.wire_bytes else ''
+            parts = [
+                f'{endpoint} {count}次 {format_bytes(wire)}/{format_bytes(decoded)}'
+                for endpoint, (count, wire, decoded) in sorted(self.endpoints.items())
+            ]
+            return (
+                f'{self.requests} 个请求, 传输 {format_bytes(self.wire_bytes)}, '
+                f'解码后 {format_bytes(self.decoded_bytes)}{ratio}'
+                + (f' ({"; ".join(parts)})' if parts else '')
+            )
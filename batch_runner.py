@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多账号批量签到脚本
+账号按需逐个读取，同时运行的账号数受窗口限制，每个账号完成后立即释放其会话和页面数据，
+内存占用与账号总数无关
+"""
+
+import os
+import time
+import logging
+import argparse
+import resource
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from cookie_signin import CookieSignin
+from cookie_store import CookieStore, DEFAULT_STORE_PATH
+from checkpoint_journal import CheckpointJournal, default_journal_path
+from run_lock import SharedRateLimiter, account_lock
+from metrics_exporter import METRICS_FILE, flush_metrics
+from bandwidth import format_bytes
+from event_log import event_log, add_event_log_argument
+from profiler import add_profile_argument, start_profiler
+from site_profiles import DEFAULT_SITE, get_site_profile
+
+ACCOUNTS_DIR = os.path.join('config', 'accounts')
+
+
+def iter_accounts_from_dir(accounts_dir: str = ACCOUNTS_DIR):
+    """
+    逐个读取账号目录中的Cookie文件（每个账号一个 <账号名>.txt）
+
+    Yields:
+        tuple: (账号名, Cookie字符串)
+    """
+    # 兼容旧的一账号一文件布局，新部署请使用cookie_store.py导入到Cookie存储
+    with os.scandir(accounts_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.endswith('.txt'):
+                continue
+            try:
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    cookie_string = f.read().strip()
+            except Exception as e:
+                logging.error(f"❌ 读取账号Cookie失败 {entry.name}: {e}")
+                continue
+            yield entry.name[:-len('.txt')], cookie_string
+
+
+def get_peak_rss_mb() -> float:
+    """获取进程的峰值常驻内存（MB）"""
+    # Linux下ru_maxrss的单位是KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_account(account_id, cookie_string, signin_factory=CookieSignin):
+    """
+    运行单个账号的签到流程，完成后立即释放会话
+    签到器带有Cookie存储时按账号名从存储加载（并写回轮换的Cookie），否则使用cookie_string
+    另一个进程正在处理同一账号时直接跳过，结果为locked
+
+    Returns:
+        dict: 账号的签到结果
+    """
+    with account_lock(account_id) as acquired:
+        if not acquired:
+            logging.warning(f"⚠️ 账号 {account_id} 正在被另一个进程处理，跳过")
+            event_log.emit('run', account=account_id, outcome='locked', duration_ms=0)
+            return {'account': account_id, 'success': False, 'outcome': 'locked', 'elapsed': 0}
+        return _run_account_locked(account_id, cookie_string, signin_factory)
+
+
+def _run_account_locked(account_id, cookie_string, signin_factory):
+    """在持有账号锁的情况下运行签到流程"""
+    start = time.perf_counter()
+    try:
+        signin = signin_factory()
+    except Exception as e:
+        logging.error(f"❌ 创建签到器失败 {account_id}: {e}")
+        return {'account': account_id, 'success': False, 'outcome': 'error', 'elapsed': 0}
+
+    try:
+        if signin.cookie_store is not None:
+            success = signin.run(account_id)
+        else:
+            success = signin.run(cookie_string, is_file=False, account=account_id)
+        return {
+            'account': account_id,
+            'success': success,
+            'outcome': signin.last_outcome,
+            'elapsed': round(time.perf_counter() - start, 3),
+            'wire_bytes': signin.bandwidth.wire_bytes,
+            'decoded_bytes': signin.bandwidth.decoded_bytes,
+        }
+    finally:
+        signin.close()
+
+
+def add_bandwidth(summary: dict, result: dict):
+    """把账号结果中的流量累加到汇总统计"""
+    summary['wire_bytes'] += result.get('wire_bytes', 0)
+    summary['decoded_bytes'] += result.get('decoded_bytes', 0)
+
+
+def run_batch(accounts, window: int = 8, signin_factory=CookieSignin, on_result=None) -> dict:
+    """
+    以有界窗口并发运行多个账号
+
+    Args:
+        accounts: 账号迭代器，产生 (账号名, Cookie字符串)，按需读取
+        window: 同时运行的最大账号数
+        signin_factory: 创建签到器的函数，批量共享的解析进程池和传输在这里注入
+        on_result: 每个账号完成时的回调，参数为结果字典
+
+    Returns:
+        dict: 汇总统计（不保存每个账号的结果）
+    """
+    summary = {'total': 0, 'success': 0, 'failed': 0, 'outcomes': {}, 'wire_bytes': 0, 'decoded_bytes': 0}
+
+    def collect(future):
+        try:
+            result = future.result()
+        except Exception as e:
+            logging.error(f"❌ 账号运行异常: {e}")
+            result = {'account': '', 'success': False, 'outcome': 'error', 'elapsed': 0}
+        summary['total'] += 1
+        summary['success' if result['success'] else 'failed'] += 1
+        summary['outcomes'][result['outcome']] = summary['outcomes'].get(result['outcome'], 0) + 1
+        add_bandwidth(summary, result)
+        if on_result:
+            on_result(result)
+
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        for account_id, cookie_string in accounts:
+            if len(in_flight) >= window:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            in_flight.add(executor.submit(run_account, account_id, cookie_string, signin_factory))
+
+        done, _ = wait(in_flight)
+        for future in done:
+            collect(future)
+
+    summary['peak_rss_mb'] = round(get_peak_rss_mb(), 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AcgFun多账号批量签到')
+    parser.add_argument('--store', type=str, default=DEFAULT_STORE_PATH,
+                        help=f'Cookie存储文件路径 (默认: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--site', type=str, default=DEFAULT_SITE,
+                        help=f'只运行该站点的账号，多个站点同时运行请使用site_runner.py (默认: {DEFAULT_SITE})')
+    parser.add_argument('--accounts-dir', type=str,
+                        help='改为从账号Cookie目录读取，每个账号一个 <账号名>.txt')
+    parser.add_argument('--window', type=int, default=8, help='同时运行的最大账号数 (默认: 8)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='按主机自适应调整同时进行的请求数（AIMD），--window作为上限')
+    parser.add_argument('--parse-workers', type=int, default=0, help='页面解析进程数，0表示在线程中解析 (默认: 0)')
+    parser.add_argument('--http2', action='store_true', help='所有账号共享HTTP/2传输 (需要安装httpx[http2])')
+    parser.add_argument('--http2-streams', type=int, default=100, help='HTTP/2最大并发请求流数 (默认: 100)')
+    parser.add_argument('--journal', type=str, help='检查点日志路径 (默认: logs/signin_journal_<日期>.log)')
+    parser.add_argument('--resume', action='store_true', help='重放检查点日志，只处理上次运行中未完成的账号')
+    parser.add_argument('--max-rate', type=float, default=5.0, help='所有进程合计的每秒最大请求数，0表示不限速 (默认: 5)')
+    parser.add_argument('--prewarm', type=int, default=0,
+                        help='所有账号共享一个连接池，开始前预热的keep-alive连接数，0表示每个账号独立连接 (默认: 0)')
+    parser.add_argument('--refresh-credit', action='store_true', help='总是请求积分页获取天空石数量（默认在签到页面已有余额时跳过）')
+    parser.add_argument('--schedule', action='store_true',
+                        help='按优先级调度：今天未签到的账号优先，失败的账号延迟重试')
+    parser.add_argument('--max-attempts', type=int, default=3, help='调度模式下每个账号最多尝试次数 (默认: 3)')
+    parser.add_argument('--retry-delay', type=float, default=30.0, help='调度模式下第一次重试前的等待秒数，之后翻倍 (默认: 30)')
+    parser.add_argument('--deadline', type=float, help='调度模式下的运行时长上限（分钟），到达后不再启动新的账号')
+    parser.add_argument('--metrics-file', type=str, default=METRICS_FILE,
+                        help=f'Prometheus textfile指标文件，空字符串表示不写 (默认: {METRICS_FILE})')
+    add_profile_argument(parser)
+    add_event_log_argument(parser)
+
+    args = parser.parse_args()
+    start_profiler('batch_runner', args.profile)
+    event_log.configure(args.event_log)
+    site = get_site_profile(args.site)
+
+    parse_pool = None
+    if args.parse_workers > 0:
+        from page_parser import ParsePool
+        parse_pool = ParsePool(args.parse_workers)
+
+    transport = None
+    if args.http2:
+        from http2_transport import Http2Transport
+        transport = Http2Transport(max_streams=args.http2_streams)
+
+    adapter = None
+    if args.prewarm > 0 and transport is None:
+        from connection_warmer import shared_adapter, prewarm
+        adapter = shared_adapter(max(args.window, args.prewarm))
+        prewarm(adapter, args.prewarm, base_url=site.base_url)
+
+    if args.accounts_dir:
+        cookie_store = None
+        accounts = iter_accounts_from_dir(args.accounts_dir)
+    elif args.schedule:
+        # 调度模式需要最近签到日期来排序，账号名和日期一起读取
+        cookie_store = CookieStore(args.store)
+        accounts = ((account_id, None, last_signed)
+                    for account_id, last_signed in cookie_store.iter_account_states(site=site.name))
+    else:
+        # 只按需读取账号名，每个账号的Cookie在运行时才从存储中加载
+        cookie_store = CookieStore(args.store)
+        accounts = ((account_id, None) for account_id in cookie_store.iter_account_ids(site=site.name))
+
+    journal_path = args.journal or default_journal_path()
+    if args.resume:
+        completed = CheckpointJournal.replay(journal_path)
+        logging.info(f"⏩ 检查点日志中已完成 {len(completed)} 个账号，继续处理剩余账号")
+        accounts = (account for account in accounts if account[0] not in completed)
+    journal = CheckpointJournal(journal_path, resume=args.resume)
+
+    rate_limiter = SharedRateLimiter(args.max_rate, path=site.rate_limit_path) if args.max_rate > 0 else None
+
+    concurrency = None
+    if args.adaptive:
+        from adaptive_concurrency import AdaptiveConcurrency
+        concurrency = AdaptiveConcurrency(max_limit=args.window)
+
+    def signin_factory():
+        return CookieSignin(parse_pool=parse_pool, transport=transport, cookie_store=cookie_store,
+                            rate_limiter=rate_limiter, adapter=adapter, refresh_credit=args.refresh_credit,
+                            site=site, concurrency=concurrency)
+
+    def on_result(result):
+        # 被其他进程锁定或站点熔断的账号不是本次运行的最终结果，不写入检查点
+        if result['outcome'] not in ('locked', 'circuit_open'):
+            journal.record(result['account'], result['outcome'])
+
+    try:
+        start = time.perf_counter()
+        if args.schedule:
+            from batch_scheduler import BatchScheduler, account_priority, PRIORITY_UNKNOWN
+            scheduler = BatchScheduler(
+                window=args.window,
+                signin_factory=signin_factory,
+                max_attempts=args.max_attempts,
+                retry_base=args.retry_delay,
+                deadline=args.deadline * 60 if args.deadline else None,
+                on_result=on_result,
+            )
+            today = time.strftime('%Y-%m-%d')
+            for account in accounts:
+                # 账号目录没有签到记录，全部按状态未知处理
+                priority = account_priority(account[2], today) if len(account) > 2 else PRIORITY_UNKNOWN
+                scheduler.add(account[0], account[1], priority)
+            summary = scheduler.run()
+        else:
+            summary = run_batch(
+                accounts,
+                window=args.window,
+                signin_factory=signin_factory,
+                on_result=on_result,
+            )
+    finally:
+        journal.close()
+        if rate_limiter is not None:
+            rate_limiter.close()
+        if transport is not None:
+            transport.close()
+        if adapter is not None:
+            adapter.close()
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        settled = concurrency.report() if concurrency is not None else None
+        flush_metrics('batch_runner', args.metrics_file)
+
+    event_log.emit('batch', total=summary['total'], success=summary['success'], failed=summary['failed'],
+                   outcomes=summary['outcomes'], duration_ms=round((time.perf_counter() - start) * 1000, 1),
+                   wire_bytes=summary['wire_bytes'], decoded_bytes=summary['decoded_bytes'],
+                   concurrency={host: item['settled'] for host, item in settled.items()} if settled else None)
+    logging.info(
+        f"📊 批量签到完成: 共 {summary['total']} 个账号, 成功 {summary['success']}, "
+        f"失败 {summary['failed']}, 耗时 {time.perf_counter() - start:.1f}s, "
+        f"峰值内存 {summary['peak_rss_mb']} MB, "
+        f"流量 {format_bytes(summary['wire_bytes'])} (解码后 {format_bytes(summary['decoded_bytes'])})"
+    )
+    print(f"✅ 成功 {summary['success']} / {summary['total']}，结果分布: {summary['outcomes']}")
+
+
+if __name__ == '__main__':
+    main()
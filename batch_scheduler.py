@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量签到优先级调度
+今天还没签到的账号最先运行，状态未知的账号其次，今天已签到的账号最后；
+临时失败的账号放入延迟重试堆，按指数退避重新排队，队列清空或到达截止时间时结束
+"""
+
+import time
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from batch_runner import run_account, get_peak_rss_mb, add_bandwidth
+from cookie_signin import CookieSignin
+
+PRIORITY_NOT_SIGNED = 0
+PRIORITY_UNKNOWN = 1
+PRIORITY_SIGNED = 2
+
+# 这些结果可能在稍后重试时成功；Cookie失效或加载失败重试也没有意义
+RETRYABLE_OUTCOMES = {'signin_failed', 'error', 'locked', 'circuit_open'}
+
+
+def account_priority(last_signed, today: str = None) -> int:
+    """
+    根据最近签到日期计算账号的调度优先级（数值越小越先运行）
+
+    Args:
+        last_signed: 最近确认已签到的日期（YYYY-MM-DD），从未记录时为None
+        today: 今天的日期，默认为本地日期
+    """
+    today = today or time.strftime('%Y-%m-%d')
+    if not last_signed:
+        return PRIORITY_UNKNOWN
+    if last_signed >= today:
+        return PRIORITY_SIGNED
+    return PRIORITY_NOT_SIGNED
+
+
+class BatchScheduler:
+    """以有界窗口并发运行账号，按优先级出队，失败的账号延迟重试"""
+
+    def __init__(self, window: int = 8, signin_factory=CookieSignin, max_attempts: int = 3,
+                 retry_base: float = 30.0, retry_max: float = 600.0, deadline: float = None,
+                 on_result=None):
+        """
+        初始化调度器
+
+        Args:
+            window: 同时运行的最大账号数
+            signin_factory: 创建签到器的函数
+            max_attempts: 每个账号最多尝试次数（包括第一次）
+            retry_base: 第一次重试前的等待秒数，之后每次翻倍
+            retry_max: 重试等待的上限秒数
+            deadline: 运行时长上限（秒），到达后不再启动新的账号，None表示不限
+            on_result: 每个账号得到最终结果时的回调，参数为结果字典
+        """
+        self.window = window
+        self.signin_factory = signin_factory
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.deadline = deadline
+        self.on_result = on_result
+        self._ready = []    # (优先级, 序号, 账号名, Cookie字符串, 已尝试次数)
+        self._delayed = []  # (可运行时间, 序号, 优先级, 账号名, Cookie字符串, 已尝试次数)
+        self._seq = 0
+
+    def add(self, account_id: str, cookie_string=None, priority: int = PRIORITY_UNKNOWN):
+        """加入一个待运行的账号，同一优先级内按加入顺序运行"""
+        heapq.heappush(self._ready, (priority, self._seq, account_id, cookie_string, 0))
+        self._seq += 1
+
+    def retry_delay(self, attempts: int) -> float:
+        """第attempts次失败后的重试等待秒数"""
+        return min(self.retry_max, self.retry_base * (2 ** (attempts - 1)))
+
+    def _release_due(self, now: float):
+        """把到期的延迟重试移回就绪队列"""
+        while self._delayed and self._delayed[0][0] <= now:
+            _, seq, priority, account_id, cookie_string, attempts = heapq.heappop(self._delayed)
+            heapq.heappush(self._ready, (priority, seq, account_id, cookie_string, attempts))
+
+    def run(self) -> dict:
+        """
+        运行直到队列清空或到达截止时间
+
+        Returns:
+            dict: 汇总统计，截止时仍未完成的账号计入outcomes['deadline']
+        """
+        summary = {'total': 0, 'success': 0, 'failed': 0, 'retries': 0, 'outcomes': {},
+                   'wire_bytes': 0, 'decoded_bytes': 0}
+        start = time.monotonic()
+        stop_at = start + self.deadline if self.deadline else None
+
+        def finish(result):
+            summary['total'] += 1
+            summary['success' if result['success'] else 'failed'] += 1
+            summary['outcomes'][result['outcome']] = summary['outcomes'].get(result['outcome'], 0) + 1
+            add_bandwidth(summary, result)
+            if self.on_result:
+                self.on_result(result)
+
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.window) as executor:
+            while self._ready or self._delayed or in_flight:
+                now = time.monotonic()
+                if stop_at is not None and now >= stop_at:
+                    break
+                self._release_due(now)
+
+                while self._ready and len(in_flight) < self.window:
+                    priority, seq, account_id, cookie_string, attempts = heapq.heappop(self._ready)
+                    future = executor.submit(run_account, account_id, cookie_string, self.signin_factory)
+                    in_flight[future] = (priority, seq, account_id, cookie_string, attempts + 1)
+
+                # 等到有账号完成、下一个重试到期或截止时间，取最早者
+                wake_at = [t for t in (self._delayed[0][0] if self._delayed else None, stop_at) if t is not None]
+                timeout = max(0.0, min(wake_at) - time.monotonic()) if wake_at else None
+                if not in_flight:
+                    time.sleep(timeout or 0)
+                    continue
+
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    priority, seq, account_id, cookie_string, attempts = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logging.error(f"❌ 账号运行异常 {account_id}: {e}")
+                        result = {'account': account_id, 'success': False, 'outcome': 'error', 'elapsed': 0}
+
+                    if result['outcome'] in RETRYABLE_OUTCOMES and attempts < self.max_attempts:
+                        delay = self.retry_delay(attempts)
+                        logging.warning(
+                            f"🔁 账号 {account_id} 结果为 {result['outcome']}，"
+                            f"{delay:.0f}s 后重试 ({attempts}/{self.max_attempts})"
+                        )
+                        summary['retries'] += 1
+                        heapq.heappush(
+                            self._delayed,
+                            (time.monotonic() + delay, seq, priority, account_id, cookie_string, attempts)
+                        )
+                    else:
+                        finish(result)
+
+            # 到达截止时间：等待已启动的账号完成，剩余账号不再运行
+            for future in wait(in_flight).done:
+                _, _, account_id, _, _ = in_flight[future]
+                try:
+                    finish(future.result())
+                except Exception as e:
+                    logging.error(f"❌ 账号运行异常 {account_id}: {e}")
+                    finish({'account': account_id, 'success': False, 'outcome': 'error', 'elapsed': 0})
+
+        pending = len(self._ready) + len(self._delayed)
+        if pending:
+            logging.warning(f"⏰ 到达截止时间，还有 {pending} 个账号未完成")
+            summary['outcomes']['deadline'] = pending
+        summary['elapsed'] = round(time.monotonic() - start, 1)
+        summary['peak_rss_mb'] = round(get_peak_rss_mb(), 1)
+        return summary
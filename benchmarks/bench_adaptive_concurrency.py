@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+自适应并发基准测试
+本地替身服务器只能同时处理 --capacity 个请求（其余排队，队列满时返回503），
+对比几个固定窗口和自适应并发（AIMD，以最大窗口为上限）下批量签到的耗时、成功数、服务器拒绝的请求数和账号耗时分位数，
+并输出自适应并发收敛到的并发数
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from standin_server import use_temp_workdir  # noqa: E402
+
+use_temp_workdir()
+from adaptive_concurrency import AdaptiveConcurrency  # noqa: E402
+from batch_runner import run_batch  # noqa: E402
+from connection_warmer import shared_adapter  # noqa: E402
+from cookie_signin import CookieSignin  # noqa: E402
+from event_log import EventLog  # noqa: E402
+from signin_calendar import SigninCalendar  # noqa: E402
+from site_profiles import SiteProfile  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+
+def run_mode(server, site, tmp, name, accounts, window, concurrency=None):
+    """用给定窗口（和自适应并发）签到一批新账号，返回统计"""
+    calendar = SigninCalendar(os.path.join(tmp, f'calendar_{name}.bin'))
+    events = EventLog('')
+    adapter = shared_adapter(window)
+    latencies = []
+
+    def signin_factory():
+        return CookieSignin(site=site, calendar=calendar, events=events, adapter=adapter, concurrency=concurrency)
+
+    def on_result(result):
+        latencies.append(result['elapsed'])
+
+    # 每种方式使用不同的账号名，签到状态互不影响
+    batch = ((f'{name}{i}', f'auth={name}{i}') for i in range(accounts))
+    requests_before, rejected_before = server.requests, server.rejected
+    server.peak_active = 0
+    start = time.perf_counter()
+    try:
+        summary = run_batch(batch, window=window, signin_factory=signin_factory, on_result=on_result)
+    finally:
+        adapter.close()
+        calendar.close()
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        'elapsed': elapsed,
+        'success': summary['success'],
+        'requests': server.requests - requests_before,
+        'rejected': server.rejected - rejected_before,
+        'peak_active': server.peak_active,
+        'p50': quantiles[49],
+        'p95': quantiles[94],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='自适应并发基准测试')
+    parser.add_argument('--accounts', type=int, default=400, help='每种方式签到的账号数')
+    parser.add_argument('--capacity', type=int, default=16, help='替身服务器同时处理的请求数')
+    parser.add_argument('--queue-limit', type=int, help='替身服务器排队的请求数上限（默认与capacity相同）')
+    parser.add_argument('--latency', type=float, default=0.05, help='每个请求的服务端处理耗时（秒）')
+    parser.add_argument('--windows', type=int, nargs='+', default=[4, 16, 64], help='要对比的固定窗口')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    max_window = max(args.windows)
+    with tempfile.TemporaryDirectory() as tmp, \
+            StandinServer(latency=args.latency, capacity=args.capacity, queue_limit=args.queue_limit) as server:
+        site = SiteProfile('standin', server.base_url)
+        print(f"服务器容量 {args.capacity}，队列 {server.queue_limit}，处理耗时 {args.latency * 1000:.0f} ms，"
+              f"每种方式 {args.accounts} 个账号")
+        print(f"{'方式':<14}{'耗时(s)':>9}{'账号/秒':>9}{'成功':>10}{'请求':>8}{'503':>7}"
+              f"{'服务器峰值':>10}{'p50(s)':>9}{'p95(s)':>9}")
+        modes = [(f'固定 {window}', window, None) for window in args.windows]
+        concurrency = AdaptiveConcurrency(max_limit=max_window)
+        modes.append((f'自适应 ≤{max_window}', max_window, concurrency))
+        for index, (label, window, controller) in enumerate(modes):
+            row = run_mode(server, site, tmp, f'm{index}_', args.accounts, window, controller)
+            print(f"{label:<14}{row['elapsed']:>9.2f}{args.accounts / row['elapsed']:>9.1f}"
+                  f"{row['success']:>6}/{args.accounts}{row['requests']:>8}{row['rejected']:>7}"
+                  f"{row['peak_active']:>10}{row['p50']:>9.2f}{row['p95']:>9.2f}")
+        for host, summary in concurrency.summaries().items():
+            print(f"自适应并发 {host}: 收敛到 {summary['settled']} (最高 {summary['peak']}, "
+                  f"降低 {summary['decreases']} 次, 空载耗时 {summary['min_latency_ms']} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+签到流量基准测试
+替身服务器按Accept-Encoding压缩响应，页面补足到接近真实Discuz页面的大小，
+分别只协商gzip/deflate和协商本机可用的全部编码（br/zstd），对比每次签到的线路字节数、解码后字节数和耗时
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from standin_server import use_temp_workdir  # noqa: E402
+
+use_temp_workdir()
+from cookie_signin import CookieSignin  # noqa: E402
+from site_profiles import SiteProfile  # noqa: E402
+from bandwidth import accept_encoding, format_bytes  # noqa: E402
+from standin_server import StandinServer, DiscuzHandler  # noqa: E402
+
+# 真实Discuz页面的导航、侧栏和页脚，每项内容略有不同，压缩效果接近真实页面
+FILLER_ROW = (
+    '<li class="nav-{i}"><a href="forum.php?mod=forumdisplay&amp;fid={i}" title="版块{i}">'
+    '动画讨论区 {i}</a><span class="xg1">主题: {t}, 帖数: {p}</span></li>\n'
+)
+
+
+class PaddedHandler(DiscuzHandler):
+    """在每个页面末尾加上padding字节左右的导航HTML"""
+
+    def __init__(self, padding):
+        super().__init__()
+        rows, size, i = [], 0, 0
+        while size < padding:
+            row = FILLER_ROW.format(i=i, t=i * 37 % 1000, p=i * 211 % 10000)
+            rows.append(row)
+            size += len(row.encode('utf-8'))
+            i += 1
+        self.filler = '<ul id="nv">' + ''.join(rows) + '</ul>'
+
+    def __call__(self, method, target, headers):
+        status, text = super().__call__(method, target, headers)
+        return status, text.replace('</body>', self.filler + '</body>')
+
+
+def measure(server, encodings, rounds):
+    """用指定的Accept-Encoding运行rounds次首次签到，返回(线路字节, 解码后字节, 耗时ms列表)"""
+    wire = decoded = 0
+    samples = []
+    for _ in range(rounds):
+        server.handler.reset()
+        signin = CookieSignin(site=SiteProfile('standin', server.base_url))
+        signin.session.headers['Accept-Encoding'] = encodings
+        try:
+            start = time.perf_counter()
+            signin.run('auth=bench', is_file=False)
+            samples.append((time.perf_counter() - start) * 1000)
+            wire += signin.bandwidth.wire_bytes
+            decoded += signin.bandwidth.decoded_bytes
+        finally:
+            signin.close()
+    return wire / rounds, decoded / rounds, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='签到流量基准测试')
+    parser.add_argument('--rounds', type=int, default=10, help='每种编码的运行次数')
+    parser.add_argument('--padding', type=int, default=40000, help='每个页面补足的HTML字节数')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.CRITICAL)
+    cases = ['identity', 'gzip, deflate']
+    negotiated = accept_encoding()
+    # 替身服务器优先使用zstd，br和zstd分别单独协商才能看到各自的效果
+    cases += [encoding for encoding in ('br', 'zstd') if encoding in negotiated.split(', ')]
+    if negotiated != 'gzip, deflate':
+        cases.append(negotiated)
+    else:
+        print("⚠️ 未安装brotli/zstd解压库，只对比gzip: pip install -r requirements-optional.txt")
+
+    with StandinServer(handler=PaddedHandler(args.padding), compress=True) as server:
+        for encodings in cases:
+            wire, decoded, samples = measure(server, encodings, args.rounds)
+            print(f"{encodings:>24}: 每次签到传输 {format_bytes(wire)}, 解码后 {format_bytes(decoded)}, "
+                  f"压缩比 {decoded / wire:.1f}x, 中位数 {statistics.median(samples):.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量签到内存基准测试
+对不同账号数量分别在独立子进程中运行批量签到（本地替身服务器），
+比较峰值常驻内存，验证内存占用不随账号数增长
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_signin_factory(base_url):
+    """创建指向替身服务器的签到器工厂"""
+    from cookie_signin import CookieSignin
+    from site_profiles import SiteProfile
+
+    site = SiteProfile('standin', base_url)
+
+    def factory():
+        return CookieSignin(site=site)
+
+    return factory
+
+
+def run_child(accounts, window):
+    """子进程：运行一次批量签到并输出JSON结果"""
+    logging.disable(logging.CRITICAL)
+    from standin_server import StandinServer, use_temp_workdir
+    use_temp_workdir()
+    from batch_runner import run_batch
+
+    def iter_fake_accounts():
+        for i in range(accounts):
+            yield f'user{i}', f'auth=user{i}; saltkey=abc{i}'
+
+    with StandinServer() as server:
+        summary = run_batch(iter_fake_accounts(), window=window,
+                            signin_factory=make_signin_factory(server.base_url))
+    print(json.dumps(summary))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量签到内存基准测试')
+    parser.add_argument('--sizes', type=str, default='100,1000,10000', help='账号数量列表，逗号分隔')
+    parser.add_argument('--window', type=int, default=8, help='同时运行的最大账号数')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_child(args.child, args.window)
+        return
+
+    for size in [int(value) for value in args.sizes.split(',')]:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', str(size), '--window', str(args.window)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        summary = json.loads(output.strip().splitlines()[-1])
+        print(f"{size:>7} 个账号: 成功 {summary['success']}, 峰值内存 {summary['peak_rss_mb']} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+签到日历基准测试
+在临时目录中为N个账号写入若干年的随机签到记录（约5%漏签），
+测量文件大小以及本月漏签、连续签到和每日覆盖数查询的耗时
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from signin_calendar import SigninCalendar  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='签到日历基准测试')
+    parser.add_argument('--accounts', type=int, default=5000, help='账号数')
+    parser.add_argument('--years', type=int, default=3, help='年数')
+    parser.add_argument('--miss-rate', type=float, default=0.05, help='每天漏签的概率')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    first_day = date(2024, 1, 1)
+    day_count = args.years * 365
+    last_day = first_day + timedelta(days=day_count - 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calendar = SigninCalendar(os.path.join(tmp, 'signin_calendar.bin'), epoch=first_day)
+        accounts = [f'user{i:06d}' for i in range(args.accounts)]
+        # 直接写入整行位图来准备数据（逐天调用mark太慢），之后单独测量mark的开销
+        for account in accounts:
+            calendar.mark(account, first_day)
+            bits = sum(1 << day for day in range(day_count) if rng.random() >= args.miss_rate)
+            offset = calendar._row_offset(calendar._find_row(account))
+            calendar._map[offset:offset + calendar.row_bytes] = bits.to_bytes(calendar.row_bytes, 'little')
+
+        start = time.perf_counter()
+        for account in accounts:
+            calendar.mark(account, last_day)
+        mark_elapsed = time.perf_counter() - start
+        size = os.path.getsize(calendar.path) + os.path.getsize(calendar.index_path)
+
+        month_start = last_day.replace(day=1)
+        start = time.perf_counter()
+        missing = sum(1 for account in accounts if calendar.missed_days(account, month_start, last_day))
+        missed_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        streaks = [(calendar.current_streak(account, last_day), calendar.longest_streak(account))
+                   for account in accounts]
+        streak_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        coverage = calendar.daily_coverage(month_start, last_day)
+        coverage_elapsed = time.perf_counter() - start
+        calendar.close()
+
+    print(f"{args.accounts} 个账号 × {day_count} 天: 文件 {size / 1024:.0f} KB ({size / args.accounts:.0f} 字节/账号)")
+    print(f"签到后置位: {mark_elapsed / args.accounts * 1e6:.1f} µs/账号")
+    print(f"本月漏签: {missing} 个账号, {missed_elapsed * 1000:.0f}ms")
+    print(f"当前/最长连续签到: 平均最长 {sum(s[1] for s in streaks) / len(streaks):.1f} 天, {streak_elapsed * 1000:.0f}ms")
+    print(f"本月每日覆盖数 ({len(coverage)} 天): {coverage_elapsed * 1000:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
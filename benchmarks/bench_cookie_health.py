@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cookie健康检查基准测试
+在临时Cookie存储中生成一批账号（部分Cookie失效），对本地替身服务器运行批量检查
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from standin_server import use_temp_workdir  # noqa: E402
+
+use_temp_workdir()
+import verify_signin  # noqa: E402
+from cookie_store import CookieStore  # noqa: E402
+from site_profiles import SiteProfile  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cookie健康检查基准测试')
+    parser.add_argument('--accounts', type=int, default=1000, help='账号数')
+    parser.add_argument('--expired-ratio', type=float, default=0.1, help='失效账号比例')
+    parser.add_argument('--workers', type=int, default=64, help='并发数')
+    parser.add_argument('--latency', type=float, default=0.02, help='模拟服务端耗时（秒）')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp, StandinServer(latency=args.latency) as server:
+        store = CookieStore(os.path.join(tmp, 'cookies.db'))
+        expired_every = int(1 / args.expired_ratio) if args.expired_ratio > 0 else 0
+        for i in range(args.accounts):
+            if expired_every and i % expired_every == 0:
+                store.put(f'user{i:05d}', {'saltkey': 'expired'})
+            else:
+                store.put(f'user{i:05d}', {'auth': f'user{i}'})
+
+        # 把探测地址指向替身服务器
+        standin = SiteProfile('standin', server.base_url)
+
+        class LocalVerifier(verify_signin.SigninVerifier):
+            def __init__(self, adapter=None, site=None):
+                super().__init__(adapter=adapter, site=standin)
+
+        start = time.perf_counter()
+        summary = verify_signin.bulk_verify(
+            store, workers=args.workers, report_path=os.path.join(tmp, 'health.jsonl'),
+            verifier_factory=LocalVerifier,
+        )
+        elapsed = time.perf_counter() - start
+
+    print(f"检查 {args.accounts} 个账号耗时 {elapsed:.2f}s ({args.accounts / elapsed:.0f} 账号/秒)")
+    print(f"结果: {summary}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+积分批量导出基准测试
+在临时Cookie存储中生成一批账号（部分Cookie失效），以不同并发数从本地替身服务器导出积分，
+对比总耗时，并与串行耗时的理论值（账号数 × 服务端耗时）比较
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from standin_server import use_temp_workdir  # noqa: E402
+
+use_temp_workdir()
+from credit_analyzer import CreditAnalyzer, export_credits  # noqa: E402
+from cookie_store import CookieStore  # noqa: E402
+from site_profiles import SiteProfile, register_site  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='积分批量导出基准测试')
+    parser.add_argument('--accounts', type=int, default=1000, help='账号数')
+    parser.add_argument('--expired-ratio', type=float, default=0.05, help='失效账号比例')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 16, 64], help='要对比的并发数')
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟服务端耗时（秒）')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp, StandinServer(latency=args.latency) as server:
+        # 账号属于替身站点，导出时按账号所属站点请求替身服务器
+        register_site(SiteProfile('standin', server.base_url))
+        store = CookieStore(os.path.join(tmp, 'cookies.db'))
+        expired_every = int(1 / args.expired_ratio) if args.expired_ratio > 0 else 0
+        for i in range(args.accounts):
+            if expired_every and i % expired_every == 0:
+                store.put(f'user{i:05d}', {'saltkey': 'expired'}, site='standin')
+            else:
+                store.put(f'user{i:05d}', {'auth': f'user{i}'}, site='standin')
+
+        def analyzer_factory(adapter=None, site=None):
+            return CreditAnalyzer(site=site, adapter=adapter)
+
+        print(f"串行理论耗时: {args.accounts * args.latency:.1f}s")
+        for workers in args.workers:
+            output = os.path.join(tmp, f'credits_{workers}.csv')
+            start = time.perf_counter()
+            summary = export_credits(store, output, workers=workers, analyzer_factory=analyzer_factory)
+            elapsed = time.perf_counter() - start
+            print(f"并发 {workers:>3}: {elapsed:.2f}s ({args.accounts / elapsed:.0f} 账号/秒), "
+                  f"成功 {summary['success']}, 失败 {len(summary['failed_accounts'])}")
+
+
+if __name__ == '__main__':
+    main()
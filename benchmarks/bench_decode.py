@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+响应解码基准测试
+对比 response.text（缺少charset时触发编码探测）与按站点编码一次性解码的CPU开销
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from response_decoder import decode_response, response_contains  # noqa: E402
+
+
+def build_page(size_kb: int, encoding: str) -> bytes:
+    """构造一个类似Discuz签到页的大页面"""
+    row = '<tr><td class="xi1 cl">连续签到 12 天 天空石 +5 每日签到排行</td><td>用户名</td></tr>\n'
+    body = []
+    total = 0
+    while total < size_kb * 1024:
+        body.append(row)
+        total += len(row.encode(encoding))
+    html = ('<html><head><title>每日签到</title></head><body><table>'
+            + ''.join(body)
+            + '</table><p>您今天还没有签到</p></body></html>')
+    return html.encode(encoding)
+
+
+def make_response(content: bytes) -> requests.Response:
+    """构造一个没有Content-Type的响应对象（requests会对整页做编码探测）"""
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.url = 'https://acgfun.art/plugin.php?id=k_misign:sign'
+    response.encoding = None
+    return response
+
+
+def bench_legacy(content: bytes, rounds: int) -> float:
+    """旧路径：每次检查都访问 response.text"""
+    start = time.process_time()
+    for _ in range(rounds):
+        response = make_response(content)
+        _ = "您今天已经签到过了" in response.text
+        _ = "您今天还没有签到" in response.text
+        _ = "连续签到" in response.text
+    return time.process_time() - start
+
+
+def bench_decoded(content: bytes, rounds: int) -> float:
+    """新路径：字节匹配 + 一次性解码"""
+    start = time.process_time()
+    for _ in range(rounds):
+        response = make_response(content)
+        _ = response_contains(response, "您今天已经签到过了")
+        text = decode_response(response)
+        _ = "您今天还没有签到" in text
+        _ = "连续签到" in text
+    return time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='响应解码基准测试')
+    parser.add_argument('--size-kb', type=int, default=200, help='页面大小 (KB)')
+    parser.add_argument('--rounds', type=int, default=20, help='重复次数')
+    parser.add_argument('--encoding', type=str, default='utf-8', help='页面编码')
+    args = parser.parse_args()
+
+    content = build_page(args.size_kb, args.encoding)
+    legacy = bench_legacy(content, args.rounds)
+    decoded = bench_decoded(content, args.rounds)
+
+    print(f"页面大小: {len(content) / 1024:.0f} KB, 重复 {args.rounds} 次")
+    print(f"response.text 路径: {legacy / args.rounds * 1000:.2f} ms CPU/页")
+    print(f"一次性解码路径:    {decoded / args.rounds * 1000:.2f} ms CPU/页")
+    if decoded > 0:
+        print(f"每页节省CPU:       {(legacy - decoded) / args.rounds * 1000:.2f} ms ({legacy / decoded:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
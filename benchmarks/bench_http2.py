@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTTP/2传输基准测试
+在本地替身服务器上对比：每个账号一个requests会话（HTTP/1.1 keep-alive）
+与所有账号共享一个Http2Transport（HTTP/2多路复用）
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http2_transport import Http2Transport  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+PATHS = [
+    '/home.php?mod=space&do=profile',
+    '/plugin.php?id=k_misign:sign',
+    '/home.php?mod=spacecp&ac=credit&showcredit=1',
+]
+
+
+def run_account(index, base_url, transport):
+    """模拟一个账号的请求序列"""
+    session = requests.Session()
+    session.cookies.set('auth', f'account{index}')
+    try:
+        for path in PATHS:
+            if transport is None:
+                response = session.get(base_url + path, timeout=30)
+            else:
+                response = transport.request(session, 'GET', base_url + path, timeout=30)
+            response.raise_for_status()
+    finally:
+        session.close()
+
+
+def bench(server, accounts, threads, transport):
+    """运行一轮，返回(耗时, 新建连接数)"""
+    connections_before = server.connections
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda i: run_account(i, server.base_url, transport), range(accounts)))
+    return time.perf_counter() - start, server.connections - connections_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP/2传输基准测试')
+    parser.add_argument('--accounts', type=int, default=500, help='模拟账号数')
+    parser.add_argument('--threads', type=int, default=50, help='并发线程数')
+    parser.add_argument('--latency', type=float, default=0.02, help='模拟服务端耗时（秒）')
+    parser.add_argument('--connections', type=int, default=2, help='HTTP/2最大连接数')
+    parser.add_argument('--streams', type=int, default=100, help='HTTP/2最大并发请求流数')
+    args = parser.parse_args()
+
+    with StandinServer(latency=args.latency) as server:
+        elapsed, connections = bench(server, args.accounts, args.threads, None)
+        print(f"requests/urllib3 (HTTP/1.1): {elapsed:.2f}s, "
+              f"{args.accounts * len(PATHS) / elapsed:.0f} 请求/秒, 新建连接 {connections}")
+
+        transport = Http2Transport(
+            max_connections=args.connections, max_streams=args.streams, prior_knowledge=True
+        )
+        try:
+            elapsed, connections = bench(server, args.accounts, args.threads, transport)
+        finally:
+            transport.close()
+        print(f"httpx (HTTP/2, {args.streams} 流): {elapsed:.2f}s, "
+              f"{args.accounts * len(PATHS) / elapsed:.0f} 请求/秒, 新建连接 {connections}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+响应缓存基准测试
+对本地替身服务器（带ETag）为一批账号重复查询积分页，对比不用缓存、TTL内命中和过期后按ETag重新验证（304）
+三种情况下服务器收到的请求数、发送的字节数和总耗时；另外检查不同账号的缓存不会混用、超出字节预算时会淘汰
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from standin_server import use_temp_workdir  # noqa: E402
+
+use_temp_workdir()
+from credit_analyzer import CreditAnalyzer  # noqa: E402
+from http_cache import HttpCache, CachingTransport  # noqa: E402
+from site_profiles import SiteProfile  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+
+def query_all(site, accounts, rounds, transport):
+    """每个账号查询rounds次积分，返回成功次数"""
+    success = 0
+    for _ in range(rounds):
+        for i in range(accounts):
+            analyzer = CreditAnalyzer(site=site, transport=transport)
+            analyzer._apply_cookies({'auth': f'user{i}'})
+            if analyzer.get_credit_info():
+                success += 1
+            analyzer.session.close()
+    return success
+
+
+def main():
+    parser = argparse.ArgumentParser(description='响应缓存基准测试')
+    parser.add_argument('--accounts', type=int, default=50, help='账号数')
+    parser.add_argument('--rounds', type=int, default=5, help='每个账号的查询次数')
+    parser.add_argument('--latency', type=float, default=0.02, help='模拟服务端耗时（秒）')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    total = args.accounts * args.rounds
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp, \
+            StandinServer(latency=args.latency, compress=True, validators=True) as server:
+        site = SiteProfile('standin', server.base_url)
+        cases = (
+            ('不缓存', None),
+            ('TTL内命中', HttpCache(os.path.join(tmp, 'hit.db'), ttl=3600)),
+            ('ETag重新验证', HttpCache(os.path.join(tmp, 'revalidate.db'), ttl=0)),
+        )
+        print(f"{'方式':<12}{'耗时(s)':>10}{'服务器请求':>12}{'其中304':>10}{'发送字节':>12}{'成功':>8}")
+        for name, cache in cases:
+            transport = CachingTransport(cache) if cache else None
+            requests_before, bytes_before, not_modified_before = server.requests, server.bytes_sent, server.not_modified
+            start = time.perf_counter()
+            success = query_all(site, args.accounts, args.rounds, transport)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<12}{elapsed:>10.2f}{server.requests - requests_before:>12}"
+                  f"{server.not_modified - not_modified_before:>10}{server.bytes_sent - bytes_before:>12}"
+                  f"{success:>6}/{total}")
+            if success != total:
+                failed = True
+            if cache:
+                stats = cache.stats()
+                if stats['entries'] != args.accounts:
+                    print(f"❌ {name}: 缓存了 {stats['entries']} 个页面，应为每个账号1个（{args.accounts}）")
+                    failed = True
+                transport.close()
+
+        # 字节预算只够保存约10个页面时，最早使用的账号被淘汰
+        small = HttpCache(os.path.join(tmp, 'small.db'), ttl=3600)
+        probe = CachingTransport(small)
+        query_all(site, 1, 1, probe)
+        small.max_bytes = small.stats()['bytes'] * 10
+        query_all(site, args.accounts, 1, probe)
+        stats = small.stats()
+        print(f"字节预算 {small.max_bytes}: 保留 {stats['entries']} 个页面 {stats['bytes']} 字节")
+        if stats['entries'] != 10 or stats['bytes'] > small.max_bytes:
+            print("❌ 超出字节预算的页面没有被淘汰")
+            failed = True
+        probe.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+检查点日志基准测试
+测量每个账号记录一条检查点的开销（每条落盘 / 不落盘），以及重放日志的速度
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from checkpoint_journal import CheckpointJournal  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查点日志基准测试')
+    parser.add_argument('--records', type=int, default=10000, help='记录条数')
+    parser.add_argument('--dir', type=str, help='日志所在目录（默认为临时目录，可指定到实际磁盘上测试）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = os.path.join(tmp, 'journal.log')
+        for sync in (True, False):
+            with CheckpointJournal(path, sync=sync) as journal:
+                start = time.perf_counter()
+                for i in range(args.records):
+                    journal.record(f'user{i:06d}', 'signed')
+                elapsed = time.perf_counter() - start
+            label = '每条fdatasync' if sync else '不落盘      '
+            print(f"{label}: {elapsed / args.records * 1e6:.1f} µs/账号")
+
+        start = time.perf_counter()
+        completed = CheckpointJournal.replay(path)
+        elapsed = time.perf_counter() - start
+        print(f"重放 {len(completed)} 条记录: {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
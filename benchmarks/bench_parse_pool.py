@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+进程池页面解析基准测试
+模拟批量运行：多线程处理账号，每个账号解析签到页、签到结果和积分页，
+对比当前线程解析与不同进程数的解析进程池的吞吐量
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from page_parser import (  # noqa: E402
+    ParsePool, run_parser, classify_signin_page, classify_signin_result, parse_credit_page
+)
+
+
+def build_pages(rows: int):
+    """构造模拟的签到页、签到结果页和积分页"""
+    filler = ''.join(
+        f'<tr><td><a href="home.php?mod=space&uid={i}">用户{i}</a></td><td>连续 {i % 30} 天</td></tr>'
+        for i in range(rows)
+    )
+    signin_page = (
+        '<html><body><table>' + filler + '</table>'
+        '<a href="plugin.php?id=k_misign:sign&operation=qiandao&formhash=abc">签到</a>'
+        '</body></html>'
+    )
+    result_page = '<html><body><div>签到成功！获得随机奖励 天空石 5</div>' + filler + '</body></html>'
+    credit_page = (
+        '<html><body><table>' + filler + '</table>'
+        '<ul class="creditl"><li class="xi1 cl"><em>天空石: </em>1234</li></ul></body></html>'
+    )
+    return signin_page, result_page, credit_page
+
+
+def process_account(parse_pool, pages):
+    """模拟一个账号的解析步骤"""
+    signin_page, result_page, credit_page = pages
+    run_parser(parse_pool, classify_signin_page, signin_page)
+    run_parser(parse_pool, classify_signin_result, result_page)
+    run_parser(parse_pool, parse_credit_page, credit_page)
+
+
+def bench(parse_pool, accounts: int, threads: int, pages) -> float:
+    """运行一次模拟批量，返回每秒处理账号数"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: process_account(parse_pool, pages), range(accounts)))
+    return accounts / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='进程池页面解析基准测试')
+    parser.add_argument('--accounts', type=int, default=1000, help='模拟账号数')
+    parser.add_argument('--threads', type=int, default=32, help='账号处理线程数')
+    parser.add_argument('--rows', type=int, default=200, help='模拟页面的表格行数')
+    args = parser.parse_args()
+
+    pages = build_pages(args.rows)
+    cpu_count = os.cpu_count() or 1
+
+    print(f"模拟 {args.accounts} 个账号，{args.threads} 个线程，CPU核数 {cpu_count}")
+    print(f"当前线程解析: {bench(None, args.accounts, args.threads, pages):.1f} 账号/秒")
+
+    workers = 1
+    while True:
+        workers = min(workers, cpu_count)
+        parse_pool = ParsePool(workers)
+        try:
+            # 预热进程池，避免把进程启动时间算进去
+            bench(parse_pool, workers * 2, args.threads, pages)
+            rate = bench(parse_pool, args.accounts, args.threads, pages)
+        finally:
+            parse_pool.shutdown()
+        print(f"进程池 {workers} 进程: {rate:.1f} 账号/秒")
+        if workers >= cpu_count:
+            break
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
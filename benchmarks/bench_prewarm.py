@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+连接预热基准测试
+在本地HTTPS替身服务器上测量签到开始时第一批请求的首字节时间（TTFB）：
+每个会话自己建立连接 vs 提前预热共享连接池。--connect-latency 模拟公网上建连多出的往返
+"""
+
+import os
+import sys
+import ssl
+import time
+import tempfile
+import argparse
+import subprocess
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from connection_warmer import shared_adapter, prewarm  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+PATH = '/plugin.php?id=k_misign:sign'
+
+
+def make_ssl_context(directory):
+    """用openssl生成临时自签名证书"""
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=127.0.0.1', '-keyout', key, '-out', cert],
+        check=True, capture_output=True
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def first_byte(base_url, adapter, index):
+    """新会话发出第一个请求，返回首字节时间（毫秒）"""
+    session = requests.Session()
+    session.verify = False
+    # 环境变量REQUESTS_CA_BUNDLE会覆盖session.verify，自签名证书需要忽略环境配置
+    session.trust_env = False
+    session.cookies.set('auth', f'account{index}')
+    if adapter is not None:
+        session.mount('https://', adapter)
+    start = time.perf_counter()
+    # stream=True时收到响应头即返回
+    response = session.get(base_url + PATH, timeout=30, stream=True)
+    ttfb = (time.perf_counter() - start) * 1000
+    # 读完响应体连接才会放回连接池，直接close()会关闭连接
+    response.content
+    response.close()
+    if adapter is not None:
+        session.adapters.clear()
+    session.close()
+    return ttfb
+
+
+def run_round(server, burst, warm, lead):
+    """一轮：burst个账号同时开始，返回每个账号第一个请求的TTFB"""
+    adapter = None
+    if warm:
+        adapter = shared_adapter(burst)
+        prewarm(adapter, burst, base_url=server.base_url)
+        time.sleep(lead)
+    try:
+        with ThreadPoolExecutor(max_workers=burst) as executor:
+            return list(executor.map(lambda i: first_byte(server.base_url, adapter, i), range(burst)))
+    finally:
+        if adapter is not None:
+            adapter.close()
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name}: 中位数 {statistics.median(samples):.1f}ms, p95 {p95:.1f}ms, 最大 {samples[-1]:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='连接预热基准测试')
+    parser.add_argument('--rounds', type=int, default=20, help='测量轮数')
+    parser.add_argument('--burst', type=int, default=8, help='每轮同时开始的账号数（预热连接数）')
+    parser.add_argument('--connect-latency', type=float, default=0.05, help='模拟的每连接建连耗时（秒）')
+    parser.add_argument('--lead', type=float, default=0.5, help='预热完成到签到开始的间隔（秒）')
+    args = parser.parse_args()
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    with tempfile.TemporaryDirectory() as directory:
+        context = make_ssl_context(directory)
+        for latency in sorted({0.0, args.connect_latency}):
+            print(f"--- 模拟建连耗时 {latency * 1000:.0f}ms，每轮 {args.burst} 个账号 ---")
+            with StandinServer(ssl_context=context, connect_latency=latency) as server:
+                for warm in (False, True):
+                    samples = []
+                    connections_before = server.connections
+                    for _ in range(args.rounds):
+                        samples += run_round(server, args.burst, warm, args.lead)
+                    new_connections = server.connections - connections_before
+                    report(f"{'预热' if warm else '冷启动'} (新建连接 {new_connections})", samples)
+
+
+if __name__ == '__main__':
+    main()
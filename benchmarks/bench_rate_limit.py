@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+共享限速器基准测试
+启动多个进程，每个进程用多个线程尽可能快地取令牌，统计所有进程合计的速率是否低于上限
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from run_lock import SharedRateLimiter  # noqa: E402
+
+
+def worker(path, rate, start_at, duration, threads, counter):
+    """一个进程：多个线程循环取令牌，直到时间结束"""
+    limiter = SharedRateLimiter(rate, path=path)
+    # 所有进程在同一时刻开始，避免进程启动时间影响统计
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = start_at + duration
+    taken = 0
+    lock = threading.Lock()
+
+    def loop():
+        nonlocal taken
+        while time.time() < deadline:
+            limiter.acquire()
+            # 等待令牌期间可能已经超过结束时间，这种请求不计入
+            if time.time() < deadline:
+                with lock:
+                    taken += 1
+
+    pool = [threading.Thread(target=loop) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    limiter.close()
+    with counter.get_lock():
+        counter.value += taken
+
+
+def main():
+    parser = argparse.ArgumentParser(description='共享限速器基准测试')
+    parser.add_argument('--rate', type=float, default=20.0, help='合计每秒请求数上限')
+    parser.add_argument('--processes', type=int, default=4, help='进程数')
+    parser.add_argument('--threads', type=int, default=4, help='每个进程的线程数')
+    parser.add_argument('--duration', type=float, default=5.0, help='持续时间（秒）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rate_limit.state')
+        counter = multiprocessing.Value('i', 0)
+        start_at = time.time() + 1.0
+        processes = [
+            multiprocessing.Process(
+                target=worker, args=(path, args.rate, start_at, args.duration, args.threads, counter)
+            )
+            for _ in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+    observed = counter.value / args.duration
+    steady = max(0, counter.value - args.rate) / args.duration
+    print(f"{args.processes} 个进程 x {args.threads} 线程，上限 {args.rate:.1f} 请求/秒")
+    print(f"实际合计速率: {observed:.1f} 请求/秒（含初始突发 {args.rate:.0f} 个令牌）")
+    print(f"扣除突发后的稳态速率: {steady:.1f} 请求/秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+单账号签到耗时基准测试
+在带模拟服务端耗时的本地替身服务器上运行完整的CookieSignin.run()，
+分别测量首次签到、已签到和Cookie失效三种情况的墙钟时间和请求数
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from standin_server import use_temp_workdir  # noqa: E402
+
+use_temp_workdir()
+from cookie_signin import CookieSignin  # noqa: E402
+from site_profiles import SiteProfile  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+
+def make_signin(server):
+    """创建指向替身服务器的签到器"""
+    return CookieSignin(site=SiteProfile('standin', server.base_url))
+
+
+def measure(server, cookie_string, rounds, reset):
+    """运行rounds次，返回(墙钟时间列表, 平均请求数, 结果)"""
+    samples, requests_before, outcome = [], server.requests, ''
+    for _ in range(rounds):
+        if reset:
+            server.handler.reset()
+        signin = make_signin(server)
+        try:
+            start = time.perf_counter()
+            signin.run(cookie_string, is_file=False)
+            samples.append((time.perf_counter() - start) * 1000)
+            outcome = signin.last_outcome
+        finally:
+            signin.close()
+    return samples, (server.requests - requests_before) / rounds, outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description='单账号签到耗时基准测试')
+    parser.add_argument('--rounds', type=int, default=10, help='每种情况的运行次数')
+    parser.add_argument('--latency', type=float, default=0.1, help='模拟服务端耗时（秒）')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.CRITICAL)
+    with StandinServer(latency=args.latency) as server:
+        cases = [
+            ('首次签到', 'auth=bench', True),
+            ('已签到', 'auth=bench', False),
+            ('Cookie失效', 'other=1', False),
+        ]
+        for name, cookie_string, reset in cases:
+            samples, requests_per_run, outcome = measure(server, cookie_string, args.rounds, reset)
+            print(f"{name} ({outcome}): 中位数 {statistics.median(samples):.0f}ms, "
+                  f"每次 {requests_per_run:.1f} 个请求, 串行需要约 {requests_per_run * args.latency * 1000:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
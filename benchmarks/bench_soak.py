@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+长时间运行（soak）基准测试
+在一个进程中对本地替身服务器连续运行数千次签到，定期记录常驻内存、打开的文件描述符、
+服务器上保持的连接数、会话中的Cookie数（两次采样之间的最大值）和每次签到的耗时，任一指标随运行次数持续增长时以非0状态退出
+
+两种方式：
+- reuse: 同一个CookieSignin依次为不同账号运行（每10个账号中有1个Cookie失效，检查结果不会串号）
+- fresh: 与batch_runner相同，每个账号创建新的签到器，完成后close()
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from standin_server import use_temp_workdir  # noqa: E402
+
+use_temp_workdir()
+from cookie_signin import CookieSignin  # noqa: E402
+from event_log import EventLog  # noqa: E402
+from signin_calendar import SigninCalendar  # noqa: E402
+from site_profiles import SiteProfile  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+PAGE_SIZE_KB = os.sysconf('SC_PAGE_SIZE') / 1024
+
+
+def current_rss_mb() -> float:
+    """当前常驻内存（MB），与峰值不同，内存回落时也能反映出来"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * PAGE_SIZE_KB / 1024
+
+
+def open_fds() -> int:
+    return len(os.listdir('/proc/self/fd'))
+
+
+def account_cookie(i: int) -> str:
+    """第i个账号的Cookie；Discuz每个账号还会带上各自的访问记录Cookie，每10个账号中有1个失效"""
+    if i % 10 == 0:
+        return f'u{i}_lastact=1'
+    return f'auth=u{i}; u{i}_lastact=1'
+
+
+def soak(server, mode, cycles, sample_every, tmp):
+    """
+    运行cycles次签到
+
+    Returns:
+        tuple: (采样列表, 结果与预期不符的次数)
+    """
+    site = SiteProfile('standin', server.base_url)
+    calendar = SigninCalendar(os.path.join(tmp, f'calendar_{mode}.bin'))
+    events = EventLog(os.path.join(tmp, f'events_{mode}.jsonl'))
+
+    def make_signin():
+        return CookieSignin(site=site, calendar=calendar, events=events)
+
+    signin = make_signin() if mode == 'reuse' else None
+    samples, latencies, mismatches, max_cookies = [], [], 0, 0
+    try:
+        for cycle in range(1, cycles + 1):
+            # 每次都是新账号；一半账号预先标记为今天已签到，签到和已签到两条路径都会经过
+            i = cycle
+            if i % 2:
+                server.handler.signed.add(f'u{i}')
+            current = signin or make_signin()
+            start = time.perf_counter()
+            try:
+                current.run(account_cookie(i), is_file=False, account=f'u{i}')
+            finally:
+                latencies.append((time.perf_counter() - start) * 1000)
+                max_cookies = max(max_cookies, len(current.session.cookies))
+                if signin is None:
+                    current.close()
+            expected = 'cookie_expired' if i % 10 == 0 else ('signed', 'already_signed')
+            if current.last_outcome != expected and current.last_outcome not in expected:
+                mismatches += 1
+
+            if cycle % sample_every == 0:
+                samples.append({
+                    'cycle': cycle,
+                    'rss_mb': round(current_rss_mb(), 1),
+                    'fds': open_fds(),
+                    'connections': len(server._writers),
+                    'cookies': max_cookies,
+                    'p50_ms': round(statistics.median(latencies), 2),
+                })
+                latencies, max_cookies = [], 0
+                server.handler.reset()
+    finally:
+        if signin is not None:
+            signin.close()
+        events.close()
+        calendar.close()
+    return samples, mismatches
+
+
+def find_growth(samples, rss_tolerance_mb):
+    """比较预热后的前几次采样和最后几次采样，返回持续增长的指标"""
+    # 前20%为预热（连接池、解析器缓存、日历映射等一次性分配）
+    steady = samples[max(1, len(samples) // 5):]
+    if len(steady) < 4:
+        return []
+    head, tail = steady[:3], steady[-3:]
+
+    def median(rows, key):
+        return statistics.median(row[key] for row in rows)
+
+    limits = {
+        'rss_mb': lambda base: base + max(rss_tolerance_mb, base * 0.1),
+        'fds': lambda base: base + 3,
+        'connections': lambda base: base + 2,
+        'cookies': lambda base: base + 2,
+        'p50_ms': lambda base: base * 2 + 1,
+    }
+    growth = []
+    for key, limit in limits.items():
+        base, final = median(head, key), median(tail, key)
+        if final > limit(base):
+            growth.append(f'{key}: {base} -> {final}')
+    return growth
+
+
+def main():
+    parser = argparse.ArgumentParser(description='长时间运行（soak）基准测试')
+    parser.add_argument('--cycles', type=int, default=3000, help='每种方式的签到次数')
+    parser.add_argument('--samples', type=int, default=20, help='采样次数')
+    parser.add_argument('--mode', choices=('reuse', 'fresh', 'both'), default='both', help='签到器的使用方式')
+    parser.add_argument('--rss-tolerance-mb', type=float, default=8.0, help='允许的常驻内存增长（MB）')
+    parser.add_argument('--latency', type=float, default=0.0, help='模拟服务端耗时（秒）')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    modes = ('reuse', 'fresh') if args.mode == 'both' else (args.mode,)
+    sample_every = max(1, args.cycles // args.samples)
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp, StandinServer(latency=args.latency) as server:
+        for mode in modes:
+            start = time.perf_counter()
+            samples, mismatches = soak(server, mode, args.cycles, sample_every, tmp)
+            elapsed = time.perf_counter() - start
+            print(f"== {mode}: {args.cycles} 次签到, {elapsed:.1f}s ({args.cycles / elapsed:.0f} 次/秒)")
+            print(f"{'次数':>8}{'RSS(MB)':>10}{'fd':>6}{'连接':>6}{'Cookie':>8}{'p50(ms)':>10}")
+            for row in samples:
+                print(f"{row['cycle']:>8}{row['rss_mb']:>10}{row['fds']:>6}{row['connections']:>6}"
+                      f"{row['cookies']:>8}{row['p50_ms']:>10}")
+            growth = find_growth(samples, args.rss_tolerance_mb)
+            if mismatches:
+                growth.append(f'{mismatches} 次签到结果与账号不符（状态串号）')
+            if growth:
+                failed = True
+                print(f"❌ {mode}: 持续增长或状态泄漏: {'; '.join(growth)}")
+            else:
+                print(f"✅ {mode}: 各项指标稳定")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
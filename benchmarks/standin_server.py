@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地Discuz替身服务器
+在同一端口上同时支持HTTP/1.1和明文HTTP/2（h2c），模拟个人中心、k_misign签到页和积分页，
+供基准测试使用，不会访问真实站点
+"""
+
+import os
+import gzip
+import atexit
+import shutil
+import hashlib
+import asyncio
+import tempfile
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+except ImportError:
+    h2 = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+H2_PREFACE = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+
+# 页头工具栏：已登录时有退出链接，未登录时有登录链接
+MEMBER_HEADER = (
+    '<div id="toptb"><a href="member.php?mod=logging&amp;action=logout&amp;formhash=abc">退出</a></div>'
+    '<ul id="extcreditmenu_menu"><li>天空石: <span id="hcredit_2">1234</span></li></ul>'
+)
+GUEST_HEADER = '<div id="toptb"><a href="member.php?mod=logging&amp;action=login">登录</a></div>'
+
+PROFILE_PAGE = (
+    '<html><head><title>个人资料</title></head><body>' + MEMBER_HEADER +
+    '<h2 class="mbn">测试用户 (UID: 1)</h2></body></html>'
+)
+LOGIN_PAGE = '<html><body>' + GUEST_HEADER + '<form>登录 用户名 密码</form></body></html>'
+SIGNIN_PAGE_NOT_SIGNED = (
+    '<html><body>' + MEMBER_HEADER + '<p>您今天还没有签到</p>'
+    '<a href="plugin.php?id=k_misign:sign&operation=qiandao&formhash=abc">签到</a></body></html>'
+)
+SIGNIN_PAGE_SIGNED = '<html><body>' + MEMBER_HEADER + '<p>您今天已经签到过了</p><p>连续签到 3 天</p></body></html>'
+SIGNIN_RESULT_PAGE = '<html><body><div>签到成功！获得随机奖励 天空石 5</div></body></html>'
+CREDIT_PAGE = (
+    '<html><body>' + MEMBER_HEADER + '<ul class="creditl">'
+    '<li class="xi1 cl"><em>天空石: </em>1234</li></ul></body></html>'
+)
+
+
+class DiscuzHandler:
+    """按路径返回Discuz页面，用Cookie中的auth值区分账号并记录签到状态"""
+
+    def __init__(self):
+        self.signed = set()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """清空签到状态（模拟每日重置）"""
+        with self._lock:
+            self.signed.clear()
+
+    def __call__(self, method, target, headers):
+        parts = urlsplit(target)
+        query = parse_qs(parts.query)
+        account = _cookie_value(headers.get('cookie', ''), 'auth')
+
+        if not account:
+            return 200, LOGIN_PAGE
+        if parts.path.endswith('/home.php') and query.get('do') == ['profile']:
+            return 200, PROFILE_PAGE
+        if parts.path.endswith('/home.php') and query.get('ac') == ['credit']:
+            return 200, CREDIT_PAGE
+        if parts.path.endswith('/plugin.php'):
+            if query.get('operation') == ['qiandao']:
+                with self._lock:
+                    self.signed.add(account)
+                return 200, SIGNIN_RESULT_PAGE
+            with self._lock:
+                signed = account in self.signed
+            return 200, SIGNIN_PAGE_SIGNED if signed else SIGNIN_PAGE_NOT_SIGNED
+        return 404, 'not found'
+
+
+def _compress(body, accept_encoding):
+    """按客户端的Accept-Encoding压缩响应正文，优先zstd、br，其次gzip"""
+    offered = {item.split(';')[0].strip().lower() for item in accept_encoding.split(',')}
+    if 'zstd' in offered and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(body), 'zstd'
+    if 'br' in offered and brotli is not None:
+        return brotli.compress(body, quality=5), 'br'
+    if 'gzip' in offered:
+        return gzip.compress(body, compresslevel=6), 'gzip'
+    return body, None
+
+
+def _cookie_value(cookie_header, name):
+    """从Cookie请求头中取出指定Cookie的值"""
+    for item in cookie_header.split(';'):
+        key, _, value = item.strip().partition('=')
+        if key == name:
+            return value
+    return ''
+
+
+def use_temp_workdir():
+    """
+    切换到一个临时工作目录，进程退出时删除
+    签到器把日志、账号锁和签到日历写在当前目录的logs/下，基准测试必须在导入cookie_signin等模块之前调用，
+    否则会在代码目录里留下运行产物
+
+    Returns:
+        str: 临时目录路径
+    """
+    workdir = tempfile.mkdtemp(prefix='acgfun-bench-')
+    os.chdir(workdir)
+    atexit.register(shutil.rmtree, workdir, True)
+    return workdir
+
+
+class StandinServer:
+    """在后台线程中运行的替身服务器"""
+
+    def __init__(self, handler=None, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0,
+                 ssl_context=None, connect_latency: float = 0.0, compress: bool = False,
+                 validators: bool = False, capacity: int = 0, queue_limit: int = None):
+        """
+        Args:
+            handler: 请求处理函数 handler(method, target, headers) -> (状态码, 页面文本)
+            latency: 每个响应的模拟服务端耗时（秒）
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            ssl_context: 服务端SSLContext，设置后使用HTTPS（只支持HTTP/1.1）
+            connect_latency: 每个新连接的模拟建连耗时（秒），模拟公网上DNS、TCP和TLS握手的往返
+            compress: 按Accept-Encoding压缩响应（zstd/br需要服务端也安装对应的库）
+            validators: 200响应带ETag和Last-Modified，If-None-Match匹配时返回304
+            capacity: 同时处理的请求数上限，0表示不限；超出的请求排队等待，耗时随排队变长
+            queue_limit: 排队的请求数上限（默认与capacity相同），队列已满时立即返回503
+        """
+        self.handler = handler or DiscuzHandler()
+        self.latency = latency
+        self.ssl_context = ssl_context
+        self.connect_latency = connect_latency
+        self.compress = compress
+        self.validators = validators
+        self.not_modified = 0
+        self.capacity = capacity
+        self.queue_limit = capacity if queue_limit is None else queue_limit
+        self.rejected = 0
+        self.peak_active = 0
+        self._active = 0
+        self._slots = None
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self.requests = 0
+        self.bytes_sent = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._writers = set()
+        self._handlers = set()
+
+    @property
+    def base_url(self):
+        scheme = 'https' if self.ssl_context else 'http'
+        return f'{scheme}://{self.host}:{self.port}'
+
+    def start(self):
+        """启动服务器并等待就绪"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        """停止服务器"""
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop.close()
+            self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    async def _shutdown(self):
+        """关闭监听并取消所有连接任务"""
+        self._server.close()
+        # 先关闭连接让连接处理任务自然退出，再取消剩余的响应任务
+        handlers = list(self._handlers)
+        for writer in list(self._writers):
+            writer.close()
+        if handlers:
+            await asyncio.wait(handlers, timeout=2)
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._slots = asyncio.Semaphore(self.capacity or 1)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_connection, self.host, self.port, ssl=self.ssl_context)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _respond(self, method, target, headers):
+        """执行处理函数，并加上模拟的服务端耗时
+
+        Returns:
+            tuple: (状态码, 正文, 附加响应头列表)
+        """
+        self.requests += 1
+        if self.capacity:
+            # 模拟容量有限的服务器：capacity个请求同时处理，其余排队，队列满时拒绝
+            if self._active >= self.capacity + self.queue_limit:
+                self.rejected += 1
+                return 503, b'Service Unavailable', []
+            self._active += 1
+            self.peak_active = max(self.peak_active, self._active)
+            try:
+                async with self._slots:
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+            finally:
+                self._active -= 1
+        elif self.latency:
+            await asyncio.sleep(self.latency)
+        status, text = self.handler(method, target, headers)
+        body, extra = text.encode('utf-8'), []
+        if self.validators and status == 200:
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            if headers.get('if-none-match') == etag:
+                self.not_modified += 1
+                return 304, b'', [('etag', etag)]
+            extra += [('etag', etag), ('last-modified', 'Mon, 02 Jun 2025 00:00:00 GMT')]
+        if self.compress:
+            body, encoding = _compress(body, headers.get('accept-encoding', ''))
+            if encoding:
+                extra.append(('content-encoding', encoding))
+        self.bytes_sent += len(body)
+        return status, body, extra
+
+    async def _handle_connection(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        self._handlers.add(asyncio.current_task())
+        try:
+            if self.connect_latency:
+                await asyncio.sleep(self.connect_latency)
+            await self._dispatch(reader, writer)
+        finally:
+            self._writers.discard(writer)
+            self._handlers.discard(asyncio.current_task())
+
+    async def _dispatch(self, reader, writer):
+        try:
+            first = await reader.readexactly(len(H2_PREFACE))
+        except asyncio.IncompleteReadError:
+            writer.close()
+            return
+        try:
+            if first == H2_PREFACE and h2 is not None:
+                await self._serve_h2(reader, writer, first)
+            else:
+                await self._serve_h1(reader, writer, first)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_h1(self, reader, writer, buffered):
+        """HTTP/1.1 keep-alive处理"""
+        while True:
+            while b'\r\n\r\n' not in buffered:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return
+                buffered += chunk
+            head, _, buffered = buffered.partition(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            method, target, _ = lines[0].split(' ', 2)
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get('content-length', 0))
+            while len(buffered) < length:
+                buffered += await reader.readexactly(length - len(buffered))
+            buffered = buffered[length:]
+
+            status, body, extra = await self._respond(method, target, headers)
+            extra_headers = ''.join(f'{name}: {value}\r\n' for name, value in extra)
+            writer.write(
+                f'HTTP/1.1 {status} OK\r\n'
+                f'Content-Type: text/html; charset=utf-8\r\n{extra_headers}'
+                f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + (b'' if method == 'HEAD' else body)
+            )
+            await writer.drain()
+            if headers.get('connection', '').lower() == 'close':
+                return
+
+    async def _serve_h2(self, reader, writer, preface):
+        """明文HTTP/2处理，每个请求流独立响应"""
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        pending = {}
+
+        async def respond(stream_id, method, target, headers):
+            status, body, extra = await self._respond(method, target, headers)
+            conn.send_headers(stream_id, [
+                (':status', str(status)),
+                ('content-type', 'text/html; charset=utf-8'),
+                ('content-length', str(len(body))),
+            ] + extra)
+            conn.send_data(stream_id, body, end_stream=True)
+            writer.write(conn.data_to_send())
+            await writer.drain()
+
+        data = preface
+        while True:
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    headers = {
+                        (k.decode() if isinstance(k, bytes) else k).lower():
+                        (v.decode() if isinstance(v, bytes) else v)
+                        for k, v in event.headers
+                    }
+                    pending[event.stream_id] = asyncio.ensure_future(respond(
+                        event.stream_id, headers.get(':method', 'GET'),
+                        headers.get(':path', '/'), headers
+                    ))
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    return
+            writer.write(conn.data_to_send())
+            await writer.drain()
+            data = await reader.read(65536)
+            if not data:
+                return
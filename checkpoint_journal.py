@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量签到检查点日志
+每个账号完成时追加一行并落盘，进程被中断后可以重放日志，只继续处理未完成的账号
+"""
+
+import os
+import time
+import zlib
+import logging
+import threading
+from datetime import date
+
+JOURNAL_DIR = 'logs'
+
+
+def default_journal_path(day: date = None) -> str:
+    """当天的检查点日志路径（每天一个文件，跨天不会跳过账号）"""
+    day = day or date.today()
+    return os.path.join(JOURNAL_DIR, f'signin_journal_{day:%Y%m%d}.log')
+
+
+class CheckpointJournal:
+    """只追加的检查点日志，每行: 时间戳\\t账号\\t结果\\tCRC32"""
+
+    def __init__(self, path: str, resume: bool = False, sync: bool = True):
+        """
+        打开检查点日志
+
+        Args:
+            path: 日志文件路径
+            resume: True时保留已有记录继续追加，False时清空重新开始
+            sync: 每条记录是否立即fdatasync落盘
+        """
+        self.path = path
+        self.sync = sync
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        if not resume:
+            flags |= os.O_TRUNC
+        self._fd = os.open(path, flags, 0o644)
+        # 上次运行可能在写一半时被中断，先补一个换行让残缺的行独立出来
+        if resume and os.fstat(self._fd).st_size > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    os.write(self._fd, b'\n')
+
+    def record(self, account: str, outcome: str):
+        """记录一个账号的最终结果"""
+        account = account.replace('\t', ' ').replace('\n', ' ')
+        payload = f'{time.time():.3f}\t{account}\t{outcome}'.encode('utf-8')
+        line = payload + f'\t{zlib.crc32(payload):08x}\n'.encode('ascii')
+        with self._lock:
+            # O_APPEND下单次write是原子追加，多个进程同时写也不会互相覆盖
+            os.write(self._fd, line)
+            if self.sync:
+                os.fdatasync(self._fd)
+
+    def close(self):
+        """关闭日志文件"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def replay(path: str) -> dict:
+        """
+        重放检查点日志
+
+        Returns:
+            dict: 账号到最终结果的映射（同一账号以最后一条记录为准），日志不存在时为空
+        """
+        completed = {}
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    # 校验不通过的是中断时写了一半的记录，直接忽略
+                    payload, _, checksum = line.rstrip('\n').rpartition('\t')
+                    if checksum != f'{zlib.crc32(payload.encode("utf-8")):08x}':
+                        continue
+                    fields = payload.split('\t')
+                    if len(fields) != 3:
+                        continue
+                    completed[fields[1]] = fields[2]
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.error(f"❌ 读取检查点日志失败 {path}: {e}")
+        return completed
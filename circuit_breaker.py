@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+站点熔断器
+一个站点连续多次请求失败（连接错误、超时、5xx、429）后暂停对它的请求，
+冷却结束后只放行一个探测请求，成功则恢复，失败则继续暂停；
+多站点运行时每个站点一个熔断器，一个论坛宕机不会让其他站点的账号排队等待超时
+"""
+
+import time
+import logging
+import threading
+
+import requests
+
+from retry_policy import RETRYABLE_STATUS
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """站点处于熔断状态，请求未发出"""
+
+    outcome = 'circuit_open'
+
+
+def is_site_failure(error) -> bool:
+    """请求异常是否说明站点本身有问题（其他4xx是请求或Cookie的问题，不计入）"""
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is not None and response.status_code in RETRYABLE_STATUS
+    return isinstance(error, requests.exceptions.RequestException)
+
+
+class CircuitBreaker:
+    """按连续失败次数熔断的站点熔断器（线程安全）"""
+
+    def __init__(self, name: str = '', failure_threshold: int = 5, cooldown: float = 60.0):
+        """
+        Args:
+            name: 站点名（用于日志）
+            failure_threshold: 连续失败多少次后熔断
+            cooldown: 熔断后多少秒放行探测请求
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """是否可以发出请求；冷却结束后只有第一个调用者得到探测机会"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def check(self):
+        """不允许请求时抛出CircuitOpenError"""
+        if not self.allow():
+            raise CircuitOpenError(f'站点 {self.name} 已熔断')
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logging.info(f"✅ 站点 {self.name} 已恢复，解除熔断")
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self, error=None):
+        """
+        记录一次请求失败
+
+        Args:
+            error: 请求异常，为None时总是计入；不是站点问题的异常（如404）不计入，
+                   半开状态下的探测请求遇到这类异常时不会一直占着探测名额
+        """
+        if error is not None and not is_site_failure(error):
+            if isinstance(error, requests.exceptions.HTTPError):
+                # 站点返回了404等正常的错误响应，说明站点可以访问
+                self.record_success()
+            else:
+                # 与站点无关的异常：放回探测名额，否则半开状态永远不再放行请求
+                with self._lock:
+                    self._probing = False
+            return
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                logging.warning(f"⛔ 站点 {self.name} 连续失败 {self.failures} 次，暂停请求 {self.cooldown:.0f}s")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        """当前是否拒绝请求（冷却结束但尚未探测时也返回False）"""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at < self.cooldown
+            return self.state == HALF_OPEN and self._probing
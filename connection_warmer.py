@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+连接预热模块
+定时签到开始前预先完成DNS解析、TCP连接和TLS握手，建立若干keep-alive连接并做健康检查，
+放回共享的HTTPAdapter连接池，签到开始后的第一批请求直接复用
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SITE_URL = 'https://acgfun.art'
+# 健康检查使用静态文件的HEAD请求，服务端开销最小
+HEALTH_CHECK_PATH = '/robots.txt'
+# 服务器通常会关闭空闲较久的keep-alive连接，预热应在签到开始前几秒进行
+DEFAULT_LEAD_TIME = 5.0
+
+
+def shared_adapter(pool_size: int = 10) -> HTTPAdapter:
+    """创建可在多个会话间共享的HTTPAdapter（只访问一个站点，一个连接池即可）"""
+    return HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+
+
+def _head(session, url: str, verify, timeout: float):
+    """
+    通过会话发出HEAD请求，响应保持未读（连接仍被占用），失败时返回None
+
+    所有健康检查同时占用各自的连接，连接池只能为每个请求建立一个新连接
+    """
+    try:
+        return session.head(url, verify=verify, timeout=timeout, allow_redirects=False, stream=True)
+    except requests.exceptions.RequestException as e:
+        logging.warning(f"⚠️ 预热连接失败: {e}")
+        return None
+
+
+def prewarm(adapter: HTTPAdapter, connections: int = 4, base_url: str = SITE_URL, verify=False,
+            headers: dict = None, timeout: float = 10) -> int:
+    """
+    并行建立并检查connections个keep-alive连接，放入adapter的连接池
+
+    Args:
+        adapter: 之后要挂载到签到会话上的HTTPAdapter
+        connections: 预热的连接数（超过连接池大小的部分不会保留）
+        base_url: 站点地址
+        verify: 与会话相同的证书校验设置，决定使用哪个连接池
+        headers: 健康检查请求头
+        timeout: 每个连接的超时（秒）
+
+    Returns:
+        int: 健康并放回连接池的连接数
+    """
+    # 与签到会话一样通过挂载的adapter发出真实请求，由requests选择连接池和TLS参数
+    session = requests.Session()
+    session.headers.update(headers or {})
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    url = base_url.rstrip('/') + HEALTH_CHECK_PATH
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, connections)) as executor:
+            responses = list(executor.map(lambda _: _head(session, url, verify, timeout), range(connections)))
+
+        # 全部请求完成后才释放连接，保证建立的是connections个不同的连接
+        warmed = 0
+        for response in responses:
+            if response is None:
+                continue
+            # 404也说明连接可用，只有5xx或服务器要求关闭时丢弃
+            if response.status_code >= 500 or response.headers.get('Connection', '').lower() == 'close':
+                response.close()
+                continue
+            # 读完（HEAD没有正文）后close()只把连接放回连接池，不会关闭连接
+            response.content
+            response.close()
+            warmed += 1
+    finally:
+        # 连接池属于调用方，Session.close()会关闭所有挂载的adapter
+        session.adapters.clear()
+        session.close()
+    logging.info(f"🔥 预热连接 {warmed}/{connections} 个，耗时 {(time.perf_counter() - start) * 1000:.0f}ms")
+    return warmed
@@ -9,13 +9,31 @@ AcgFun 网站纯Cookie签到脚本
 import requests
 import logging
 import time
-import re
 import argparse
+import hashlib
 import os
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
 from wechat_notifier import ServerChanNotifier, load_sendkey_from_file
 from credit_analyzer import CreditAnalyzer
+from cookie_store import CookieStore, DEFAULT_STORE_PATH, parse_cookie_string, load_cookie_file
+from run_lock import SharedRateLimiter, account_lock
+from task_graph import TaskGraph
+from circuit_breaker import CircuitOpenError
+from signin_calendar import default_calendar
+from request_hooks import request_hooks
+from bandwidth import BandwidthCounter, accept_encoding, response_bytes
+from event_log import event_log, add_event_log_argument
+from profiler import add_profile_argument, start_profiler
+from metrics_exporter import METRICS_FILE, metrics, record_request, record_response_bytes, record_retry, flush_metrics
+from retry_policy import retry_delay, describe_error
+from response_decoder import decode_response, response_contains
+from site_profiles import get_site_profile
+from page_parser import (
+    parse_profile_page, classify_signin_page, classify_signin_result, parse_signin_reward, run_parser
+)
+
+# 签到后确认状态的轮询间隔（秒）：先立即检查，未确认时逐渐拉长，总等待有上限
+CONFIRM_POLL_INTERVALS = (0.0, 0.5, 1.0, 2.0)
 
 # 配置目录和日志目录
 CONFIG_DIR = 'config'
@@ -36,90 +54,173 @@ logging.basicConfig(
 )
 
 class CookieSignin:
-    def __init__(self):
+    def __init__(self, parse_pool=None, transport=None, cookie_store=None, rate_limiter=None, adapter=None,
+                 refresh_credit=False, site=None, circuit_breaker=None, calendar=None, hooks=None, events=None,
+                 concurrency=None):
+        """
+        初始化签到器
+        
+        Args:
+            parse_pool: 页面解析进程池(ParsePool)，批量运行时共享，默认在当前线程解析
+            transport: 共享传输(如Http2Transport)，默认使用本会话的requests连接池
+            cookie_store: Cookie存储(CookieStore)，设置后运行结束时写回服务器轮换的Cookie
+            rate_limiter: 跨进程共享的限速器(SharedRateLimiter)，每次请求前取一个令牌
+            adapter: 共享的HTTPAdapter（可以是预热过的连接池），批量运行时多个账号复用连接
+            refresh_credit: 总是请求积分页获取天空石数量，默认在签到响应和页头中已有余额时跳过
+            site: 站点配置(SiteProfile)，默认为acgfun.art
+            circuit_breaker: 站点熔断器(CircuitBreaker)，记录每次请求的成败，站点持续出错时停止请求
+            calendar: 签到日历(SigninCalendar)，默认使用logs/signin_calendar.bin
+            hooks: 请求钩子(RequestHooks)，默认使用进程内共享的request_hooks
+            events: 结构化事件日志(EventLog)，默认使用进程内共享的event_log
+            concurrency: 自适应并发控制(AdaptiveConcurrency)，批量运行时共享，按主机限制同时进行的请求数
+        """
+        self.parse_pool = parse_pool
+        self.transport = transport
+        self.cookie_store = cookie_store
+        self.rate_limiter = rate_limiter
+        self.adapter = adapter
+        self.refresh_credit = refresh_credit
+        self.site = site or get_site_profile()
+        self.circuit_breaker = circuit_breaker
+        self.calendar = calendar
+        self.hooks = hooks or request_hooks
+        self.bandwidth = BandwidthCounter()  # 本次运行的响应流量
+        self.events = events or event_log
+        self.concurrency = concurrency
+        self.account_id = ''
+        self._loaded_cookies = {}
         self.session = requests.Session()
         self.session.verify = False  # 禁用SSL验证
+        if adapter is not None:
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
         
         # 设置请求头
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': accept_encoding(transport),
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
         
-        self.base_url = 'https://acgfun.art'
-        self.signin_url = 'https://acgfun.art/plugin.php?id=k_misign:sign'
+        self.base_url = self.site.base_url
+        self.signin_url = self.site.signin_url
+        self.profile_url = self.site.profile_url
+        self.cookie_domain = self.site.cookie_domain
         self.current_username = ''  # 存储当前用户名
+        self.signin_reward = None  # 本次签到获得的天空石
+        self.credit_balance = None  # 最近一次页面中看到的天空石余额
+        self._signin_href = None  # 签到状态页中的签到按钮链接，执行签到时不必再请求签到页
+        # 最近一次run()的结果: signed / already_signed / cookie_expired / signin_failed / cookie_load_failed / circuit_open / error
+        self.last_outcome = ''
+        self.failure_reason = None  # 失败的具体原因，写入结构化事件
+        self._event_account = None
         
         # 初始化Server酱通知器
         sendkey = load_sendkey_from_file()
         self.wechat_notifier = ServerChanNotifier(sendkey)
         
         # 初始化积分分析器
-        self.credit_analyzer = CreditAnalyzer(self.session)
+        self.credit_analyzer = CreditAnalyzer(
+            self.session, parse_pool=parse_pool, request_func=self.safe_request, site=self.site, hooks=self.hooks
+        )
         
         # 禁用SSL警告
         import urllib3
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-    def safe_request(self, method, url, **kwargs):
-        """安全的网络请求，包含重试和错误处理"""
+    def safe_request(self, method, url, session=None, **kwargs):
+        """
+        安全的网络请求，包含重试和错误处理（429遵守Retry-After，其他错误指数退避）
+
+        Args:
+            session: 发送请求的会话，默认为self.session（并发执行的步骤使用_fork_session()得到的独立会话）
+        """
+        session = session or self.session
         max_retries = 3
-        retry_delay = 2
         
         for attempt in range(max_retries):
             try:
-                response = self.session.request(method, url, timeout=30, **kwargs)
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.check()
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                self.hooks.before_request(method, url, kwargs)
+                limiter = self.concurrency.limiter(url) if self.concurrency is not None else None
+                started = limiter.acquire() if limiter is not None else None
+                start = time.perf_counter()
+                response = None
+                try:
+                    if self.transport is not None:
+                        response = self.transport.request(session, method, url, timeout=30, **kwargs)
+                    else:
+                        response = session.request(method, url, timeout=30, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    record_request(url, elapsed)
+                    if limiter is not None:
+                        limiter.release(started, elapsed, response)
+                wire, decoded = response_bytes(response)
+                self.bandwidth.add(url, wire, decoded)
+                record_response_bytes(url, wire, decoded)
+                self.hooks.after_response(method, url, response, elapsed)
                 response.raise_for_status()
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_success()
                 return response
-            except requests.exceptions.SSLError as e:
-                logging.warning(f"SSL错误 (尝试 {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    continue
-                raise
-            except requests.exceptions.ConnectionError as e:
-                logging.warning(f"连接错误 (尝试 {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    continue
-                raise
-            except requests.exceptions.Timeout as e:
-                logging.warning(f"请求超时 (尝试 {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    continue
+            except CircuitOpenError:
                 raise
             except Exception as e:
-                logging.error(f"请求失败 (尝试 {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    continue
-                raise
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure(e)
+                logging.warning(f"{describe_error(e)} (尝试 {attempt + 1}/{max_retries}): {e}")
+                delay = retry_delay(e, attempt)
+                if delay is None or attempt >= max_retries - 1:
+                    raise
+                record_retry(url, e)
+                self.hooks.on_retry(method, url, e, attempt + 1, delay)
+                logging.info(f"⏳ {delay:.1f}s 后重试")
+                time.sleep(delay)
         
         return None
 
+    def _fork_session(self):
+        """
+        为与主会话同时请求的步骤创建独立的会话（requests.Session和它的Cookie jar不是线程安全的）：
+        复制请求头和Cookie，共用已挂载的连接池（urllib3连接池是线程安全的）
+
+        Returns:
+            tuple: (会话, 复制时的Cookie值)，步骤结束后交给_merge_session()
+        """
+        session = requests.Session()
+        session.verify = self.session.verify
+        session.headers.update(self.session.headers)
+        for prefix, adapter in self.session.adapters.items():
+            session.mount(prefix, adapter)
+        session.cookies.update(self.session.cookies)
+        return session, {(c.domain, c.path, c.name): c.value for c in session.cookies}
+
+    def _merge_session(self, session, initial):
+        """把独立会话中服务器新设置或轮换的Cookie写回主会话，然后释放该会话（不关闭共用的连接池）"""
+        for cookie in session.cookies:
+            if initial.get((cookie.domain, cookie.path, cookie.name)) != cookie.value:
+                self.session.cookies.set_cookie(cookie)
+        session.adapters.clear()
+        session.close()
+
+    def _apply_cookies(self, cookies):
+        """把Cookie设置到session中，并记录初始值用于检测服务器轮换的Cookie"""
+        for name, value in cookies.items():
+            self.session.cookies.set(name, value, domain=self.cookie_domain)
+        self._loaded_cookies = dict(cookies)
+        logging.info(f"✅ Cookie加载成功，共加载了 {len(cookies)} 个cookies")
+
     def load_cookies_from_file(self, cookie_file):
         """从文件加载Cookie"""
         try:
-            with open(cookie_file, 'r', encoding='utf-8') as f:
-                cookie_string = f.read().strip()
-            
-            # 解析Cookie字符串
-            cookies = {}
-            for cookie in cookie_string.split('; '):
-                if '=' in cookie:
-                    name, value = cookie.split('=', 1)
-                    cookies[name] = value
-            
-            # 设置到session中
-            for name, value in cookies.items():
-                self.session.cookies.set(name, value, domain='acgfun.art')
-            
-            logging.info(f"✅ Cookie加载成功，共加载了 {len(cookies)} 个cookies")
+            self._apply_cookies(load_cookie_file(cookie_file))
             return True
             
         except Exception as e:
@@ -129,39 +230,170 @@ class CookieSignin:
     def load_cookies_from_browser(self, browser_cookies):
         """从浏览器格式的Cookie字符串加载"""
         try:
-            cookies = {}
-            for cookie in browser_cookies.split('; '):
-                if '=' in cookie:
-                    name, value = cookie.split('=', 1)
-                    cookies[name] = value
-            
-            for name, value in cookies.items():
-                self.session.cookies.set(name, value, domain='acgfun.art')
+            self._apply_cookies(parse_cookie_string(browser_cookies))
+            return True
             
-            logging.info(f"✅ Cookie加载成功，共加载了 {len(cookies)} 个cookies")
+        except Exception as e:
+            logging.error(f"❌ Cookie加载失败: {e}")
+            return False
+
+    def load_cookies_from_store(self, account_id):
+        """从Cookie存储加载指定账号的Cookie"""
+        try:
+            cookies = self.cookie_store.get(account_id)
+            if cookies is None:
+                logging.error(f"❌ Cookie存储中没有账号: {account_id}")
+                return False
+            self.account_id = account_id
+            self._apply_cookies(cookies)
             return True
             
         except Exception as e:
             logging.error(f"❌ Cookie加载失败: {e}")
             return False
 
+    def save_rotated_cookies(self):
+        """把服务器通过Set-Cookie轮换的Cookie写回Cookie存储"""
+        if self.cookie_store is None or not self.account_id:
+            return
+        try:
+            current = {
+                cookie.name: cookie.value for cookie in self.session.cookies
+                if cookie.domain.lstrip('.') == self.cookie_domain
+            }
+            changed = {
+                name: value for name, value in current.items()
+                if self._loaded_cookies.get(name) != value
+            }
+            if changed:
+                self.cookie_store.update_cookies(self.account_id, changed)
+                logging.info(f"🔄 已写回 {len(changed)} 个服务器更新的cookies")
+        except Exception as e:
+            logging.error(f"❌ Cookie写回失败: {e}")
+
+    def record_signed_date(self):
+        """签到完成后在Cookie存储中记录签到日期（供批量调度判断优先级）和积分余额（供签到统计分析）"""
+        if self.cookie_store is None or not self.account_id:
+            return
+        if self.last_outcome not in ('signed', 'already_signed'):
+            return
+        today = time.strftime('%Y-%m-%d')
+        try:
+            self.cookie_store.mark_signed(self.account_id, today)
+            if self.credit_balance is not None:
+                self.cookie_store.record_credit(self.account_id, today, self.credit_balance)
+        except Exception as e:
+            logging.error(f"❌ 记录签到日期失败: {e}")
+
+    def account_key(self) -> str:
+        """
+        签到日历和指标使用的账号名：调用方指定的账号名（批量运行时为账号ID）或Cookie存储中的账号名，
+        都没有时（单账号从文件或Cookie字符串运行）为登录后的用户名
+        """
+        return self._event_account or self.account_id or self.current_username or 'default'
+
+    def mark_calendar(self):
+        """签到完成后在签到日历中置位"""
+        if self.last_outcome not in ('signed', 'already_signed'):
+            return
+        try:
+            calendar = self.calendar or default_calendar()
+            calendar.mark(self.account_key())
+        except Exception as e:
+            logging.error(f"❌ 记录签到日历失败: {e}")
+
+    def record_metrics(self):
+        """把本次运行的结果和天空石数量记入指标（进程结束前由main写出）"""
+        account = self.account_key()
+        metrics.inc('acgfun_signin_runs_total', outcome=self.last_outcome or 'error')
+        if self.credit_balance is not None:
+            metrics.set('acgfun_credit_balance', self.credit_balance, account=account)
+        if self.signin_reward is not None:
+            metrics.set('acgfun_signin_reward', self.signin_reward, account=account)
+
+    def _emit(self, event, **fields):
+        """写入一个带账号和站点的结构化事件"""
+        account = self._event_account or self.account_id or self.current_username or None
+        self.events.emit(event, account=account, site=self.site.name, **fields)
+
+    def _phase(self, phase, func, outcome=None):
+        """
+        执行签到的一个阶段并写入phase事件
+
+        Args:
+            phase: 阶段名（login / status / signin / credit）
+            func: 阶段函数
+            outcome: 由返回值得到结果的函数，默认True为ok、False/None为failed、字符串原样使用
+        """
+        start = time.perf_counter()
+        try:
+            result = func()
+        except Exception as e:
+            self._emit('phase', phase=phase, outcome='error', error=type(e).__name__,
+                       duration_ms=round((time.perf_counter() - start) * 1000, 1))
+            raise
+        if outcome is not None:
+            label = outcome(result)
+        elif isinstance(result, str):
+            label = result
+        else:
+            label = 'ok' if result else 'failed'
+        self._emit('phase', phase=phase, outcome=label, duration_ms=round((time.perf_counter() - start) * 1000, 1))
+        return result
+
+    def _credit_outcome(self, _info):
+        return 'ok' if self.credit_balance is not None else 'failed'
+
+    def record_event(self, elapsed):
+        """写入本次运行的run事件（结果、失败原因、耗时、奖励和流量）"""
+        self._emit(
+            'run',
+            outcome=self.last_outcome or 'error',
+            reason=self.failure_reason,
+            duration_ms=round(elapsed * 1000, 1),
+            reward=self.signin_reward,
+            balance=self.credit_balance,
+            requests=self.bandwidth.requests,
+            wire_bytes=self.bandwidth.wire_bytes,
+            decoded_bytes=self.bandwidth.decoded_bytes,
+        )
+
+    def _observe_credit(self, page_text, signin_response=False):
+        """
+        记录页面中出现的天空石奖励和余额，余额已知时可以不再请求积分页
+
+        Args:
+            page_text: 页面文本
+            signin_response: 是否为签到请求的响应（只有它的奖励是本次签到获得的）
+        """
+        reward, balance = parse_signin_reward(page_text, self.site.credit_name)
+        if signin_response and balance is None:
+            # 签到响应只有奖励时，用签到前页头中的余额推算签到后的余额；没有奖励时签到前的余额已不可信
+            if reward is not None and self.credit_balance is not None:
+                balance = self.credit_balance + reward
+            else:
+                self.credit_balance = None
+        if signin_response and reward is not None:
+            self.signin_reward = reward
+        if balance is not None:
+            self.credit_balance = balance
+
     def verify_login_status(self):
         """验证登录状态"""
         try:
             logging.info("🔍 正在验证登录状态...")
             
             # 访问个人中心页面来验证登录
-            response = self.safe_request('GET', f'{self.base_url}/home.php?mod=space&do=profile')
+            response = self.safe_request('GET', self.profile_url)
             
             if response and response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                page_text = decode_response(response)
+                login_state, username_text = run_parser(self.parse_pool, parse_profile_page, page_text)
+                self._observe_credit(page_text)
                 
                 # 检查是否包含登录用户信息
-                if '个人资料' in response.text or 'profile' in response.text:
-                    # 尝试提取用户名
-                    username_element = soup.find('h2', class_='mbn')
-                    if username_element:
-                        username_text = username_element.get_text().strip()
+                if login_state == "logged_in":
+                    if username_text:
                         # 提取用户名和UID
                         if '(' in username_text and ')' in username_text:
                             self.current_username = username_text.split('(')[0].strip()
@@ -175,64 +407,71 @@ class CookieSignin:
                         logging.info("✅ 登录状态验证成功！")
                         return True
                 
-                # 如果上面没找到，检查是否需要登录
-                if '登录' in response.text and '密码' in response.text:
-                    logging.error("❌ 登录状态验证失败，Cookie已失效")
-                    # 发送Cookie失效通知
-                    self.wechat_notifier.notify_cookie_expired(self.current_username)
-                    return False
-                    
-                # 默认认为登录成功
-                self.current_username = '未知用户'
-                logging.info("✅ 登录状态验证成功！")
-                return True
+                # 需要登录说明Cookie已失效
+                logging.error("❌ 登录状态验证失败，Cookie已失效")
+                self.failure_reason = 'logged_out'
+                # 发送Cookie失效通知
+                self.wechat_notifier.notify_cookie_expired(self.current_username)
+                return False
             
             else:
                 logging.error(f"❌ 访问个人中心失败: {response.status_code if response else 'No response'}")
+                self.failure_reason = f'http_{response.status_code}' if response else 'no_response'
                 # 发送Cookie失效通知
                 self.wechat_notifier.notify_cookie_expired(self.current_username)
                 return False
                 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logging.error(f"❌ 验证登录状态失败: {e}")
+            self.failure_reason = type(e).__name__
             # 发送Cookie失效通知
             self.wechat_notifier.notify_cookie_expired(self.current_username)
             return False
 
-    def check_signin_status(self):
-        """检查签到状态"""
+    def check_signin_status(self, session=None):
+        """检查签到状态（session为发送请求的会话，默认为self.session）"""
         try:
             logging.info("🔍 正在检查签到状态...")
             
-            response = self.safe_request('GET', self.signin_url)
+            response = self.safe_request('GET', self.signin_url, session=session)
             if not response:
                 logging.error("❌ 无法访问签到页面")
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            page_text = response.text
-            
-            # 优先检查明确的已签到标识
-            if "您今天已经签到过了" in page_text:
+            # 优先检查明确的已签到标识（直接匹配字节，无需解码）
+            if response_contains(response, self.site.already_signed_marker):
                 logging.info("✅ 今天已经签到过了")
+                if not self.refresh_credit:
+                    # 页头中的余额是最新的，解码一次可以省掉积分页请求
+                    self._observe_credit(decode_response(response))
                 return "already_signed"
             
+            status, reason, self._signin_href = run_parser(
+                self.parse_pool, classify_signin_page, decode_response(response),
+                self.site.already_signed_marker, self.site.not_signed_marker
+            )
+            
             # 检查是否有签到按钮（operation=qiandao）
-            signin_button = soup.find('a', href=re.compile(r'operation=qiandao'))
-            if signin_button:
+            if reason == "button":
                 logging.info("📝 找到签到按钮，今天还没有签到")
                 return "not_signed"
             
             # 检查是否包含“还没有签到”的明确文字
-            if "您今天还没有签到" in page_text:
+            if reason == "not_signed_text":
                 logging.info("📝 今天还没有签到，可以进行签到")
                 return "not_signed"
             
             # 如果没有签到按钮且没有明确的未签到文字，可能已经签到了
-            if "签到" in page_text and "连续签到" in page_text:
+            if reason == "streak_text":
                 logging.info("✅ 检测到连续签到信息，可能已经签到")
                 return "already_signed"
             
+            if reason == "already_text":
+                logging.info("✅ 今天已经签到过了")
+                return "already_signed"
+            
             # 默认情况
             logging.warning("⚠️ 无法确定签到状态")
             return "unknown"
@@ -246,55 +485,63 @@ class CookieSignin:
         try:
             logging.info("🎯 开始执行签到操作...")
             
-            # 首先访问签到页面获取formhash和签到按钮
-            response = self.safe_request('GET', self.signin_url)
-            if not response:
-                logging.error("❌ 无法访问签到页面")
-                return False
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # 签到状态检查时已经拿到签到按钮（带formhash）的就直接使用，否则访问签到页面获取
+            signin_href = self._signin_href
+            if not signin_href:
+                response = self.safe_request('GET', self.signin_url)
+                if not response:
+                    logging.error("❌ 无法访问签到页面")
+                    return False
+                
+                _, _, signin_href = run_parser(
+                    self.parse_pool, classify_signin_page, decode_response(response),
+                    self.site.already_signed_marker, self.site.not_signed_marker
+                )
             
             # 查找签到按钮 - 这是唯一有效的签到方式
-            signin_button = soup.find('a', href=re.compile(r'operation=qiandao'))
-            if signin_button:
-                signin_href = signin_button.get('href')
-                if signin_href:
-                    # 构建完整的签到URL
-                    if signin_href.startswith('/'):
-                        signin_url = urljoin(self.base_url, signin_href)
-                    elif signin_href.startswith('plugin.php'):
-                        signin_url = urljoin(self.base_url, signin_href)
+            if signin_href:
+                # 构建完整的签到URL
+                if signin_href.startswith('/'):
+                    signin_url = urljoin(self.base_url, signin_href)
+                elif signin_href.startswith('plugin.php'):
+                    signin_url = urljoin(self.base_url, signin_href)
+                else:
+                    signin_url = signin_href
+                
+                logging.info(f"🔄 点击签到按钮: {signin_url}")
+                response = self.safe_request('GET', signin_url)
+                
+                if response:
+                    response_text = decode_response(response)
+                    self._observe_credit(response_text, signin_response=True)
+                    signin_result = self._check_signin_result(response_text)
+                    if signin_result:
+                        logging.info("🎉 签到成功！")
+                        return True
                     else:
-                        signin_url = signin_href
-                    
-                    logging.info(f"🔄 点击签到按钮: {signin_url}")
-                    response = self.safe_request('GET', signin_url)
-                    
-                    if response:
-                        signin_result = self._check_signin_result(response.text)
-                        if signin_result:
-                            logging.info("🎉 签到成功！")
+                        logging.warning("⚠️ 签到响应检测未成功，进行最终验证...")
+                        # 最后一次检查，避免误判
+                        final_status = self.check_signin_status()
+                        if final_status == "already_signed":
+                            logging.info("✅ 最终验证：签到已完成")
                             return True
                         else:
-                            logging.warning("⚠️ 签到响应检测未成功，进行最终验证...")
-                            # 最后一次检查，避免误判
-                            final_status = self.check_signin_status()
-                            if final_status == "already_signed":
-                                logging.info("✅ 最终验证：签到已完成")
-                                return True
-                            else:
-                                logging.error("❌ 签到未成功")
-                                return False
-                    else:
-                        logging.error("❌ 签到请求失败")
-                        return False
-            
+                            logging.error("❌ 签到未成功")
+                            self.failure_reason = 'not_confirmed'
+                            return False
+                else:
+                    logging.error("❌ 签到请求失败")
+                    self.failure_reason = 'request_failed'
+                    return False
+        
             # 如果没有找到签到按钮，可能已经签到过了
             logging.warning("⚠️ 未找到签到按钮，可能已经签到过了")
+            self.failure_reason = 'no_button'
             return False
             
         except Exception as e:
             logging.error(f"❌ 签到操作失败: {e}")
+            self.failure_reason = type(e).__name__
             return False
 
     def get_tiankonshi_info(self) -> str:
@@ -305,13 +552,20 @@ class CookieSignin:
             str: 天空石信息字符串
         """
         try:
+            reward_info = f"本次获得天空石: {self.signin_reward}\n" if self.signin_reward is not None else ""
+            if self.credit_balance is not None and not self.refresh_credit:
+                tiankonshi_info = f"{reward_info}当前天空石数量: {self.credit_balance}"
+                logging.info(f"✅ 当前天空石数量: {self.credit_balance}（来自签到页面，跳过积分页）")
+                return tiankonshi_info
+            
             logging.info("💰 正在获取天空石信息...")
             
             tiankonshi_count = self.credit_analyzer.get_tiankonhhi_count()
             if tiankonshi_count is not None:
+                self.credit_balance = tiankonshi_count
                 tiankonshi_info = f"当前天空石数量: {tiankonshi_count}"
                 logging.info(f"✅ {tiankonshi_info}")
-                return tiankonshi_info
+                return reward_info + tiankonshi_info
             else:
                 logging.warning("⚠️ 无法获取天空石信息")
                 return "天空石信息获取失败"
@@ -322,34 +576,25 @@ class CookieSignin:
 
     def _check_signin_result(self, response_text):
         """检查签到结果"""
-        # 优先检查明确的成功关键词
-        success_keywords = [
-            "签到成功", "签到完成", "打卡成功", "签到奖励",
-            "恭喜", "获得", "奖励", "连续签到", "今日签到",
-            "积分", "天空石", "经验", "金币", "您获得了"
-        ]
+        verdict, reason = run_parser(self.parse_pool, classify_signin_result, response_text)
         
-        for keyword in success_keywords:
-            if keyword in response_text:
-                logging.info(f"🎉 签到成功！检测到关键词: {keyword}")
-                return True
+        # 优先检查明确的成功关键词
+        if verdict == "success":
+            logging.info(f"🎉 签到成功！检测到关键词: {reason}")
+            return True
         
         # 检查是否已经签到过
-        if "您今天已经签到过了" in response_text or "今天已经签到" in response_text:
+        if verdict == "already_signed":
             logging.info("✅ 今天已经签到过了")
             return True
         
         # 检查页面跳转或状态变化（如果响应很短，可能是跳转页面）
-        if len(response_text.strip()) < 100:
+        if reason == "redirect":
             logging.info("🔄 检测到页面跳转，可能签到成功，进行二次验证...")
             return self._verify_signin_by_status_check()
         
         # 如果响应中没有错误信息，且包含签到相关内容，可能成功
-        error_keywords = ["失败", "错误", "异常", "请重试"]
-        has_error = any(error in response_text for error in error_keywords)
-        has_signin_content = any(word in response_text for word in ["签到", "每日", "连续"])
-        
-        if not has_error and has_signin_content:
+        if reason == "no_error":
             logging.info("🤔 未检测到错误信息且包含签到内容，进行二次验证...")
             return self._verify_signin_by_status_check()
         
@@ -358,112 +603,238 @@ class CookieSignin:
         return False
     
     def _verify_signin_by_status_check(self):
-        """通过检查签到状态来验证签到是否成功"""
+        """通过检查签到状态来验证签到是否成功，按递增间隔轮询，确认后立即返回"""
         try:
             logging.info("🔍 进行签到状态二次验证...")
-            time.sleep(2)  # 等待2秒让服务器处理
+            for interval in CONFIRM_POLL_INTERVALS:
+                if interval:
+                    time.sleep(interval)
+                if self.check_signin_status() == "already_signed":
+                    logging.info("✅ 二次验证确认：签到已完成")
+                    return True
             
-            # 重新检查签到状态
-            signin_status = self.check_signin_status()
-            if signin_status == "already_signed":
-                logging.info("✅ 二次验证确认：签到已完成")
-                return True
-            else:
-                logging.warning("⚠️ 二次验证：签到状态未变更")
-                return False
+            logging.warning("⚠️ 二次验证：签到状态未变更")
+            return False
                 
         except Exception as e:
             logging.error(f"❌ 二次验证失败: {e}")
             # 如果二次验证失败，返回True避免误判
             return True
 
-    def run(self, cookie_source, is_file=True):
-        """运行签到流程"""
+    def run(self, cookie_source, is_file=True, account=None):
+        """
+        运行签到流程
+        
+        Args:
+            cookie_source: Cookie文件路径或Cookie字符串；设置了cookie_store时为账号名
+            is_file: cookie_source是否为文件路径
+            account: 写入结构化事件的账号名，默认为Cookie存储中的账号名或登录后的用户名
+        """
+        self.reset_run_state()
+        self._event_account = account or (cookie_source if self.cookie_store is not None else None)
+        self.bandwidth.reset()
+        start = time.perf_counter()
         try:
             logging.info("=" * 50)
             logging.info("🚀 开始Cookie签到流程...")
             
+            # 站点熔断期间不发请求，留给调度器稍后重试
+            if self.circuit_breaker is not None and self.circuit_breaker.is_open:
+                logging.warning(f"⛔ 站点 {self.site.name} 处于熔断状态，跳过本次签到")
+                self.last_outcome = 'circuit_open'
+                return False
+            
             # 加载Cookie
-            if is_file:
+            if self.cookie_store is not None:
+                if not self.load_cookies_from_store(cookie_source):
+                    self.last_outcome = 'cookie_load_failed'
+                    self.wechat_notifier.notify_signin_failed(self.current_username, "Cookie加载失败")
+                    return False
+            elif is_file:
                 if not self.load_cookies_from_file(cookie_source):
+                    self.last_outcome = 'cookie_load_failed'
                     self.wechat_notifier.notify_signin_failed(self.current_username, "Cookie加载失败")
                     return False
             else:
                 if not self.load_cookies_from_browser(cookie_source):
+                    self.last_outcome = 'cookie_load_failed'
                     self.wechat_notifier.notify_signin_failed(self.current_username, "Cookie加载失败")
                     return False
             
-            # 验证登录状态
-            if not self.verify_login_status():
+            # 登录验证和签到状态检查互不依赖，同时请求；登录失败时丢弃签到状态。
+            # 两个请求都可能设置Cookie，签到状态使用独立的会话，结束后再合并回主会话
+            status_session, status_cookies = self._fork_session()
+            graph = TaskGraph(max_workers=2)
+            graph.add('login', lambda: self._phase('login', self.verify_login_status), ok=bool)
+            graph.add('status', lambda: self._phase('status', lambda: self.check_signin_status(status_session)),
+                      guards=('login',))
+            try:
+                results = graph.run()
+            finally:
+                self._merge_session(status_session, status_cookies)
+            
+            if 'login' not in results and self.circuit_breaker is not None and self.circuit_breaker.is_open:
+                logging.warning(f"⛔ 站点 {self.site.name} 在登录验证时熔断，跳过本次签到")
+                self.last_outcome = 'circuit_open'
+                return False
+            
+            if 'login' not in results:
                 logging.error("❌ 登录验证失败，请检查Cookie是否有效")
+                self.last_outcome = 'cookie_expired'
                 self.wechat_notifier.notify_cookie_expired(self.current_username)
                 return False
             
-            # 检查签到状态
-            signin_status = self.check_signin_status()
+            signin_status = results.get('status')
             if signin_status == "already_signed":
                 logging.info("✅ 今天已经签到，任务完成！")
+                self.last_outcome = 'already_signed'
                 # 获取天空石信息并通知
-                tiankonshi_info = self.get_tiankonshi_info()
+                tiankonshi_info = self._phase('credit', self.get_tiankonshi_info, outcome=self._credit_outcome)
                 signin_detail = f"今日签到已完成\n{tiankonshi_info}"
                 self.wechat_notifier.notify_signin_success(self.current_username, signin_detail)
                 return True
             elif signin_status == "not_signed":
                 # 执行签到
-                if self.perform_signin():
+                if self._phase('signin', self.perform_signin):
                     logging.info("🎉 签到流程完成！")
+                    self.last_outcome = 'signed'
                     
                     # 获取天空石信息
-                    tiankonshi_info = self.get_tiankonshi_info()
+                    tiankonshi_info = self._phase('credit', self.get_tiankonshi_info, outcome=self._credit_outcome)
                     signin_detail = f"今日签到任务已完成\n{tiankonshi_info}"
                     
                     self.wechat_notifier.notify_signin_success(self.current_username, signin_detail)
                     return True
                 else:
                     logging.error("❌ 签到失败")
+                    self.last_outcome = 'signin_failed'
                     self.wechat_notifier.notify_signin_failed(self.current_username, "签到执行失败")
                     return False
             else:
                 logging.warning("⚠️ 无法确定签到状态，尝试执行签到...")
-                if self.perform_signin():
+                if self._phase('signin', self.perform_signin):
                     logging.info("🎉 签到流程完成！")
+                    self.last_outcome = 'signed'
                     
                     # 获取天空石信息
-                    tiankonshi_info = self.get_tiankonshi_info()
+                    tiankonshi_info = self._phase('credit', self.get_tiankonshi_info, outcome=self._credit_outcome)
                     signin_detail = f"今日签到任务已完成\n{tiankonshi_info}"
                     
                     self.wechat_notifier.notify_signin_success(self.current_username, signin_detail)
                     return True
                 else:
                     logging.error("❌ 签到失败")
+                    self.last_outcome = 'signin_failed'
                     self.wechat_notifier.notify_signin_failed(self.current_username, "签到执行失败")
                     return False
             
         except Exception as e:
             logging.error(f"❌ 签到流程失败: {e}")
+            self.last_outcome = 'error'
+            self.failure_reason = type(e).__name__
             self.wechat_notifier.notify_signin_failed(self.current_username, f"签到流程异常: {str(e)}")
             return False
         finally:
+            self.save_rotated_cookies()
+            self.record_signed_date()
+            self.mark_calendar()
+            self.record_metrics()
+            self.record_event(time.perf_counter() - start)
+            if self.bandwidth.requests:
+                logging.info(f"📦 本次流量: {self.bandwidth.summary()}")
             logging.info("=" * 50)
 
+    def reset_run_state(self):
+        """
+        清除上一次run()留下的账号状态，同一个签到器可以依次为不同账号运行
+        （上一个账号的Cookie、用户名和账号名不会带到下一个账号，连接池保留复用）
+        """
+        self.session.cookies.clear()
+        self._loaded_cookies = {}
+        self.account_id = ''
+        self.current_username = ''
+        self.last_outcome = ''
+        self.signin_reward = None
+        self.credit_balance = None
+        self._signin_href = None
+        self.failure_reason = None
+
+    def close(self):
+        """释放会话和连接池（批量运行时每个账号完成后调用）"""
+        if self.adapter is not None:
+            # 共享的连接池由创建者关闭，Session.close()会关闭所有挂载的adapter
+            self.session.adapters.clear()
+        self.session.close()
+        self.wechat_notifier.session.close()
+
 def main():
     parser = argparse.ArgumentParser(description='AcgFun Cookie签到脚本')
     parser.add_argument('--file', type=str, default='config/cookies.txt', help='Cookie文件路径 (默认: config/cookies.txt)')
     parser.add_argument('--cookie', type=str, help='直接提供Cookie字符串')
+    parser.add_argument('--account', type=str, help='从Cookie存储中加载指定账号')
+    parser.add_argument('--store', type=str, default=DEFAULT_STORE_PATH, help=f'Cookie存储文件路径 (默认: {DEFAULT_STORE_PATH})')
     parser.add_argument('--clean-logs', action='store_true', help='签到后清理旧日志文件')
+    parser.add_argument('--http2', action='store_true', help='使用HTTP/2传输 (需要安装httpx[http2])')
+    parser.add_argument('--http2-streams', type=int, default=100, help='HTTP/2最大并发请求流数 (默认: 100)')
+    parser.add_argument('--max-rate', type=float, default=5.0, help='所有进程合计的每秒最大请求数，0表示不限速 (默认: 5)')
+    parser.add_argument('--refresh-credit', action='store_true', help='总是请求积分页获取天空石数量（默认在签到页面已有余额时跳过）')
+    parser.add_argument('--metrics-file', type=str, default=METRICS_FILE,
+                        help=f'Prometheus textfile指标文件，空字符串表示不写 (默认: {METRICS_FILE})')
+    add_profile_argument(parser)
+    add_event_log_argument(parser)
     
     args = parser.parse_args()
+    start_profiler('cookie_signin', args.profile)
+    event_log.configure(args.event_log)
     
     if not args.file and not args.cookie:
         print("请提供Cookie文件路径 (--file) 或直接提供Cookie字符串 (--cookie)")
         return
     
-    signin = CookieSignin()
-    
-    if args.file:
-        success = signin.run(args.file, is_file=True)
+    # 同一账号同时只允许一个进程处理（定时任务与手动运行重叠时）
+    if args.account:
+        lock_key = args.account
+    elif args.file:
+        lock_key = os.path.abspath(args.file)
     else:
-        success = signin.run(args.cookie, is_file=False)
+        lock_key = 'cookie-' + hashlib.sha1(args.cookie.encode('utf-8')).hexdigest()[:12]
+    
+    with account_lock(lock_key) as acquired:
+        if not acquired:
+            logging.warning("⚠️ 另一个进程正在处理该账号，本次运行跳过")
+            print("⏭️ 另一个进程正在签到，已跳过")
+            return
+        
+        cookie_store = CookieStore(args.store) if args.account else None
+        # 从存储加载的账号使用它所属的站点
+        try:
+            site = get_site_profile(cookie_store.get_site(args.account) if args.account else None)
+        except KeyError as e:
+            logging.error(f"❌ {e.args[0]}")
+            print(f"❌ {e.args[0]}")
+            return
+        
+        transport = None
+        if args.http2:
+            from http2_transport import Http2Transport
+            transport = Http2Transport(max_streams=args.http2_streams)
+        
+        rate_limiter = SharedRateLimiter(args.max_rate, path=site.rate_limit_path) if args.max_rate > 0 else None
+        signin = CookieSignin(transport=transport, cookie_store=cookie_store, rate_limiter=rate_limiter,
+                              refresh_credit=args.refresh_credit, site=site)
+        
+        try:
+            if args.account:
+                success = signin.run(args.account)
+            elif args.file:
+                success = signin.run(args.file, is_file=True)
+            else:
+                success = signin.run(args.cookie, is_file=False)
+        finally:
+            if transport is not None:
+                transport.close()
+            if rate_limiter is not None:
+                rate_limiter.close()
     
     # 清理旧日志文件（如果指定了参数）
     if args.clean_logs and success:
@@ -479,6 +850,8 @@ def main():
         except Exception as e:
             logging.warning(f"⚠️ 日志清理失败: {e}")
     
+    flush_metrics('cookie_signin', args.metrics_file)
+    
     if success:
         print("✅ 签到成功！")
     else:
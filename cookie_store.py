@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多账号Cookie存储模块
+所有账号的Cookie保存在一个SQLite文件中，按账号名主键索引查找，
+读取一个账号不需要解析其他账号；服务器轮换的Cookie在事务中原子写回
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+
+from site_profiles import DEFAULT_SITE
+
+DEFAULT_STORE_PATH = os.path.join('config', 'cookies.db')
+
+
+def parse_cookie_string(cookie_string: str) -> dict:
+    """
+    解析浏览器格式的Cookie字符串（name=value; name2=value2）
+
+    Args:
+        cookie_string: Cookie字符串
+
+    Returns:
+        dict: Cookie名到值的映射
+    """
+    cookies = {}
+    for cookie in cookie_string.split(';'):
+        cookie = cookie.strip()
+        if '=' in cookie:
+            name, value = cookie.split('=', 1)
+            cookies[name] = value
+    return cookies
+
+
+def format_cookie_string(cookies: dict) -> str:
+    """把Cookie字典格式化为浏览器格式的Cookie字符串"""
+    return '; '.join(f'{name}={value}' for name, value in cookies.items())
+
+
+def load_cookie_file(cookie_file: str) -> dict:
+    """
+    从单账号Cookie文件（如config/cookies.txt）读取Cookie
+
+    Args:
+        cookie_file: 文件路径
+
+    Returns:
+        dict: Cookie名到值的映射
+    """
+    with open(cookie_file, 'r', encoding='utf-8') as f:
+        return parse_cookie_string(f.read().strip())
+
+
+class CookieStore:
+    """基于SQLite的多账号Cookie存储，可在多个线程中共享"""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """
+        初始化Cookie存储
+
+        Args:
+            path: SQLite文件路径，不存在时自动创建
+        """
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS accounts ('
+            ' account TEXT PRIMARY KEY,'
+            ' cookies TEXT NOT NULL,'
+            ' updated_at REAL NOT NULL,'
+            ' last_signed TEXT,'
+            f" site TEXT NOT NULL DEFAULT '{DEFAULT_SITE}'"
+            ')'
+        )
+        # 旧版本创建的存储没有last_signed和site列（已有账号都属于默认站点）
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(accounts)')]
+        if 'last_signed' not in columns:
+            conn.execute('ALTER TABLE accounts ADD COLUMN last_signed TEXT')
+        if 'site' not in columns:
+            conn.execute(f"ALTER TABLE accounts ADD COLUMN site TEXT NOT NULL DEFAULT '{DEFAULT_SITE}'")
+        conn.execute('CREATE INDEX IF NOT EXISTS accounts_site ON accounts (site, account)')
+        # 每个账号每天一条积分记录，供签到统计分析使用
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS credit_history ('
+            ' account TEXT NOT NULL,'
+            ' day TEXT NOT NULL,'
+            ' balance INTEGER NOT NULL,'
+            ' PRIMARY KEY (account, day)'
+            ')'
+        )
+
+    def _connect(self):
+        """获取当前线程的数据库连接（SQLite连接不能跨线程使用）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            # WAL模式下读写互不阻塞，批量运行时各线程可以同时写回Cookie
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, account: str):
+        """
+        读取一个账号的Cookie
+
+        Returns:
+            dict: Cookie名到值的映射，账号不存在时返回None
+        """
+        row = self._connect().execute(
+            'SELECT cookies FROM accounts WHERE account = ?', (account,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, account: str, cookies: dict, site: str = None):
+        """
+        保存（覆盖）一个账号的全部Cookie
+
+        Args:
+            site: 账号所属站点，为None时新账号属于默认站点，已有账号保持原站点
+        """
+        # 不使用INSERT ... ON CONFLICT（SQLite 3.24+），CentOS 7等系统自带的SQLite较旧；
+        # 也不能用INSERT OR REPLACE，它会先删除旧行，丢掉last_signed
+        value, now = json.dumps(cookies, ensure_ascii=False), time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute(
+                'UPDATE accounts SET cookies = ?, updated_at = ?, site = COALESCE(?, site) WHERE account = ?',
+                (value, now, site, account)
+            )
+            if cursor.rowcount == 0:
+                conn.execute(
+                    'INSERT INTO accounts (account, cookies, updated_at, site) VALUES (?, ?, ?, ?)',
+                    (account, value, now, site or DEFAULT_SITE)
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get_site(self, account: str):
+        """读取账号所属站点，账号不存在时返回None"""
+        row = self._connect().execute(
+            'SELECT site FROM accounts WHERE account = ?', (account,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def iter_sites(self):
+        """存储中出现的所有站点名"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            return [row[0] for row in conn.execute('SELECT DISTINCT site FROM accounts ORDER BY site')]
+        finally:
+            conn.close()
+
+    def mark_signed(self, account: str, day: str):
+        """记录账号最近一次确认已签到的日期（YYYY-MM-DD）"""
+        self._connect().execute(
+            'UPDATE accounts SET last_signed = ? WHERE account = ?', (day, account)
+        )
+
+    def record_credit(self, account: str, day: str, balance: int):
+        """记录账号当天（YYYY-MM-DD）签到后的积分余额，同一天多次运行时保留最后一次"""
+        self._connect().execute(
+            'INSERT OR REPLACE INTO credit_history (account, day, balance) VALUES (?, ?, ?)',
+            (account, day, balance)
+        )
+
+    def load_credit_history(self, since: str = None) -> list:
+        """
+        按账号读取积分历史，每个账号一行紧凑的文本，供向量化解析（避免为每条记录创建Python对象）
+
+        Args:
+            since: 只读取该日期（YYYY-MM-DD）及之后的记录
+
+        Returns:
+            list: (账号名, 记录数, 首尾相接的日期文本, 逗号分隔的余额) 列表，按账号名排序
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            return conn.execute(
+                "SELECT account, COUNT(*), group_concat(day, ''), group_concat(balance) "
+                'FROM credit_history WHERE day >= ? GROUP BY account ORDER BY account',
+                (since or '',)
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def update_cookies(self, account: str, changed: dict):
+        """
+        原子地合并服务器轮换的Cookie
+
+        Args:
+            account: 账号名
+            changed: 发生变化的Cookie
+        """
+        if not changed:
+            return
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT cookies FROM accounts WHERE account = ?', (account,)).fetchone()
+            cookies = json.loads(row[0]) if row else {}
+            cookies.update(changed)
+            if row:
+                conn.execute(
+                    'UPDATE accounts SET cookies = ?, updated_at = ? WHERE account = ?',
+                    (json.dumps(cookies, ensure_ascii=False), time.time(), account)
+                )
+            else:
+                conn.execute(
+                    'INSERT INTO accounts (account, cookies, updated_at) VALUES (?, ?, ?)',
+                    (account, json.dumps(cookies, ensure_ascii=False), time.time())
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def delete(self, account: str) -> bool:
+        """删除一个账号，返回账号是否存在"""
+        cursor = self._connect().execute('DELETE FROM accounts WHERE account = ?', (account,))
+        return cursor.rowcount > 0
+
+    def count(self) -> int:
+        """账号总数"""
+        return self._connect().execute('SELECT COUNT(*) FROM accounts').fetchone()[0]
+
+    def iter_accounts(self, batch_size: int = 256):
+        """
+        按账号名顺序逐批读取账号，不会一次性加载全部账号
+
+        Yields:
+            tuple: (账号名, Cookie字符串)
+        """
+        # 使用独立连接，迭代期间其他线程的写回不受影响
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            cursor = conn.execute('SELECT account, cookies FROM accounts ORDER BY account')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for account, cookies in rows:
+                    yield account, format_cookie_string(json.loads(cookies))
+        finally:
+            conn.close()
+
+    def iter_account_ids(self, batch_size: int = 1024, site: str = None):
+        """按账号名顺序逐批读取账号名（只读索引，不读取Cookie），指定site时只读取该站点的账号"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            if site is None:
+                cursor = conn.execute('SELECT account FROM accounts ORDER BY account')
+            else:
+                cursor = conn.execute('SELECT account FROM accounts WHERE site = ? ORDER BY account', (site,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for (account,) in rows:
+                    yield account
+        finally:
+            conn.close()
+
+    def iter_account_states(self, batch_size: int = 1024, site: str = None):
+        """
+        按账号名顺序逐批读取账号名和最近签到日期（不读取Cookie），指定site时只读取该站点的账号
+
+        Yields:
+            tuple: (账号名, 最近签到日期或None)
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            if site is None:
+                cursor = conn.execute('SELECT account, last_signed FROM accounts ORDER BY account')
+            else:
+                cursor = conn.execute(
+                    'SELECT account, last_signed FROM accounts WHERE site = ? ORDER BY account', (site,)
+                )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AcgFun多账号Cookie存储管理')
+    parser.add_argument('--store', type=str, default=DEFAULT_STORE_PATH, help=f'存储文件路径 (默认: {DEFAULT_STORE_PATH})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='导入账号Cookie')
+    import_parser.add_argument('--account', type=str, required=True, help='账号名')
+    import_parser.add_argument('--file', type=str, help='Cookie文件路径')
+    import_parser.add_argument('--cookie', type=str, help='直接提供Cookie字符串')
+    import_parser.add_argument('--site', type=str, help=f'账号所属站点（见config/sites.json，默认: {DEFAULT_SITE}）')
+
+    subparsers.add_parser('list', help='列出所有账号')
+
+    remove_parser = subparsers.add_parser('remove', help='删除账号')
+    remove_parser.add_argument('--account', type=str, required=True, help='账号名')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    store = CookieStore(args.store)
+
+    if args.command == 'import':
+        if args.cookie:
+            cookies = parse_cookie_string(args.cookie)
+        elif args.file:
+            cookies = load_cookie_file(args.file)
+        else:
+            print("请提供Cookie文件路径 (--file) 或直接提供Cookie字符串 (--cookie)")
+            return
+        store.put(args.account, cookies, site=args.site)
+        print(f"✅ 已导入账号 {args.account}（{store.get_site(args.account)}），共 {len(cookies)} 个cookies")
+    elif args.command == 'list':
+        for account, cookie_string in store.iter_accounts():
+            print(f"{account}\t{len(parse_cookie_string(cookie_string))} 个cookies")
+        print(f"共 {store.count()} 个账号")
+    elif args.command == 'remove':
+        if store.delete(args.account):
+            print(f"✅ 已删除账号 {args.account}")
+        else:
+            print(f"❌ 账号不存在: {args.account}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,24 +3,56 @@
 
 """
 AcgFun天空石积分分析脚本
-获取用户当前的天空石数量
+获取用户当前的天空石数量；--export 并发导出Cookie存储中所有账号的积分（JSON Lines或CSV）
 """
 
+import os
+import csv
+import json
+import time
 import requests
 import logging
-import re
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+from response_decoder import decode_response, response_contains
+from page_parser import parse_credit_page, run_parser
+from cookie_store import CookieStore, DEFAULT_STORE_PATH, load_cookie_file
+from retry_policy import retry_delay, describe_error
+from site_profiles import get_site_profile
+from request_hooks import request_hooks
+from bandwidth import BandwidthCounter, accept_encoding, response_bytes
+from profiler import add_profile_argument, start_profiler
+from http_cache import HttpCache, CachingTransport, add_cache_arguments
+from metrics_exporter import METRICS_FILE, metrics, record_request, record_response_bytes, record_retry, flush_metrics
 
 class CreditAnalyzer:
-    def __init__(self, session=None):
+    def __init__(self, session=None, parse_pool=None, request_func=None, rate_limiter=None, site=None,
+                 hooks=None, adapter=None, transport=None):
         """
         初始化积分分析器
         
         Args:
             session: requests会话对象，如果提供则使用现有session
+            parse_pool: 页面解析进程池(ParsePool)，默认在当前线程解析
+            request_func: 请求函数，如果提供则代替本类的safe_request（例如复用签到器的传输和重试）
+            rate_limiter: 跨进程共享的限速器(SharedRateLimiter)，每次请求前取一个令牌
+            site: 站点配置(SiteProfile)，默认为acgfun.art
+            hooks: 请求钩子(RequestHooks)，默认使用进程内共享的request_hooks
+            adapter: 共享的HTTPAdapter，批量导出时多个账号复用同一个连接池
+            transport: 共享传输(如Http2Transport、带缓存的CachingTransport)，默认使用本会话的requests连接池
         """
+        self.parse_pool = parse_pool
+        self.request_func = request_func
+        self.transport = transport
+        self.rate_limiter = rate_limiter
+        self.hooks = hooks or request_hooks
+        self.bandwidth = BandwidthCounter()  # 本次运行的响应流量
         self.session = session or requests.Session()
         self.session.verify = False
+        if adapter is not None:
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
         
         # 设置请求头
         if not session:
@@ -28,12 +60,14 @@ class CreditAnalyzer:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
                 'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate',
+                'Accept-Encoding': accept_encoding(transport),
                 'Connection': 'keep-alive',
                 'Upgrade-Insecure-Requests': '1'
             })
         
-        self.credit_url = 'https://acgfun.art/home.php?mod=spacecp&ac=credit&showcredit=1'
+        self.site = site or get_site_profile()
+        self.credit_url = self.site.credit_url
+        self.credit_name = self.site.credit_name
         
         # 禁用SSL警告
         import urllib3
@@ -41,46 +75,72 @@ class CreditAnalyzer:
 
     def safe_request(self, method, url, **kwargs):
         """安全的网络请求，包含重试和错误处理"""
+        if self.request_func is not None:
+            return self.request_func(method, url, **kwargs)
+        
         max_retries = 3
-        retry_delay = 2
         
         for attempt in range(max_retries):
             try:
-                response = self.session.request(method, url, timeout=30, **kwargs)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                self.hooks.before_request(method, url, kwargs)
+                start = time.perf_counter()
+                try:
+                    if self.transport is not None:
+                        response = self.transport.request(self.session, method, url, timeout=30, **kwargs)
+                    else:
+                        response = self.session.request(method, url, timeout=30, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    record_request(url, elapsed)
+                wire, decoded = response_bytes(response)
+                self.bandwidth.add(url, wire, decoded)
+                record_response_bytes(url, wire, decoded)
+                self.hooks.after_response(method, url, response, elapsed)
                 response.raise_for_status()
                 return response
             except Exception as e:
-                logging.warning(f"请求失败 (尝试 {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    import time
-                    time.sleep(retry_delay)
-                    continue
-                raise
+                logging.warning(f"{describe_error(e)} (尝试 {attempt + 1}/{max_retries}): {e}")
+                delay = retry_delay(e, attempt)
+                if delay is None or attempt >= max_retries - 1:
+                    raise
+                record_retry(url, e)
+                self.hooks.on_retry(method, url, e, attempt + 1, delay)
+                time.sleep(delay)
         
         return None
 
     def load_cookies_from_file(self, cookie_file):
         """从文件加载Cookie"""
         try:
-            with open(cookie_file, 'r', encoding='utf-8') as f:
-                cookie_string = f.read().strip()
-            
-            cookies = {}
-            for cookie in cookie_string.split('; '):
-                if '=' in cookie:
-                    name, value = cookie.split('=', 1)
-                    cookies[name] = value
-            
-            for name, value in cookies.items():
-                self.session.cookies.set(name, value, domain='acgfun.art')
+            self._apply_cookies(load_cookie_file(cookie_file))
+            return True
             
-            logging.info(f"✅ Cookie加载成功，共加载了 {len(cookies)} 个cookies")
+        except Exception as e:
+            logging.error(f"❌ Cookie加载失败: {e}")
+            return False
+
+    def load_cookies_from_store(self, store, account_id):
+        """从Cookie存储加载指定账号的Cookie"""
+        try:
+            cookies = store.get(account_id)
+            if cookies is None:
+                logging.error(f"❌ Cookie存储中没有账号: {account_id}")
+                return False
+            self._apply_cookies(cookies)
             return True
             
         except Exception as e:
             logging.error(f"❌ Cookie加载失败: {e}")
             return False
 
+    def _apply_cookies(self, cookies):
+        """把Cookie设置到session中"""
+        for name, value in cookies.items():
+            self.session.cookies.set(name, value, domain=self.site.cookie_domain)
+        logging.info(f"✅ Cookie加载成功，共加载了 {len(cookies)} 个cookies")
+
     def get_credit_info(self):
         """
         获取积分信息
@@ -96,88 +156,15 @@ class CreditAnalyzer:
                 logging.error("❌ 无法访问积分页面")
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
             # 分析页面结构，寻找积分信息
-            credit_info = {}
-            
-            # 专门查找class="xi1 cl"的元素
-            xi1_elements = soup.find_all(class_="xi1 cl")
-            logging.info(f"找到 {len(xi1_elements)} 个 class='xi1 cl' 元素")
-            
-            for element in xi1_elements:
-                element_text = element.get_text().strip()
-                logging.info(f"xi1 cl 元素内容: {element_text}")
-                
-                # 在这个元素中查找天空石相关信息
-                if '天空石' in element_text:
-                    # 提取数字
-                    numbers = re.findall(r'\d+', element_text)
-                    if numbers:
-                        # 通常第一个数字是当前数量
-                        credit_info['天空石'] = int(numbers[0])
-                        logging.info(f"✅ 在 xi1 cl 元素中找到天空石数量: {numbers[0]}")
-                        
-                        # 如果有多个数字，可能第二个是今日获得
-                        if len(numbers) > 1:
-                            credit_info['天空石_今日获得'] = int(numbers[1])
-                            logging.info(f"✅ 天空石今日获得: {numbers[1]}")
-                        break
-            
-            # 如果在xi1 cl中没找到，尝试查找其周围的元素
-            if '天空石' not in credit_info and xi1_elements:
-                for xi1_element in xi1_elements:
-                    # 查找父元素
-                    parent = xi1_element.parent
-                    if parent:
-                        parent_text = parent.get_text()
-                        if '天空石' in parent_text:
-                            numbers = re.findall(r'\d+', parent_text)
-                            if numbers:
-                                credit_info['天空石'] = int(numbers[0])
-                                logging.info(f"✅ 在 xi1 cl 父元素中找到天空石数量: {numbers[0]}")
-                                break
-                    
-                    # 查找兄弟元素
-                    siblings = xi1_element.find_next_siblings()
-                    for sibling in siblings:
-                        sibling_text = sibling.get_text()
-                        if '天空石' in sibling_text:
-                            numbers = re.findall(r'\d+', sibling_text)
-                            if numbers:
-                                credit_info['天空石'] = int(numbers[0])
-                                logging.info(f"✅ 在 xi1 cl 兄弟元素中找到天空石数量: {numbers[0]}")
-                                break
-                    if '天空石' in credit_info:
-                        break
-            
-            # 备用方法：在整个页面中查找包含天空石的元素
-            if '天空石' not in credit_info:
-                logging.info("在 xi1 cl 元素中未找到天空石，尝试其他方法...")
-                
-                # 查找所有包含"天空石"的元素
-                tiankonoshi_elements = soup.find_all(string=re.compile(r'天空石'))
-                for text_node in tiankonoshi_elements:
-                    if text_node.parent:
-                        # 获取包含天空石文本的元素
-                        element = text_node.parent
-                        element_text = element.get_text()
-                        
-                        # 在这个元素及其周围查找数字
-                        numbers = re.findall(r'\d+', element_text)
-                        if numbers:
-                            credit_info['天空石'] = int(numbers[0])
-                            logging.info(f"✅ 通过文本搜索找到天空石数量: {numbers[0]}")
-                            break
-                        
-                        # 查找相邻的元素
-                        next_sibling = element.find_next_sibling()
-                        if next_sibling:
-                            sibling_numbers = re.findall(r'\d+', next_sibling.get_text())
-                            if sibling_numbers:
-                                credit_info['天空石'] = int(sibling_numbers[0])
-                                logging.info(f"✅ 在天空石元素的下一个兄弟元素中找到数量: {sibling_numbers[0]}")
-                                break
+            credit_info, source = run_parser(
+                self.parse_pool, parse_credit_page, decode_response(response), self.credit_name
+            )
+            if self.credit_name in credit_info:
+                logging.info(f"✅ 在{source}中找到{self.credit_name}数量: {credit_info[self.credit_name]}")
+                today_key = f'{self.credit_name}_今日获得'
+                if today_key in credit_info:
+                    logging.info(f"✅ {self.credit_name}今日获得: {credit_info[today_key]}")
             
             if credit_info:
                 logging.info(f"✅ 积分信息获取成功: {credit_info}")
@@ -186,10 +173,10 @@ class CreditAnalyzer:
                 logging.warning("⚠️ 未找到任何积分信息")
                 # 输出页面结构用于调试
                 logging.info("页面中包含的关键词：")
-                if '天空石' in response.text:
-                    logging.info("✓ 页面包含'天空石'")
+                if response_contains(response, self.credit_name):
+                    logging.info(f"✓ 页面包含'{self.credit_name}'")
                 else:
-                    logging.warning("✗ 页面不包含'天空石'")
+                    logging.warning(f"✗ 页面不包含'{self.credit_name}'")
                 return None
                 
         except Exception as e:
@@ -198,24 +185,166 @@ class CreditAnalyzer:
 
     def get_tiankonhhi_count(self):
         """
-        专门获取天空石数量
+        专门获取天空石（站点配置的积分名称）数量
         
         Returns:
             int: 天空石数量，失败返回None
         """
         credit_info = self.get_credit_info()
-        if credit_info and '天空石' in credit_info:
-            return credit_info['天空石']
+        if credit_info and self.credit_name in credit_info:
+            return credit_info[self.credit_name]
         return None
 
+# 导出CSV的列（JSON Lines另外包含页面中的全部积分credits）
+EXPORT_FIELDS = ('account', 'success', 'credit', 'today', 'latency_ms', 'error', 'fetched_at')
+
+
+def fetch_account_credit(store, account_id, adapter=None, analyzer_factory=CreditAnalyzer):
+    """
+    获取单个账号的积分
+
+    Returns:
+        dict: 账号、是否成功、积分余额、今日获得、全部积分、耗时(毫秒)和错误信息
+    """
+    # 按账号所属站点获取，Cookie只发往它自己的站点
+    try:
+        site, error = get_site_profile(store.get_site(account_id)), ''
+    except KeyError as e:
+        site, error = None, str(e)
+    analyzer = analyzer_factory(adapter=adapter, site=site)
+    start = time.perf_counter()
+    credit_info = None
+    try:
+        if not error and not analyzer.load_cookies_from_store(store, account_id):
+            error = 'cookie_load_failed'
+        if not error:
+            credit_info = analyzer.get_credit_info()
+            if not credit_info or analyzer.credit_name not in credit_info:
+                error = 'credit_not_found'
+    except Exception as e:
+        error = str(e)
+    finally:
+        # 共享的连接池在export_credits结束时统一关闭，Session.close()会关闭所有挂载的adapter
+        if adapter is not None:
+            analyzer.session.adapters.clear()
+        analyzer.session.close()
+    credit_info = credit_info or {}
+    return {
+        'account': account_id,
+        'success': not error,
+        'credit': credit_info.get(analyzer.credit_name),
+        'today': credit_info.get(f'{analyzer.credit_name}_今日获得'),
+        'credits': credit_info,
+        'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+        'error': error,
+        'fetched_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+class CreditExportWriter:
+    """逐行写出导出结果，格式按扩展名选择（.csv为CSV，其他为JSON Lines）"""
+
+    def __init__(self, path, fmt=None):
+        self.format = fmt or ('csv' if path.endswith('.csv') else 'jsonl')
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+        self._csv = None
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+            self._csv.writeheader()
+
+    def write(self, result):
+        if self._csv is not None:
+            self._csv.writerow(result)
+        else:
+            self._file.write(json.dumps(result, ensure_ascii=False) + '\n')
+        # 每个账号完成后立即落盘，中途中断时已导出的结果不丢失
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def export_credits(store, output_path, workers=16, fmt=None, site=None, analyzer_factory=CreditAnalyzer):
+    """
+    并发获取存储中所有账号的积分，每完成一个账号就写出一行
+
+    Args:
+        store: Cookie存储(CookieStore)
+        output_path: 导出文件路径
+        workers: 并发数
+        fmt: jsonl / csv，默认按扩展名
+        site: 只导出指定站点的账号
+        analyzer_factory: 创建积分分析器的函数，接收adapter和site参数（账号所属站点的配置）
+
+    Returns:
+        dict: 账号总数、成功数和失败的账号名
+    """
+    summary = {'total': 0, 'success': 0, 'failed_accounts': []}
+    # 所有账号共享一个连接池，避免每个账号重新建立TLS连接
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    writer = CreditExportWriter(output_path, fmt)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+
+            def drain(limit):
+                nonlocal in_flight
+                while len(in_flight) > limit:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        summary['total'] += 1
+                        if result['success']:
+                            summary['success'] += 1
+                            metrics.set('acgfun_credit_balance', result['credit'], account=result['account'])
+                        else:
+                            summary['failed_accounts'].append(result['account'])
+                        writer.write(result)
+
+            for account_id in store.iter_account_ids(site=site):
+                drain(workers * 2)
+                in_flight.add(executor.submit(fetch_account_credit, store, account_id, adapter, analyzer_factory))
+            drain(0)
+    finally:
+        writer.close()
+        adapter.close()
+    return summary
+
+
+def log_cache_stats(transport):
+    """使用了--cache时输出缓存命中情况"""
+    if transport is not None:
+        stats = transport.cache.stats()
+        logging.info(f"🗄️ 响应缓存: 命中 {stats['hits']}, 重新验证 {stats['revalidated']}, 未命中 {stats['misses']}, "
+                     f"共 {stats['entries']} 个页面 {stats['bytes']} 字节")
+        transport.close()
+
+
 def main():
     """测试函数"""
     import argparse
     
     parser = argparse.ArgumentParser(description='AcgFun积分分析工具')
     parser.add_argument('--cookies', type=str, default='config/cookies.txt', help='Cookie文件路径')
+    parser.add_argument('--account', type=str, help='从Cookie存储中加载指定账号')
+    parser.add_argument('--store', type=str, default=DEFAULT_STORE_PATH, help='Cookie存储文件路径')
+    parser.add_argument('--max-rate', type=float,
+                        help='每个站点所有进程合计的每秒最大请求数，0表示不限速 (默认: 站点配置中的max_rate)')
+    parser.add_argument('--export', type=str, help='并发导出Cookie存储中所有账号的积分到文件（.csv为CSV，其他为JSON Lines）')
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help='导出格式 (默认: 按扩展名)')
+    parser.add_argument('--workers', type=int, default=16, help='导出的并发数 (默认: 16)')
+    parser.add_argument('--site', type=str, help='只导出指定站点的账号')
+    parser.add_argument('--metrics-file', type=str, default=METRICS_FILE,
+                        help=f'Prometheus textfile指标文件，空字符串表示不写 (默认: {METRICS_FILE})')
+    add_profile_argument(parser)
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
+    start_profiler('credit_analyzer', args.profile)
     
     # 配置日志
     logging.basicConfig(
@@ -224,15 +353,77 @@ def main():
     )
     
     # 创建分析器
-    analyzer = CreditAnalyzer()
+    from run_lock import SharedRateLimiter
+    transport = CachingTransport(HttpCache(args.cache, ttl=args.cache_ttl)) if args.cache else None
+    
+    def site_rate_limiter(site):
+        """站点的共享令牌桶（与签到共用状态文件），不限速时为None"""
+        rate = site.max_rate if args.max_rate is None else args.max_rate
+        return SharedRateLimiter(rate, path=site.rate_limit_path) if rate > 0 else None
+    
+    if args.export:
+        # 每个站点一个限速器，导出多个站点时各站点的请求互不占用配额
+        rate_limiters = {}
+        rate_limiters_lock = threading.Lock()
+        
+        def analyzer_factory(adapter=None, site=None):
+            rate_limiter = None
+            if site is not None:
+                with rate_limiters_lock:
+                    if site.name not in rate_limiters:
+                        rate_limiters[site.name] = site_rate_limiter(site)
+                    rate_limiter = rate_limiters[site.name]
+            return CreditAnalyzer(rate_limiter=rate_limiter, site=site, adapter=adapter, transport=transport)
+        
+        start = time.perf_counter()
+        try:
+            summary = export_credits(CookieStore(args.store), args.export, workers=args.workers, fmt=args.format,
+                                     site=args.site, analyzer_factory=analyzer_factory)
+        finally:
+            for rate_limiter in rate_limiters.values():
+                if rate_limiter is not None:
+                    rate_limiter.close()
+        flush_metrics('credit_analyzer', args.metrics_file)
+        failed = summary['failed_accounts']
+        print(f"📊 共导出 {summary['total']} 个账号，耗时 {time.perf_counter() - start:.1f}s："
+              f"成功 {summary['success']}，失败 {len(failed)}")
+        if failed:
+            shown = ', '.join(failed[:20])
+            print(f"❌ 失败的账号: {shown}{f' 等{len(failed)}个' if len(failed) > 20 else ''}")
+        print(f"📄 结果已写入: {args.export}")
+        log_cache_stats(transport)
+        return
     
-    # 加载Cookie
-    if not analyzer.load_cookies_from_file(args.cookies):
-        print("❌ Cookie加载失败")
+    # 从存储加载的账号使用它所属的站点
+    store = CookieStore(args.store) if args.account else None
+    try:
+        site = get_site_profile(store.get_site(args.account) if args.account else None)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
         return
+    rate_limiter = site_rate_limiter(site)
+    analyzer = CreditAnalyzer(rate_limiter=rate_limiter, site=site, transport=transport)
     
-    # 获取积分信息
-    credit_info = analyzer.get_credit_info()
+    try:
+        # 加载Cookie
+        if args.account:
+            loaded = analyzer.load_cookies_from_store(store, args.account)
+        else:
+            loaded = analyzer.load_cookies_from_file(args.cookies)
+        if not loaded:
+            print("❌ Cookie加载失败")
+            return
+        
+        # 获取积分信息
+        credit_info = analyzer.get_credit_info()
+    finally:
+        if rate_limiter is not None:
+            rate_limiter.close()
+    logging.info(f"📦 本次流量: {analyzer.bandwidth.summary()}")
+    log_cache_stats(transport)
+    if credit_info and analyzer.credit_name in credit_info:
+        metrics.set('acgfun_credit_balance', credit_info[analyzer.credit_name], account=args.account or 'default')
+    flush_metrics('credit_analyzer', args.metrics_file)
     if credit_info:
         print("🎉 积分信息获取成功：")
         for key, value in credit_info.items():
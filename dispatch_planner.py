@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+签到发车计划
+把所有账号的开始时间分散到每日重置后的一个时间窗口内，避免同一秒集中请求站点。
+窗口按请求速率上限划分为发车时段，每个账号由账号名哈希固定到一个时段，每天的位置不变；
+增减账号只影响与它争用同一时段的少数账号
+"""
+
+import time
+import hashlib
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from batch_runner import run_account, get_peak_rss_mb
+from cookie_signin import CookieSignin
+from cookie_store import CookieStore, DEFAULT_STORE_PATH
+from checkpoint_journal import CheckpointJournal, default_journal_path
+from run_lock import SharedRateLimiter
+from connection_warmer import DEFAULT_LEAD_TIME, shared_adapter, prewarm
+from site_profiles import DEFAULT_SITE, get_site_profile
+
+# 站点每日签到重置时间（本地时间）
+DEFAULT_RESET_TIME = '00:00'
+# 一次签到流程的请求数：个人资料、签到状态页、提交签到（提交直接使用状态页中的签到链接，
+# 天空石余额通常可从签到页面得到）
+REQUESTS_PER_ACCOUNT = 3
+# 一次签到流程的典型耗时（秒），用于估算请求速率曲线
+ACCOUNT_DURATION = 5.0
+
+
+def _account_hash(account_id: str, salt: str = '') -> tuple:
+    """账号名的两个独立哈希值：(位置, 争用同一时段时的优先级)"""
+    digest = hashlib.sha1(f'{salt}{account_id}'.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:16], 'big')
+
+
+def account_offset(account_id: str, spread: int, salt: str = '') -> int:
+    """
+    账号在发车窗口中的首选偏移（秒），同一账号每次计算结果相同
+
+    Args:
+        account_id: 账号名
+        spread: 窗口长度（秒）
+        salt: 可选的盐值，更换后所有账号重新分布
+    """
+    if spread <= 0:
+        return 0
+    return _account_hash(account_id, salt)[0] % spread
+
+
+def _take_slot(next_free: list, slot: int) -> int:
+    """从slot开始（到末尾后回到开头）找到第一个空闲时段并占用，沿途压缩路径"""
+    free = slot
+    while next_free[free] != free:
+        free = next_free[free]
+    while slot != free:
+        next_free[slot], slot = free, next_free[slot]
+    next_free[free] = (free + 1) % len(next_free)
+    return free
+
+
+def plan_dispatch(account_ids, spread: int, max_rate: float = 0,
+                  requests_per_account: int = REQUESTS_PER_ACCOUNT, salt: str = '') -> list:
+    """
+    计算每个账号的开始偏移
+
+    窗口被划分为长度 requests_per_account / max_rate 秒的时段，每个时段只开始一个账号。
+    账号由哈希固定到一个时段；多个账号争用同一时段时按另一个哈希值决定优先级，
+    其余账号依次移到后面最近的空闲时段。每个账号的位置只取决于它自己和争用附近时段的账号，
+    增减一个账号不会让其他账号整体后移（账号数超过时段数时窗口按整倍数延长）
+
+    Args:
+        account_ids: 账号名迭代器
+        spread: 窗口长度（秒）
+        max_rate: 请求速率上限（每秒），0表示不限制
+        requests_per_account: 每个账号的请求数
+        salt: 哈希盐值
+
+    Returns:
+        list: 按开始时间排序的 (偏移秒数, 账号名)
+    """
+    if max_rate <= 0:
+        return sorted((float(account_offset(account_id, spread, salt)), account_id) for account_id in account_ids)
+
+    interval = requests_per_account / max_rate
+    # 按优先级依次分配，结果与账号的读取顺序无关
+    accounts = []
+    for account_id in account_ids:
+        position, priority = _account_hash(account_id, salt)
+        accounts.append((priority, position, account_id))
+    accounts.sort()
+    slots = max(1, int(spread / interval))
+    if len(accounts) > slots:
+        # 按整倍数延长，账号数小幅变化时时段数不变，账号不会重新分布
+        extended = slots * -(-len(accounts) // slots)
+        logging.warning(f"⚠️ {len(accounts)} 个账号超过发车窗口的 {slots} 个时段，"
+                        f"窗口延长到 {extended * interval:.0f}s")
+        slots = extended
+    # next_free[i]指向从i开始的空闲时段（并查集式的跳转，争用多的区域不会逐个扫描）
+    next_free = list(range(slots))
+    plan = [(_take_slot(next_free, position % slots) * interval, account_id)
+            for _, position, account_id in accounts]
+    return sorted(plan)
+
+
+def reset_datetime(reset_time: str = DEFAULT_RESET_TIME, now: datetime = None) -> datetime:
+    """今天的重置时刻（reset_time格式为HH:MM）"""
+    now = now or datetime.now()
+    hour, minute = (int(part) for part in reset_time.split(':'))
+    return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def rate_curve(plan, duration: float = ACCOUNT_DURATION,
+               requests_per_account: int = REQUESTS_PER_ACCOUNT) -> list:
+    """
+    估算每秒请求数：每个账号的请求在其开始后的duration秒内均匀分布
+
+    Returns:
+        list: 从窗口开始起每秒的期望请求数
+    """
+    if not plan:
+        return []
+    span = max(1, int(round(duration)))
+    length = int(plan[-1][0]) + span + 1
+    # 差分数组：每个账号在 [offset, offset+span) 上每秒贡献 requests_per_account/span
+    delta = [0.0] * (length + 1)
+    per_second = requests_per_account / span
+    for offset, _ in plan:
+        delta[int(offset)] += per_second
+        delta[int(offset) + span] -= per_second
+    curve, current = [], 0.0
+    for value in delta[:length]:
+        current += value
+        curve.append(current)
+    return curve
+
+
+def print_simulation(plan, bucket: int = 60, duration: float = ACCOUNT_DURATION,
+                     requests_per_account: int = REQUESTS_PER_ACCOUNT):
+    """打印期望的请求速率曲线（不访问网络）"""
+    curve = rate_curve(plan, duration, requests_per_account)
+    if not curve:
+        print("没有账号")
+        return
+    naive_peak = len(plan) * requests_per_account / max(1, int(round(duration)))
+    peak = max(curve)
+    print(f"账号数: {len(plan)}，发车跨度: {plan[-1][0]:.0f}s，每账号 {requests_per_account} 个请求")
+    print(f"峰值请求速率: {peak:.1f}/s（全部同时开始时约为 {naive_peak:.1f}/s）")
+    print(f"{'时间段':>13}  {'账号数':>6}  {'平均/s':>7}  {'峰值/s':>7}")
+
+    starts = [0] * (len(curve) // bucket + 1)
+    for offset, _ in plan:
+        starts[int(offset) // bucket] += 1
+    for index in range(0, len(curve), bucket):
+        window = curve[index:index + bucket]
+        bar = '█' * int(round(max(window) / peak * 40)) if peak else ''
+        label = f'+{index // 60:d}:{index % 60:02d}-{(index + len(window)) // 60:d}:{(index + len(window)) % 60:02d}'
+        print(f"{label:>13}  {starts[index // bucket]:>6}  {sum(window) / len(window):>7.1f}  "
+              f"{max(window):>7.1f}  {bar}")
+
+
+def dispatch(plan, start_at: float, window: int = 8, signin_factory=CookieSignin, on_result=None) -> dict:
+    """
+    按计划的时刻启动账号，同时运行的账号数不超过window
+
+    Args:
+        plan: plan_dispatch的结果
+        start_at: 偏移0对应的时间戳（time.time()）；已经过去的时刻会立即启动
+        window: 同时运行的最大账号数
+        signin_factory: 创建签到器的函数
+        on_result: 每个账号完成时的回调
+
+    Returns:
+        dict: 汇总统计
+    """
+    summary = {'total': 0, 'success': 0, 'failed': 0, 'outcomes': {}}
+
+    def collect(future):
+        try:
+            result = future.result()
+        except Exception as e:
+            logging.error(f"❌ 账号运行异常: {e}")
+            result = {'account': '', 'success': False, 'outcome': 'error', 'elapsed': 0}
+        summary['total'] += 1
+        summary['success' if result['success'] else 'failed'] += 1
+        summary['outcomes'][result['outcome']] = summary['outcomes'].get(result['outcome'], 0) + 1
+        if on_result:
+            on_result(result)
+
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        for offset, account_id in plan:
+            # 等待发车时刻，期间收集已完成的账号
+            while True:
+                delay = start_at + offset - time.time()
+                if delay <= 0 and len(in_flight) < window:
+                    break
+                timeout = max(0.0, delay) if len(in_flight) < window else None
+                if not in_flight:
+                    time.sleep(timeout)
+                    continue
+                done, in_flight = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            in_flight.add(executor.submit(run_account, account_id, None, signin_factory))
+
+        done, _ = wait(in_flight)
+        for future in done:
+            collect(future)
+
+    summary['peak_rss_mb'] = round(get_peak_rss_mb(), 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AcgFun多账号错峰签到')
+    parser.add_argument('--store', type=str, default=DEFAULT_STORE_PATH,
+                        help=f'Cookie存储文件路径 (默认: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--reset-time', type=str, default=DEFAULT_RESET_TIME,
+                        help=f'站点每日签到重置时间 HH:MM (默认: {DEFAULT_RESET_TIME})')
+    parser.add_argument('--site', type=str, default=DEFAULT_SITE,
+                        help=f'只安排该站点的账号，多个站点同时运行请使用site_runner.py (默认: {DEFAULT_SITE})')
+    parser.add_argument('--spread', type=float, default=30, help='发车窗口长度（分钟）(默认: 30)')
+    parser.add_argument('--max-rate', type=float, default=5.0,
+                        help='请求速率上限（每秒），同时用于发车计划和共享限速器，0表示不限 (默认: 5)')
+    parser.add_argument('--window', type=int, default=8, help='同时运行的最大账号数 (默认: 8)')
+    parser.add_argument('--salt', type=str, default='', help='哈希盐值，更换后所有账号重新分布')
+    parser.add_argument('--resume', action='store_true', help='重放当天的检查点日志，跳过已完成的账号')
+    parser.add_argument('--prewarm', type=int, default=0,
+                        help='所有账号共享一个连接池，第一个账号开始前预热的keep-alive连接数 (默认: 0)')
+    parser.add_argument('--prewarm-lead', type=float, default=DEFAULT_LEAD_TIME,
+                        help=f'提前多少秒预热连接 (默认: {DEFAULT_LEAD_TIME:g})')
+    parser.add_argument('--simulate', action='store_true', help='只打印期望的请求速率曲线，不访问网络')
+    parser.add_argument('--bucket', type=int, default=60, help='模拟输出的时间段长度（秒）(默认: 60)')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    site = get_site_profile(args.site)
+    cookie_store = CookieStore(args.store)
+    account_ids = cookie_store.iter_account_ids(site=site.name)
+    journal_path = default_journal_path()
+    plan = plan_dispatch(account_ids, int(args.spread * 60), max_rate=args.max_rate, salt=args.salt)
+    if args.resume and not args.simulate:
+        completed = CheckpointJournal.replay(journal_path)
+        logging.info(f"⏩ 检查点日志中已完成 {len(completed)} 个账号，继续处理剩余账号")
+        # 先按全部账号计算计划再去掉已完成的账号，其余账号保持原来的发车时刻
+        plan = [(offset, account_id) for offset, account_id in plan if account_id not in completed]
+
+    if args.simulate:
+        print_simulation(plan, bucket=max(1, args.bucket))
+        return
+
+    # 在重置时间之前启动会等到重置时刻；之后启动时已过发车时刻的账号立即开始（仍受并发和限速约束）
+    reset = reset_datetime(args.reset_time)
+    if datetime.now() < reset:
+        logging.info(f"⏳ 等待站点重置时间 {reset:%H:%M}")
+    start_at = reset.timestamp()
+
+    adapter = None
+    if args.prewarm > 0 and plan:
+        # 在第一个账号开始前lead秒建立连接，太早的话空闲连接会被服务器关闭
+        delay = start_at + plan[0][0] - args.prewarm_lead - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        adapter = shared_adapter(max(args.window, args.prewarm))
+        prewarm(adapter, args.prewarm, base_url=site.base_url)
+
+    journal = CheckpointJournal(journal_path, resume=args.resume)
+    rate_limiter = SharedRateLimiter(args.max_rate, path=site.rate_limit_path) if args.max_rate > 0 else None
+
+    def signin_factory():
+        return CookieSignin(cookie_store=cookie_store, rate_limiter=rate_limiter, adapter=adapter, site=site)
+
+    def on_result(result):
+        if result['outcome'] != 'locked':
+            journal.record(result['account'], result['outcome'])
+
+    try:
+        start = time.perf_counter()
+        summary = dispatch(plan, start_at, window=args.window, signin_factory=signin_factory, on_result=on_result)
+    finally:
+        journal.close()
+        if rate_limiter is not None:
+            rate_limiter.close()
+        if adapter is not None:
+            adapter.close()
+
+    logging.info(
+        f"📊 错峰签到完成: 共 {summary['total']} 个账号, 成功 {summary['success']}, "
+        f"失败 {summary['failed']}, 耗时 {time.perf_counter() - start:.1f}s"
+    )
+    print(f"✅ 成功 {summary['success']} / {summary['total']}，结果分布: {summary['outcomes']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结构化事件日志
+与人读的文本日志并行，把每次签到的各个阶段和最终结果以JSON Lines追加到 logs/events.jsonl，
+每行一个事件，包含时间、运行ID、账号、站点、阶段、结果和耗时，由run_report.py统计成功率和耗时分位数
+
+多个进程同时追加时每个事件用一次O_APPEND写入，行与行之间不会交错
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+
+EVENT_LOG_FILE = os.path.join('logs', 'events.jsonl')
+
+
+def new_run_id() -> str:
+    """一次脚本运行的ID，同一进程中的所有事件共用"""
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class EventLog:
+    """JSON Lines事件日志（线程安全，首次写入时打开文件）"""
+
+    def __init__(self, path: str = EVENT_LOG_FILE, run_id: str = None):
+        """
+        Args:
+            path: 事件文件路径，为空时不写
+            run_id: 运行ID，默认自动生成
+        """
+        self.path = path
+        self.run_id = run_id or new_run_id()
+        self._fd = None
+        self._lock = threading.Lock()
+        self._failed = False
+
+    def configure(self, path: str):
+        """切换事件文件（入口脚本的 --event-log 参数），空字符串表示不写"""
+        with self._lock:
+            self._close()
+            self.path = path
+            self._failed = False
+
+    def emit(self, event: str, **fields):
+        """
+        写入一个事件
+
+        Args:
+            event: 事件类型（phase / run / batch）
+            fields: 事件字段，值为None的字段不写
+        """
+        if not self.path:
+            return
+        record = {'ts': round(time.time(), 3), 'run_id': self.run_id, 'event': event}
+        record.update((key, value) for key, value in fields.items() if value is not None)
+        line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        with self._lock:
+            if self._failed:
+                return
+            try:
+                if self._fd is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                os.write(self._fd, line)
+            except OSError as e:
+                # 只报告一次，事件日志写不了不影响签到
+                self._failed = True
+                logging.error(f"❌ 写入事件日志失败: {e}")
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+# 进程内共享的事件日志，签到器未指定events时使用
+event_log = EventLog()
+
+
+def add_event_log_argument(parser):
+    """给入口脚本的参数解析器添加 --event-log 参数"""
+    parser.add_argument('--event-log', type=str, default=EVENT_LOG_FILE,
+                        help=f'结构化事件日志（JSON Lines），空字符串表示不写 (默认: {EVENT_LOG_FILE})')
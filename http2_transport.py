@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTTP/2多路复用传输模块
+多账号运行时，所有账号的请求通过少量HTTP/2连接多路复用发送到同一站点，
+替代每个账号各自维护的HTTP/1.1 keep-alive连接
+需要安装可选依赖: pip install "httpx[http2]"
+"""
+
+import asyncio
+import threading
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# httpx能解压的编码（br需要brotli，zstd需要zstandard），签到器据此生成Accept-Encoding；
+# 解码器列表不是httpx的公开接口，取不到时只声明httpx总能解压的gzip和deflate
+try:
+    from httpx._decoders import SUPPORTED_DECODERS
+    ACCEPT_ENCODING = ','.join(name for name in SUPPORTED_DECODERS if name != 'identity')
+except (ImportError, AttributeError):
+    ACCEPT_ENCODING = 'gzip,deflate'
+
+# HTTP/2禁止携带的逐跳请求头
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'}
+# requests的请求参数中由session.prepare_request()编码的部分（URL参数、请求体、请求头、Cookie、认证）
+PREPARED_KWARGS = ('params', 'data', 'json', 'files', 'headers', 'cookies', 'auth')
+# 跳转后不再发送的参数：URL参数已在Location中，改为GET时不再发送请求体
+REDIRECT_DROPPED_KWARGS = ('params', 'data', 'json', 'files')
+# 对共享客户端和已完整读取的响应没有意义的参数（连接设置在创建传输时指定），忽略
+IGNORED_KWARGS = ('stream', 'verify', 'cert', 'proxies', 'hooks')
+
+
+class Http2Transport:
+    """
+    基于httpx的HTTP/2传输，可在多个账号（多个requests会话）之间共享
+    所有请求在一个后台事件循环中多路复用，调用方线程只等待各自的结果
+    """
+
+    def __init__(self, max_connections: int = 2, max_streams: int = 100,
+                 verify: bool = False, prior_knowledge: bool = False):
+        """
+        初始化HTTP/2传输
+
+        Args:
+            max_connections: 到每个站点的最大连接数
+            max_streams: 同时进行的最大请求流数量
+            verify: 是否校验SSL证书
+            prior_knowledge: 明文HTTP直接使用HTTP/2（h2c），用于本地测试服务器
+        """
+        if httpx is None:
+            raise RuntimeError('HTTP/2传输需要安装httpx: pip install "httpx[http2]"')
+
+        # Cookie由各账号的requests会话管理，共享客户端本身不保存任何Cookie，避免账号之间串号
+        no_cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+        self.max_streams = max_streams
+        self.accept_encoding = ACCEPT_ENCODING
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+        async def setup():
+            self._streams = asyncio.Semaphore(max_streams)
+            self.client = httpx.AsyncClient(
+                http1=not prior_knowledge,
+                http2=True,
+                verify=verify,
+                cookies=no_cookies,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+            )
+
+        asyncio.run_coroutine_threadsafe(setup(), self._loop).result()
+
+    async def _send(self, method, url, **kwargs):
+        """在事件循环中发送请求，受最大并发流数限制"""
+        async with self._streams:
+            return await self.client.request(method, url, **kwargs)
+
+    def _send_prepared(self, prepared, timeout):
+        """发送requests准备好的请求（不跟随跳转），返回httpx响应"""
+        headers = {
+            name: value for name, value in prepared.headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS
+        }
+        try:
+            return asyncio.run_coroutine_threadsafe(
+                self._send(
+                    prepared.method, prepared.url, headers=headers, content=prepared.body,
+                    timeout=timeout, follow_redirects=False
+                ),
+                self._loop,
+            ).result()
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def request(self, session, method, url, timeout=30, allow_redirects=True, **kwargs):
+        """
+        使用指定会话的请求头和Cookie发送请求
+
+        Args:
+            session: 账号的requests会话，提供请求头和Cookie，并接收服务器下发的Cookie
+            method: 请求方法
+            url: 请求URL
+            timeout: 超时时间（秒）
+            allow_redirects: 是否跟随跳转
+            kwargs: 与requests相同的params / data / json / files / headers / cookies / auth；
+                stream / verify / cert / proxies / hooks被忽略，其他参数抛出TypeError
+
+        Returns:
+            requests.Response: 与requests兼容的响应对象，跳转经过的响应在history中
+        """
+        unknown = sorted(set(kwargs) - set(PREPARED_KWARGS) - set(IGNORED_KWARGS))
+        if unknown:
+            raise TypeError(f"Http2Transport不支持的请求参数: {', '.join(unknown)}")
+        fields = {name: kwargs[name] for name in PREPARED_KWARGS if name in kwargs}
+
+        # 跳转由这里逐跳处理：httpx跟随跳转时只会带上客户端自己的Cookie（共享客户端没有），
+        # 每一跳都由requests按域名和路径从会话中筛选Cookie（包括上一跳刚下发的），并合并请求头、编码请求体
+        history = []
+        while True:
+            prepared = session.prepare_request(requests.Request(method, url, **fields))
+            response = self._send_prepared(prepared, timeout)
+
+            # 把服务器下发的Cookie写回账号会话（包括跳转途中的响应）
+            for cookie in response.cookies.jar:
+                session.cookies.set(cookie.name, cookie.value, domain=cookie.domain, path=cookie.path)
+
+            converted = self._to_requests_response(response)
+            if not allow_redirects or response.next_request is None:
+                converted.history = history
+                return converted
+            history.append(converted)
+            if len(history) > session.max_redirects:
+                raise requests.exceptions.TooManyRedirects(
+                    f'超过 {session.max_redirects} 次跳转', response=converted
+                )
+            next_request = response.next_request
+            if next_request.method != method:
+                fields = {name: value for name, value in fields.items() if name not in REDIRECT_DROPPED_KWARGS}
+            else:
+                fields.pop('params', None)
+            method, url = next_request.method, str(next_request.url)
+
+    @staticmethod
+    def _to_requests_response(response):
+        """把httpx响应转换为requests响应，调用方无需区分传输方式"""
+        converted = requests.Response()
+        converted.status_code = response.status_code
+        converted.reason = response.reason_phrase
+        converted.headers = CaseInsensitiveDict(response.headers.multi_items())
+        converted.url = str(response.url)
+        converted._content = response.content
+        # 压缩的正文在线路上的字节数，供流量统计使用
+        converted.wire_bytes = response.num_bytes_downloaded
+        converted.encoding = None
+        converted.http_version = response.http_version
+        return converted
+
+    def close(self):
+        """关闭所有连接并停止后台事件循环"""
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTTP响应缓存
+个人中心和积分页等只读页面按账号缓存在本地SQLite文件中：
+- TTL内直接返回缓存，不发请求
+- 过期后如果服务器给过ETag / Last-Modified，带If-None-Match / If-Modified-Since重新验证，
+  304时继续使用缓存的页面，只更新时间
+- 总大小超过字节预算时按最近使用时间淘汰
+
+缓存以传输的形式接入（与Http2Transport的接口相同），可以包在其他传输外层：
+    transport = CachingTransport(HttpCache(), Http2Transport())
+TTL是客户端的策略，不看服务器的Cache-Control（Discuz对所有页面都返回no-store）；
+只用于诊断工具的重复查询，签到流程本身不使用
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from metrics_exporter import endpoint_label
+
+CACHE_PATH = os.path.join('logs', 'http_cache.db')
+DEFAULT_TTL = 300
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# 默认缓存的页面（endpoint_label的结果），签到页和签到提交永远不缓存
+CACHEABLE_ENDPOINTS = ('profile', 'credit')
+# 缓存的响应头（其余响应头与缓存的页面无关）
+STORED_HEADERS = ('content-type', 'etag', 'last-modified', 'date')
+
+
+def account_key(session, url: str) -> str:
+    """
+    请求所属账号的缓存键：Discuz的登录凭据Cookie（<前缀>_auth）在重新登录之前不会变，
+    不同账号的缓存不会混用；没有登录Cookie时使用全部Cookie
+    """
+    host = requests.utils.urlparse(url).hostname or ''
+    cookies = sorted(
+        (cookie.name, cookie.value) for cookie in session.cookies
+        if host.endswith(cookie.domain.lstrip('.'))
+    )
+    auth = [item for item in cookies if item[0] == 'auth' or item[0].endswith('_auth')]
+    material = json.dumps(auth or cookies, ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:32]
+
+
+class HttpCache:
+    """按账号和URL缓存的响应（SQLite，可在多个线程和进程间共享）"""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES,
+                 endpoints=CACHEABLE_ENDPOINTS):
+        """
+        Args:
+            path: SQLite文件路径，不存在时自动创建
+            ttl: 缓存不经验证直接使用的秒数
+            max_bytes: 缓存页面的总字节预算，超出时淘汰最久未使用的
+            endpoints: 可缓存的页面名（见metrics_exporter.endpoint_label）
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.endpoints = tuple(endpoints)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' url TEXT NOT NULL,'
+            ' headers TEXT NOT NULL,'
+            ' body BLOB NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' stored_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL,'
+            ' size INTEGER NOT NULL'
+            ')'
+        )
+        self._connect().execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at)')
+
+    def _connect(self):
+        """获取当前线程的数据库连接（SQLite连接不能跨线程使用）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def cacheable(self, method: str, url: str) -> bool:
+        return method.upper() == 'GET' and endpoint_label(url) in self.endpoints
+
+    @staticmethod
+    def key(account: str, url: str) -> str:
+        return hashlib.sha256(f'{account}\0{url}'.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """
+        读取缓存并更新最近使用时间
+
+        Returns:
+            tuple: (响应头, 正文, ETag, Last-Modified, 存入时间)，没有时返回None
+        """
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT headers, body, etag, last_modified, stored_at FROM responses WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        return json.loads(row[0]), row[1], row[2], row[3], row[4]
+
+    def put(self, key: str, url: str, response):
+        """保存200响应，并按字节预算淘汰最久未使用的页面"""
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        body = response.content
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO responses '
+            '(key, url, headers, body, etag, last_modified, stored_at, accessed_at, size) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, url, json.dumps(headers), body, headers.get('etag'), headers.get('last-modified'),
+             now, now, len(body))
+        )
+        self.evict()
+
+    def touch(self, key: str):
+        """304重新验证成功：缓存重新计时"""
+        now = time.time()
+        self._connect().execute('UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?', (now, now, key))
+
+    def evict(self) -> int:
+        """删除超出字节预算的最久未使用的页面，返回删除的数量"""
+        conn = self._connect()
+        if conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0] <= self.max_bytes:
+            return 0
+        # 按最近使用时间从新到旧累计大小，累计超过预算的都删除
+        # （累计在Python中计算：窗口函数需要SQLite 3.25，CentOS 7等系统自带的SQLite较旧）
+        running, expired = 0, []
+        for key, size in conn.execute('SELECT key, size FROM responses ORDER BY accessed_at DESC, key'):
+            running += size
+            if running > self.max_bytes:
+                expired.append((key,))
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('DELETE FROM responses WHERE key = ?', expired)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return len(expired)
+
+    def clear(self):
+        self._connect().execute('DELETE FROM responses')
+
+    def stats(self) -> dict:
+        """本进程的命中统计和缓存文件中的条目数、总字节数"""
+        entries, size = self._connect().execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses,
+                'entries': entries, 'bytes': size}
+
+    def record(self, outcome: str):
+        """记录一次查询结果: hits / revalidated / misses"""
+        with self._stats_lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _cached_response(url, headers, body):
+    """由缓存构造与requests兼容的响应，线路字节数为0"""
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response._content = body
+    response.encoding = None
+    response.from_cache = True
+    response.wire_bytes = 0
+    return response
+
+
+class CachingTransport:
+    """带缓存的传输，可包在Http2Transport等其他传输外层"""
+
+    def __init__(self, cache: HttpCache, transport=None):
+        """
+        Args:
+            cache: 响应缓存(HttpCache)
+            transport: 实际发请求的传输，默认使用会话自身的requests连接池
+        """
+        self.cache = cache
+        self.transport = transport
+        # 让签到器按内层传输能解压的编码生成Accept-Encoding
+        self.accept_encoding = getattr(transport, 'accept_encoding', None)
+
+    def _send(self, session, method, url, timeout, **kwargs):
+        if self.transport is not None:
+            return self.transport.request(session, method, url, timeout=timeout, **kwargs)
+        return session.request(method, url, timeout=timeout, **kwargs)
+
+    def request(self, session, method, url, timeout=30, **kwargs):
+        """
+        发送请求，可缓存的页面先查缓存
+
+        Returns:
+            requests.Response: 命中缓存时带有from_cache=True
+        """
+        if not self.cache.cacheable(method, url):
+            return self._send(session, method, url, timeout, **kwargs)
+
+        key = self.cache.key(account_key(session, url), url)
+        try:
+            entry = self.cache.get(key)
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ 读取响应缓存失败: {e}")
+            return self._send(session, method, url, timeout, **kwargs)
+
+        if entry is not None:
+            headers, body, etag, last_modified, stored_at = entry
+            if time.time() - stored_at < self.cache.ttl:
+                self.cache.record('hits')
+                return _cached_response(url, headers, body)
+            if etag or last_modified:
+                conditional = dict(kwargs.pop('headers', None) or {})
+                if etag:
+                    conditional['If-None-Match'] = etag
+                if last_modified:
+                    conditional['If-Modified-Since'] = last_modified
+                response = self._send(session, method, url, timeout, headers=conditional, **kwargs)
+                if response.status_code == 304:
+                    self.cache.record('revalidated')
+                    self.cache.touch(key)
+                    cached = _cached_response(url, headers, body)
+                    cached.wire_bytes = len(response.content or b'')
+                    return cached
+                self.cache.record('misses')
+                return self._store(key, url, response)
+
+        self.cache.record('misses')
+        return self._store(key, url, self._send(session, method, url, timeout, **kwargs))
+
+    def _store(self, key, url, response):
+        if response.status_code == 200 and not response.history:
+            try:
+                self.cache.put(key, url, response)
+            except sqlite3.Error as e:
+                logging.warning(f"⚠️ 写入响应缓存失败: {e}")
+        return response
+
+    def close(self):
+        self.cache.close()
+        if self.transport is not None:
+            self.transport.close()
+
+
+def add_cache_arguments(parser):
+    """给诊断脚本的参数解析器添加 --cache / --cache-ttl 参数"""
+    parser.add_argument('--cache', nargs='?', const=CACHE_PATH,
+                        help=f'缓存只读页面，重复运行时TTL内不再请求、过期后按ETag重新验证 (默认文件: {CACHE_PATH})')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL,
+                        help=f'缓存不经验证直接使用的秒数 (默认: {DEFAULT_TTL})')
@@ -9,8 +9,12 @@
 import os
 import time
 import glob
+import gzip
+import shutil
 import logging
 from datetime import datetime, timedelta
+from metrics_exporter import METRICS_FILE, metrics, flush_metrics
+from profiler import add_profile_argument, start_profiler
 
 class LogCleaner:
     def __init__(self, project_dir: str = None):
@@ -32,8 +36,14 @@ class LogCleaner:
             'cron.log': 30,              # 保留30天的定时任务日志
             'cleanup.log': 30,           # 保留30天的清理日志
             '*.log': 7,                  # 其他日志文件保留7天
+            'events-*.jsonl.gz': 7,      # 保留7天的结构化事件归档
         }
         
+        # 结构化事件日志（event_log.py持续追加），每次清理时轮转并压缩归档
+        self.event_log_file = os.path.join(self.logs_dir, 'events.jsonl')
+        # 轮转出的文件超过这个秒数没有写入才压缩，避免仍在运行的进程继续追加到已压缩的文件
+        self.event_archive_idle = 600
+        
         # 设置日志
         logging.basicConfig(
             level=logging.INFO,
@@ -113,6 +123,44 @@ class LogCleaner:
         
         return result
 
+    def rotate_event_log(self) -> dict:
+        """
+        轮转结构化事件日志：当前的events.jsonl改名为events-<时间>.jsonl，
+        之前轮转出的、已经不再写入的文件压缩为.gz（run_report.py可以直接读取），
+        压缩归档按cleanup_rules中的天数删除
+        
+        Returns:
+            dict: 轮转出的文件名和压缩的文件数
+        """
+        result = {'rotated': None, 'compressed': 0}
+        
+        # 先压缩之前轮转出的文件，本次轮转出的文件留到下次（期间可能还有进程在追加）
+        for file_path in sorted(glob.glob(os.path.join(self.logs_dir, 'events-*.jsonl'))):
+            try:
+                if time.time() - os.path.getmtime(file_path) < self.event_archive_idle:
+                    continue
+                with open(file_path, 'rb') as src, gzip.open(file_path + '.gz', 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(file_path)
+                result['compressed'] += 1
+                logging.info(f"已压缩事件日志: {os.path.basename(file_path)}.gz")
+            except Exception as e:
+                logging.error(f"压缩事件日志失败 {file_path}: {e}")
+        
+        try:
+            if os.path.getsize(self.event_log_file) > 0:
+                rotated = os.path.join(self.logs_dir, f"events-{datetime.now():%Y%m%d-%H%M%S}.jsonl")
+                # 已经打开文件的进程继续写入改名后的文件，之后启动的进程重新创建events.jsonl
+                os.rename(self.event_log_file, rotated)
+                result['rotated'] = os.path.basename(rotated)
+                logging.info(f"已轮转事件日志: {result['rotated']}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.error(f"轮转事件日志失败: {e}")
+        
+        return result
+
     def clean_empty_logs(self):
         """清理空的日志文件"""
         log_files = glob.glob(os.path.join(self.logs_dir, "*.log"))
@@ -159,6 +207,9 @@ class LogCleaner:
             # 获取清理前的磁盘使用情况
             before_usage = self.get_disk_usage()
             
+            # 轮转并压缩结构化事件日志
+            self.rotate_event_log()
+            
             # 清理过期日志
             cleanup_result = self.clean_log_files()
             
@@ -180,6 +231,8 @@ class LogCleaner:
             if before_usage and after_usage:
                 logging.info(f"  目录总大小: {before_usage['total_size_mb']} MB -> {after_usage['total_size_mb']} MB")
             
+            metrics.inc('acgfun_log_cleaner_freed_bytes_total', cleanup_result['total_size'])
+            metrics.inc('acgfun_log_cleaner_files_removed_total', cleaned_count)
             return len(cleanup_result['error_files']) == 0
             
         except Exception as e:
@@ -193,8 +246,12 @@ def main():
     parser = argparse.ArgumentParser(description='AcgFun签到脚本日志清理工具')
     parser.add_argument('--dir', type=str, help='项目目录路径')
     parser.add_argument('--dry-run', action='store_true', help='只显示将要删除的文件，不实际删除')
+    parser.add_argument('--metrics-file', type=str, default=METRICS_FILE,
+                        help=f'Prometheus textfile指标文件，相对路径相对于项目目录，空字符串表示不写 (默认: {METRICS_FILE})')
+    add_profile_argument(parser)
     
     args = parser.parse_args()
+    start_profiler('log_cleaner', args.profile)
     
     # 创建清理器
     cleaner = LogCleaner(args.dir)
@@ -206,6 +263,9 @@ def main():
     
     # 运行清理
     success = cleaner.run_cleanup()
+    # 指标和清理的日志一样写在项目目录下（--dir指定的目录），而不是当前目录
+    metrics_file = args.metrics_file and os.path.join(cleaner.project_dir, args.metrics_file)
+    flush_metrics('log_cleaner', metrics_file)
     
     if success:
         print("✅ 日志清理完成")
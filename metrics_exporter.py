@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Prometheus指标导出模块
+运行期间在内存中累计签到结果、请求耗时直方图、重试次数、天空石余额和日志清理释放的空间，
+进程结束前合并到共享的状态文件，并原子地重写node_exporter textfile collector读取的 .prom 文件；
+多个进程同时结束时通过flock依次合并，计数器在多次运行之间持续累加
+"""
+
+import os
+import json
+import time
+import fcntl
+import logging
+import threading
+from urllib.parse import urlparse, parse_qs
+
+METRICS_FILE = os.path.join('logs', 'metrics', 'acgfun.prom')
+
+# 请求耗时直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 指标名: (类型, 说明)
+METRICS = {
+    'acgfun_signin_runs_total': ('counter', '签到运行次数，按结果分类'),
+    'acgfun_request_duration_seconds': ('histogram', '请求耗时，按页面分类'),
+    'acgfun_request_retries_total': ('counter', '请求重试次数，按页面和错误分类'),
+    'acgfun_response_bytes_total': ('counter', '响应正文字节数，按页面和类型（wire线路/decoded解码后）分类'),
+    'acgfun_credit_balance': ('gauge', '最近一次看到的天空石余额'),
+    'acgfun_signin_reward': ('gauge', '最近一次签到获得的天空石'),
+    'acgfun_concurrency_limit': ('gauge', '自适应并发控制在各主机上收敛到的并发数'),
+    'acgfun_log_cleaner_freed_bytes_total': ('counter', '日志清理释放的字节数'),
+    'acgfun_log_cleaner_files_removed_total': ('counter', '日志清理删除的文件数'),
+    'acgfun_last_run_timestamp_seconds': ('gauge', '各脚本最近一次运行结束的时间'),
+}
+
+# URL特征到页面名，用作请求指标的endpoint标签（避免把带formhash的完整URL放进标签）
+ENDPOINTS = (
+    ('operation', 'qiandao', 'signin_submit'),
+    ('id', 'k_misign:sign', 'signin_page'),
+    ('ac', 'credit', 'credit'),
+    ('do', 'profile', 'profile'),
+)
+
+
+def endpoint_label(url: str) -> str:
+    """请求URL对应的页面名"""
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    for key, value, name in ENDPOINTS:
+        if value in query.get(key, ()):
+            return name
+    return parsed.path.strip('/') or '/'
+
+
+def _label_key(labels: dict) -> str:
+    return json.dumps(sorted(labels.items()), ensure_ascii=False)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """进程内的指标累计（线程安全），flush()时合并到共享文件"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # 计数器和直方图保存本进程的增量，合并后清零；仪表盘保存最新值
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器加value"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """设置仪表盘的值"""
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """记录一次直方图观测"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def flush(self, path: str = METRICS_FILE):
+        """
+        把本进程的指标合并到共享状态，并原子地重写textfile
+
+        Args:
+            path: .prom文件路径，状态文件为同名的 .json，合并锁为同名的 .lock
+        """
+        if not path:
+            return
+        with self._lock:
+            counters, gauges, histograms = self.counters, self.gauges, self.histograms
+            self._reset()
+        base = os.path.splitext(path)[0]
+        lock_fd = None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            lock_fd = os.open(base + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            state = _load_state(base + '.json')
+            for (name, key), value in counters.items():
+                state['counters'][f'{name} {key}'] = state['counters'].get(f'{name} {key}', 0) + value
+            for (name, key), value in gauges.items():
+                state['gauges'][f'{name} {key}'] = value
+            for (name, key), histogram in histograms.items():
+                merged = state['histograms'].setdefault(
+                    f'{name} {key}', {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0}
+                )
+                merged['buckets'] = [a + b for a, b in zip(merged['buckets'], histogram['buckets'])]
+                merged['sum'] += histogram['sum']
+                merged['count'] += histogram['count']
+            _atomic_write(base + '.json', json.dumps(state, ensure_ascii=False))
+            # textfile collector可能随时读取，先写临时文件再改名，读到的总是完整的文件
+            _atomic_write(path, render(state))
+        except Exception as e:
+            logging.error(f"❌ 写入指标文件失败: {e}")
+        finally:
+            if lock_fd is not None:
+                os.close(lock_fd)
+
+
+def _load_state(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        state = {}
+    for section in ('counters', 'gauges', 'histograms'):
+        state.setdefault(section, {})
+    return state
+
+
+def _atomic_write(path: str, content: str):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def render(state: dict) -> str:
+    """把合并后的状态渲染为Prometheus文本格式"""
+    series = {}
+    for section in ('counters', 'gauges', 'histograms'):
+        for entry, value in state[section].items():
+            name, key = entry.split(' ', 1)
+            series.setdefault(name, []).append((json.loads(key), value))
+
+    lines = []
+    for name in sorted(series):
+        metric_type, help_text = METRICS.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in sorted(series[name], key=lambda item: item[0]):
+            labels = [tuple(label) for label in labels]
+            if metric_type != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            for bound, count in zip(LATENCY_BUCKETS, value['buckets']):
+                lines.append(f'{name}_bucket{_format_labels(labels + [("le", bound)])} {count}')
+            lines.append(f'{name}_bucket{_format_labels(labels + [("le", "+Inf")])} {value["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value["sum"])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+# 进程内共享的指标
+metrics = MetricsRegistry()
+
+
+def error_reason(error) -> str:
+    """请求异常的分类，用作重试指标的reason标签"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        return f'http_{response.status_code}'
+    return type(error).__name__
+
+
+def record_request(url: str, elapsed: float):
+    """记录一次请求（无论成败）的耗时"""
+    metrics.observe('acgfun_request_duration_seconds', elapsed, endpoint=endpoint_label(url))
+
+
+def record_response_bytes(url: str, wire: int, decoded: int):
+    """记录一个响应在线路上和解码后的正文字节数"""
+    endpoint = endpoint_label(url)
+    metrics.inc('acgfun_response_bytes_total', wire, endpoint=endpoint, kind='wire')
+    metrics.inc('acgfun_response_bytes_total', decoded, endpoint=endpoint, kind='decoded')
+
+
+def record_retry(url: str, error):
+    """记录一次因error而进行的重试"""
+    metrics.inc('acgfun_request_retries_total', endpoint=endpoint_label(url), reason=error_reason(error))
+
+
+def flush_metrics(script: str, path: str = METRICS_FILE):
+    """脚本结束前调用：记录运行时间并写出指标"""
+    metrics.set('acgfun_last_run_timestamp_seconds', time.time(), script=script)
+    metrics.flush(path)
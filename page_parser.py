@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+页面解析模块
+签到页、签到结果和积分页的解析与判定，均为纯函数，只返回简洁的判定结果，
+可以在进程池中执行，避免批量运行时BeautifulSoup解析占用GIL
+"""
+
+import re
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup
+
+SIGNIN_BUTTON_PATTERN = re.compile(r'operation=qiandao')
+
+SUCCESS_KEYWORDS = [
+    "签到成功", "签到完成", "打卡成功", "签到奖励",
+    "恭喜", "获得", "奖励", "连续签到", "今日签到",
+    "积分", "天空石", "经验", "金币", "您获得了"
+]
+ERROR_KEYWORDS = ["失败", "错误", "异常", "请重试"]
+SIGNIN_CONTENT_KEYWORDS = ["签到", "每日", "连续"]
+
+DEFAULT_CREDIT_NAME = '天空石'
+ALREADY_SIGNED_MARKER = '您今天已经签到过了'
+NOT_SIGNED_MARKER = '您今天还没有签到'
+
+
+@lru_cache(maxsize=None)
+def _credit_patterns(credit_name: str):
+    """
+    按积分名称生成奖励和余额的正则
+
+    奖励如"获得随机奖励 天空石 5"、"奖励 5 天空石"；
+    余额为Discuz页头积分菜单 <li>天空石: <span id="hcredit_2">1234</span></li>，或提示中的"当前天空石: 1234"
+    """
+    name = re.escape(credit_name)
+    reward_patterns = [
+        re.compile(r'(?:获得|奖励)[^<\d]{0,20}?' + name + r'\s*[:：]?\s*\+?(\d+)'),
+        re.compile(r'(?:获得|奖励)[^<\d]{0,20}?(\d+)\s*' + name),
+    ]
+    balance_patterns = [
+        re.compile(name + r'\s*[:：]\s*<span id="hcredit_\d+">\s*(\d+)'),
+        re.compile(r'(?:当前|现有|剩余)' + name + r'(?:数量|总数)?\s*[:：]?\s*(\d+)'),
+    ]
+    return reward_patterns, balance_patterns
+
+
+def parse_profile_page(page_text: str):
+    """
+    解析个人中心页面
+
+    Returns:
+        tuple: (状态, 用户名文本)，状态为 logged_in / login_required
+    """
+    if '个人资料' in page_text or 'profile' in page_text:
+        soup = BeautifulSoup(page_text, 'html.parser')
+        username_element = soup.find('h2', class_='mbn')
+        if username_element:
+            return "logged_in", username_element.get_text().strip()
+        return "logged_in", ''
+
+    if '登录' in page_text and '密码' in page_text:
+        return "login_required", ''
+
+    return "logged_in", ''
+
+
+def classify_signin_page(page_text: str, already_marker: str = ALREADY_SIGNED_MARKER,
+                         not_signed_marker: str = NOT_SIGNED_MARKER):
+    """
+    判定签到页面的签到状态
+
+    Args:
+        page_text: 签到页文本
+        already_marker: 表示今天已签到的文字
+        not_signed_marker: 表示今天未签到的文字
+
+    Returns:
+        tuple: (状态, 判定依据, 签到按钮链接)，状态为 already_signed / not_signed / unknown
+    """
+    if already_marker in page_text:
+        return "already_signed", "already_text", None
+
+    soup = BeautifulSoup(page_text, 'html.parser')
+    signin_button = soup.find('a', href=SIGNIN_BUTTON_PATTERN)
+    if signin_button:
+        return "not_signed", "button", signin_button.get('href')
+
+    if not_signed_marker in page_text:
+        return "not_signed", "not_signed_text", None
+
+    if "签到" in page_text and "连续签到" in page_text:
+        return "already_signed", "streak_text", None
+
+    return "unknown", "", None
+
+
+def classify_signin_result(response_text: str):
+    """
+    判定签到请求的响应
+
+    Returns:
+        tuple: (判定, 依据)，判定为 success / already_signed / needs_verify / failed
+    """
+    for keyword in SUCCESS_KEYWORDS:
+        if keyword in response_text:
+            return "success", keyword
+
+    if "您今天已经签到过了" in response_text or "今天已经签到" in response_text:
+        return "already_signed", ""
+
+    # 响应很短，可能是跳转页面
+    if len(response_text.strip()) < 100:
+        return "needs_verify", "redirect"
+
+    has_error = any(error in response_text for error in ERROR_KEYWORDS)
+    has_signin_content = any(word in response_text for word in SIGNIN_CONTENT_KEYWORDS)
+    if not has_error and has_signin_content:
+        return "needs_verify", "no_error"
+
+    return "failed", ""
+
+
+def parse_signin_reward(page_text: str, credit_name: str = DEFAULT_CREDIT_NAME):
+    """
+    从签到响应（或任意带页头的页面）中提取本次奖励和当前积分余额，只用正则，不解析DOM
+
+    Returns:
+        tuple: (奖励数量, 余额)，找不到的项为None
+    """
+    reward_patterns, balance_patterns = _credit_patterns(credit_name)
+    reward = balance = None
+    for pattern in reward_patterns:
+        match = pattern.search(page_text)
+        if match:
+            reward = int(match.group(1))
+            break
+    for pattern in balance_patterns:
+        match = pattern.search(page_text)
+        if match:
+            balance = int(match.group(1))
+            break
+    return reward, balance
+
+
+def parse_credit_page(page_text: str, credit_name: str = DEFAULT_CREDIT_NAME):
+    """
+    解析积分页面中的积分信息（默认为天空石）
+
+    Returns:
+        tuple: (积分信息字典, 找到数据的位置描述)，字典键为积分名称，未找到时字典为空
+    """
+    soup = BeautifulSoup(page_text, 'html.parser')
+    credit_info = {}
+
+    # 专门查找class="xi1 cl"的元素
+    xi1_elements = soup.find_all(class_="xi1 cl")
+    for element in xi1_elements:
+        element_text = element.get_text().strip()
+        if credit_name in element_text:
+            numbers = re.findall(r'\d+', element_text)
+            if numbers:
+                # 通常第一个数字是当前数量，第二个可能是今日获得
+                credit_info[credit_name] = int(numbers[0])
+                if len(numbers) > 1:
+                    credit_info[f'{credit_name}_今日获得'] = int(numbers[1])
+                return credit_info, "xi1 cl 元素"
+
+    # 如果在xi1 cl中没找到，尝试查找其父元素和兄弟元素
+    for xi1_element in xi1_elements:
+        parent = xi1_element.parent
+        if parent:
+            parent_text = parent.get_text()
+            if credit_name in parent_text:
+                numbers = re.findall(r'\d+', parent_text)
+                if numbers:
+                    credit_info[credit_name] = int(numbers[0])
+                    return credit_info, "xi1 cl 父元素"
+
+        for sibling in xi1_element.find_next_siblings():
+            sibling_text = sibling.get_text()
+            if credit_name in sibling_text:
+                numbers = re.findall(r'\d+', sibling_text)
+                if numbers:
+                    credit_info[credit_name] = int(numbers[0])
+                    return credit_info, "xi1 cl 兄弟元素"
+
+    # 备用方法：在整个页面中查找包含积分名称的元素
+    for text_node in soup.find_all(string=re.compile(re.escape(credit_name))):
+        if text_node.parent:
+            element = text_node.parent
+            numbers = re.findall(r'\d+', element.get_text())
+            if numbers:
+                credit_info[credit_name] = int(numbers[0])
+                return credit_info, "文本搜索"
+
+            next_sibling = element.find_next_sibling()
+            if next_sibling:
+                sibling_numbers = re.findall(r'\d+', next_sibling.get_text())
+                if sibling_numbers:
+                    credit_info[credit_name] = int(sibling_numbers[0])
+                    return credit_info, "积分名称元素的下一个兄弟元素"
+
+    return credit_info, ""
+
+
+class ParsePool:
+    """把页面解析放到进程池中执行，只在进程间传递页面文本和判定结果"""
+
+    def __init__(self, workers: int = None):
+        """
+        初始化解析进程池
+
+        Args:
+            workers: 进程数，默认为CPU核数
+        """
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    def run(self, func, *args):
+        """在进程池中执行解析函数并等待结果"""
+        return self.executor.submit(func, *args).result()
+
+    def shutdown(self):
+        """关闭进程池"""
+        self.executor.shutdown(wait=True)
+
+
+def run_parser(parse_pool, func, *args):
+    """有进程池时在进程池中解析，否则在当前线程直接解析"""
+    if parse_pool is None:
+        return func(*args)
+    return parse_pool.run(func, *args)
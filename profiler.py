@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+运行剖析模块
+入口脚本的 --profile 参数调用start_profiler()，进程退出时把剖析结果写到 logs/profiles/：
+- cprofile: 确定性剖析（包括线程池中的线程），保存 .prof（可用snakeviz等工具查看）和按累计耗时排序的 .txt 摘要
+- sample: 采样剖析，后台线程定期记录所有线程的调用栈，保存折叠栈 .folded（可用flamegraph.pl或speedscope查看），
+  开销小，适合剖析等待网络的时间分布
+"""
+
+import os
+import sys
+import time
+import atexit
+import pstats
+import logging
+import cProfile
+import threading
+from collections import Counter
+
+PROFILE_DIR = os.path.join('logs', 'profiles')
+PROFILE_MODES = ('cprofile', 'sample')
+SAMPLE_INTERVAL = 0.005
+
+
+def _profile_path(name: str, suffix: str, profile_dir: str) -> str:
+    os.makedirs(profile_dir, exist_ok=True)
+    return os.path.join(profile_dir, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}{suffix}")
+
+
+# Python 3.12起cProfile基于sys.monitoring，一个Profile就能记录所有线程，
+# 而且同时只能启用一个Profile（在线程中再启用会抛ValueError）
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+
+class _CProfiler:
+    """
+    Python 3.12之前主线程和之后启动的每个线程各用一个cProfile.Profile，结束时合并；
+    3.12起只用一个进程范围的Profile
+    """
+
+    def __init__(self, name, profile_dir):
+        self.name = name
+        self.profile_dir = profile_dir
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._main = cProfile.Profile()
+
+    def _start_thread(self, *_):
+        # threading.setprofile的回调在新线程的第一个事件时调用，在该线程中换成独立的Profile
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        if PER_THREAD_PROFILES:
+            threading.setprofile(self._start_thread)
+        self._main.enable()
+
+    def stop(self):
+        self._main.disable()
+        if PER_THREAD_PROFILES:
+            threading.setprofile(None)
+        stats = pstats.Stats(self._main)
+        with self._lock:
+            for profile in self._profiles:
+                # 线程都已结束，只读取已收集的数据
+                profile.snapshot_stats()
+                if profile.stats:
+                    stats.add(profile)
+        path = _profile_path(self.name, '.prof', self.profile_dir)
+        stats.dump_stats(path)
+        with open(path[:-len('.prof')] + '.txt', 'w', encoding='utf-8') as f:
+            stats.stream = f
+            stats.sort_stats('cumulative').print_stats(40)
+        return path
+
+
+class _SamplingProfiler:
+    """后台线程每隔interval秒记录一次所有线程的调用栈"""
+
+    def __init__(self, name, profile_dir, interval=SAMPLE_INTERVAL):
+        self.name = name
+        self.profile_dir = profile_dir
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        path = _profile_path(self.name, '.folded', self.profile_dir)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f'{stack} {count}\n')
+        return path
+
+
+def start_profiler(name: str, mode: str = None, profile_dir: str = PROFILE_DIR):
+    """
+    开始剖析，进程退出时（包括提前return和exit()）自动写出结果
+
+    Args:
+        name: 入口脚本名，用于结果文件名
+        mode: cprofile / sample，为None时不剖析
+
+    Returns:
+        剖析器，未启用时返回None
+    """
+    if not mode:
+        return None
+    if mode == 'cprofile':
+        profiler = _CProfiler(name, profile_dir)
+    elif mode == 'sample':
+        profiler = _SamplingProfiler(name, profile_dir)
+    else:
+        raise ValueError(f'未知的剖析模式: {mode}')
+
+    def finish():
+        try:
+            path = profiler.stop()
+            logging.info(f"📈 剖析结果已保存: {path}")
+        except Exception as e:
+            logging.error(f"❌ 保存剖析结果失败: {e}")
+
+    atexit.register(finish)
+    profiler.start()
+    return profiler
+
+
+def add_profile_argument(parser):
+    """给入口脚本的参数解析器添加 --profile 参数"""
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILE_MODES,
+                        help=f'剖析本次运行并把结果保存到 {PROFILE_DIR}/（默认cprofile，sample为采样剖析）')
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求钩子
+CookieSignin和CreditAnalyzer的safe_request在发请求前、收到响应后和决定重试时依次调用注册的回调，
+追踪、打点等自定义功能通过注册回调接入，不需要修改或继承签到类
+
+    from request_hooks import request_hooks
+    request_hooks.add(after_response=lambda method, url, response, elapsed: print(url, elapsed))
+"""
+
+import logging
+import threading
+
+
+class RequestHooks:
+    """一组请求回调，回调抛出的异常只记录日志，不影响请求"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.before_request_hooks = []
+        self.after_response_hooks = []
+        self.on_retry_hooks = []
+
+    def add(self, before_request=None, after_response=None, on_retry=None):
+        """
+        注册回调（未提供的不注册）
+
+        Args:
+            before_request: func(method, url, kwargs)，发请求前调用，可以修改kwargs（如添加追踪请求头）
+            after_response: func(method, url, response, elapsed)，收到响应后调用（包括4xx/5xx响应）
+            on_retry: func(method, url, error, attempt, delay)，决定重试时调用，attempt从1开始
+        """
+        with self._lock:
+            if before_request is not None:
+                self.before_request_hooks.append(before_request)
+            if after_response is not None:
+                self.after_response_hooks.append(after_response)
+            if on_retry is not None:
+                self.on_retry_hooks.append(on_retry)
+
+    def remove(self, func):
+        """移除回调（在所有列表中查找）"""
+        with self._lock:
+            for hooks in (self.before_request_hooks, self.after_response_hooks, self.on_retry_hooks):
+                if func in hooks:
+                    hooks.remove(func)
+
+    def clear(self):
+        with self._lock:
+            self.before_request_hooks.clear()
+            self.after_response_hooks.clear()
+            self.on_retry_hooks.clear()
+
+    @staticmethod
+    def _call(hooks, *args):
+        for hook in list(hooks):
+            try:
+                hook(*args)
+            except Exception as e:
+                logging.warning(f"⚠️ 请求钩子 {getattr(hook, '__name__', hook)} 执行失败: {e}")
+
+    def before_request(self, method, url, kwargs):
+        self._call(self.before_request_hooks, method, url, kwargs)
+
+    def after_response(self, method, url, response, elapsed):
+        self._call(self.after_response_hooks, method, url, response, elapsed)
+
+    def on_retry(self, method, url, error, attempt, delay):
+        self._call(self.on_retry_hooks, method, url, error, attempt, delay)
+
+
+# 进程内默认的钩子，签到器和积分分析器未指定hooks时使用
+request_hooks = RequestHooks()
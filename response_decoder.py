@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+响应解码模块
+按站点编码策略一次性解码响应内容，避免requests在缺少charset时对整页做编码探测
+"""
+
+import logging
+from urllib.parse import urlparse
+
+# 站点编码策略：Discuz论坛通常固定使用UTF-8或GBK
+SITE_ENCODINGS = {
+    'acgfun.art': 'utf-8',
+}
+
+DEFAULT_ENCODING = 'utf-8'
+
+
+def get_site_encoding(url: str) -> str:
+    """
+    获取URL所属站点的页面编码
+
+    Args:
+        url: 请求URL
+
+    Returns:
+        str: 站点编码，未配置的站点返回默认编码
+    """
+    host = (urlparse(url).hostname or '').lower()
+    while host:
+        if host in SITE_ENCODINGS:
+            return SITE_ENCODINGS[host]
+        # 子域名回退到上级域名的配置
+        host = host.partition('.')[2]
+    return DEFAULT_ENCODING
+
+
+def _response_encoding(response, encoding=None) -> str:
+    """确定响应使用的编码：显式参数 > 响应头charset > 站点策略"""
+    if encoding:
+        return encoding
+    content_type = response.headers.get('Content-Type', '') if response.headers else ''
+    if 'charset=' in content_type.lower() and response.encoding:
+        return response.encoding
+    return get_site_encoding(response.url or '')
+
+
+def decode_response(response, encoding=None) -> str:
+    """
+    解码响应内容（同一响应只解码一次）
+
+    Args:
+        response: requests响应对象
+        encoding: 指定编码，不指定时按响应头和站点策略确定
+
+    Returns:
+        str: 解码后的页面文本
+    """
+    cached = getattr(response, '_decoded_text', None)
+    if cached is not None:
+        return cached
+
+    encoding = _response_encoding(response, encoding)
+    # 固定response.encoding，之后访问response.text也不会再触发编码探测
+    response.encoding = encoding
+    try:
+        text = response.content.decode(encoding, errors='replace')
+    except LookupError:
+        logging.warning(f"⚠️ 未知编码 {encoding}，回退到 {DEFAULT_ENCODING}")
+        response.encoding = DEFAULT_ENCODING
+        text = response.content.decode(DEFAULT_ENCODING, errors='replace')
+
+    response._decoded_text = text
+    return text
+
+
+def response_contains(response, marker: str, encoding=None) -> bool:
+    """
+    直接在原始字节上匹配标记文本，无需解码整个页面
+
+    Args:
+        response: requests响应对象
+        marker: 要查找的文本
+        encoding: 指定编码，不指定时按响应头和站点策略确定
+
+    Returns:
+        bool: 页面是否包含该文本
+    """
+    cached = getattr(response, '_decoded_text', None)
+    if cached is not None:
+        return marker in cached
+
+    encoding = _response_encoding(response, encoding)
+    try:
+        return marker.encode(encoding) in response.content
+    except (LookupError, UnicodeEncodeError):
+        return marker in decode_response(response, encoding)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求重试策略
+按错误类型决定是否重试以及等待多久：429/503遵守服务器的Retry-After，
+网络错误和5xx指数退避并加随机抖动，其他4xx不重试
+"""
+
+import time
+import random
+import email.utils
+
+import requests
+
+# 这些状态码说明服务器暂时无法处理，稍后重试可能成功
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Retry-After超过这个秒数时不再等待，直接放弃本次请求
+MAX_RETRY_AFTER = 60.0
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+
+def retry_after_seconds(response):
+    """
+    解析响应的Retry-After头（秒数或HTTP日期）
+
+    Returns:
+        float: 需要等待的秒数，没有或无法解析时返回None
+    """
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """第attempt次（从0开始）重试前的等待：指数增长，并在后一半区间内随机，避免多个账号同时重试"""
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def retry_delay(error, attempt: int):
+    """
+    根据请求异常决定重试前的等待
+
+    Args:
+        error: 请求抛出的异常
+        attempt: 已失败的次数减一（第一次失败为0）
+
+    Returns:
+        float: 等待秒数，不应重试时返回None
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        if response is None or response.status_code not in RETRYABLE_STATUS:
+            return None
+        wait = retry_after_seconds(response)
+        if wait is not None:
+            return wait if wait <= MAX_RETRY_AFTER else None
+    return backoff_delay(attempt)
+
+
+def describe_error(error) -> str:
+    """请求异常的中文简述，用于日志"""
+    if isinstance(error, requests.exceptions.SSLError):
+        return "SSL错误"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "连接错误"
+    if isinstance(error, requests.exceptions.Timeout):
+        return "请求超时"
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        if error.response.status_code == 429:
+            return "请求过于频繁(429)"
+        return f"HTTP {error.response.status_code}"
+    return "请求失败"
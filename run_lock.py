@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+跨进程运行锁和共享限速器
+定时任务和手动运行可能同时执行：按账号加flock锁，避免两个进程同时为同一账号签到；
+所有进程共享一个加锁文件中的令牌桶，限制对站点的总请求速率
+"""
+
+import os
+import re
+import time
+import fcntl
+import struct
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+LOCK_DIR = os.path.join('logs', 'locks')
+RATE_LIMIT_STATE = os.path.join('logs', 'rate_limit.state')
+
+# 令牌桶状态: 剩余令牌数, 上次更新时间
+_STATE_FORMAT = 'dd'
+_STATE_SIZE = struct.calcsize(_STATE_FORMAT)
+
+
+def _lock_file_name(account_id: str) -> str:
+    """把账号名转换为安全的锁文件名"""
+    safe_name = re.sub(r'[^\w.-]', '_', account_id)[:64]
+    digest = hashlib.sha1(account_id.encode('utf-8')).hexdigest()[:8]
+    return f'{safe_name}-{digest}.lock'
+
+
+@contextmanager
+def account_lock(account_id: str, lock_dir: str = LOCK_DIR):
+    """
+    获取账号的跨进程锁（非阻塞）
+
+    Args:
+        account_id: 账号名
+        lock_dir: 锁文件目录
+
+    Yields:
+        bool: 是否获得了锁，False表示另一个进程正在处理该账号
+    """
+    os.makedirs(lock_dir, exist_ok=True)
+    fd = os.open(os.path.join(lock_dir, _lock_file_name(account_id)), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        # 进程退出时内核会自动释放flock，异常退出也不会留下死锁
+        yield True
+    finally:
+        os.close(fd)
+
+
+class SharedRateLimiter:
+    """跨进程共享的令牌桶限速器，状态保存在一个用flock保护的小文件中"""
+
+    def __init__(self, rate: float, burst: float = None, path: str = RATE_LIMIT_STATE):
+        """
+        初始化限速器
+
+        Args:
+            rate: 所有进程合计的每秒请求数上限
+            burst: 令牌桶容量（允许的突发请求数），默认等于rate
+            path: 状态文件路径，所有进程需要使用同一个文件
+        """
+        self.rate = rate
+        self.burst = max(burst or rate, 1.0)
+        self.path = path
+        self._thread_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _take(self) -> float:
+        """尝试取一个令牌，返回需要等待的秒数（0表示已取得）"""
+        # flock按打开的文件生效，同一进程内的线程还需要线程锁
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                data = os.pread(self._fd, _STATE_SIZE, 0)
+                if len(data) == _STATE_SIZE:
+                    tokens, updated = struct.unpack(_STATE_FORMAT, data)
+                    tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+                else:
+                    tokens = self.burst
+
+                if tokens >= 1:
+                    tokens -= 1
+                    wait = 0.0
+                else:
+                    wait = (1 - tokens) / self.rate
+
+                os.pwrite(self._fd, struct.pack(_STATE_FORMAT, tokens, now), 0)
+                return wait
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def acquire(self):
+        """阻塞直到取得一个请求令牌"""
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return
+            logging.debug(f"⏳ 请求限速，等待 {wait:.2f}s")
+            time.sleep(wait)
+
+    def close(self):
+        """关闭状态文件"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+运行报告
+单遍流式读取结构化事件日志（logs/events.jsonl，也可以是轮转后的 .gz），统计任意时间窗口内的
+签到成功率、失败原因分布和各阶段耗时的p50/p95/p99；耗时用对数分桶直方图累计（相对误差约1%），
+内存占用与事件数量无关
+"""
+
+import sys
+import gzip
+import json
+import math
+import time
+import logging
+import argparse
+from datetime import datetime
+from collections import Counter
+
+from event_log import EVENT_LOG_FILE
+
+SUCCESS_OUTCOMES = ('signed', 'already_signed')
+# 没有真正运行的结果（被其他进程锁定、站点熔断），不计入成功率
+SKIPPED_OUTCOMES = ('locked', 'circuit_open')
+QUANTILES = (0.5, 0.95, 0.99)
+
+# 相邻桶上限之比，桶中点的相对误差不超过 (GROWTH-1)/2
+GROWTH = 1.02
+_LOG_GROWTH = math.log(GROWTH)
+# 失败原因最多保留的种类，超出的计入other（原因来自有限的结果和异常类名，正常不会达到）
+MAX_REASONS = 200
+
+# 相对时间窗口的单位
+UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+class LatencyHistogram:
+    """对数分桶的耗时直方图，桶数只与耗时范围有关"""
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        # 小于1ms的都放在第0桶
+        self.buckets[int(math.log(value) / _LOG_GROWTH) if value > 1 else 0] += 1
+
+    def quantile(self, q: float) -> float:
+        """第q分位数（取所在桶的几何中点）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(GROWTH ** (index + 0.5), self.max) if index else min(1.0, self.max)
+        return self.max
+
+
+def parse_time(value: str, now: float = None) -> float:
+    """
+    解析时间参数为时间戳
+
+    Args:
+        value: 相对时间（30m / 24h / 7d，表示多久以前）或本地时间（2025-06-01 / 2025-06-01 08:00）
+    """
+    now = time.time() if now is None else now
+    if value[-1:] in UNITS and value[:-1].replace('.', '', 1).isdigit():
+        return now - float(value[:-1]) * UNITS[value[-1]]
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f'无法解析时间: {value}')
+
+
+def _line_ts(line: str):
+    """事件行开头的时间戳（event_log写入的行以 {"ts":<时间戳>, 开头），其他格式返回None"""
+    if not line.startswith('{"ts":'):
+        return None
+    try:
+        return float(line[6:line.index(',', 6)])
+    except ValueError:
+        return None
+
+
+def iter_events(paths, since=None, until=None):
+    """
+    逐行读取事件文件（.gz自动解压），跳过无法解析的行
+
+    Args:
+        since / until: 时间窗口，窗口外的行只读时间戳、不解析JSON
+    """
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    ts = _line_ts(line)
+                    if ts is not None and ((since is not None and ts < since) or (until is not None and ts >= until)):
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            logging.warning(f"⚠️ 事件文件不存在: {path}")
+
+
+class RunReport:
+    """单遍累计的运行统计"""
+
+    def __init__(self, since=None, until=None, site=None, account=None):
+        self.since = since
+        self.until = until
+        self.site = site
+        self.account = account
+        self.first_ts = None
+        self.last_ts = None
+        self.outcomes = Counter()
+        self.reasons = Counter()
+        self.phases = {}
+        self.run_latency = LatencyHistogram()
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+
+    def _matches(self, event) -> bool:
+        ts = event.get('ts', 0)
+        if self.since is not None and ts < self.since:
+            return False
+        if self.until is not None and ts >= self.until:
+            return False
+        if self.site is not None and event.get('site') != self.site:
+            return False
+        if self.account is not None and event.get('account') != self.account:
+            return False
+        return True
+
+    def add(self, event):
+        kind = event.get('event')
+        if kind not in ('run', 'phase') or not self._matches(event):
+            return
+        ts = event['ts']
+        self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+        self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+
+        if kind == 'phase':
+            histogram = self.phases.get(event.get('phase'))
+            if histogram is None:
+                histogram = self.phases[event.get('phase')] = LatencyHistogram()
+            histogram.add(event.get('duration_ms', 0.0))
+            return
+
+        outcome = event.get('outcome', 'error')
+        self.outcomes[outcome] += 1
+        if outcome in SKIPPED_OUTCOMES:
+            return
+        self.run_latency.add(event.get('duration_ms', 0.0))
+        self.wire_bytes += event.get('wire_bytes', 0)
+        self.decoded_bytes += event.get('decoded_bytes', 0)
+        if outcome not in SUCCESS_OUTCOMES:
+            reason = f"{outcome}: {event['reason']}" if event.get('reason') else outcome
+            if reason not in self.reasons and len(self.reasons) >= MAX_REASONS:
+                reason = 'other'
+            self.reasons[reason] += 1
+
+    def to_dict(self) -> dict:
+        """统计结果（可序列化为JSON）"""
+        total = sum(self.outcomes.values())
+        skipped = sum(self.outcomes[outcome] for outcome in SKIPPED_OUTCOMES)
+        success = sum(self.outcomes[outcome] for outcome in SUCCESS_OUTCOMES)
+        attempted = total - skipped
+
+        def latency(histogram):
+            result = {'count': histogram.count, 'max': round(histogram.max, 1)}
+            for q in QUANTILES:
+                result[f'p{int(q * 100)}'] = round(histogram.quantile(q), 1)
+            return result
+
+        return {
+            'first': self.first_ts,
+            'last': self.last_ts,
+            'runs': total,
+            'skipped': skipped,
+            'success': success,
+            'success_rate': round(success / attempted, 4) if attempted else None,
+            'outcomes': dict(self.outcomes.most_common()),
+            'failure_reasons': dict(self.reasons.most_common()),
+            'run_latency_ms': latency(self.run_latency),
+            'phase_latency_ms': {phase: latency(h) for phase, h in sorted(self.phases.items(), key=lambda i: str(i[0]))},
+            'wire_bytes': self.wire_bytes,
+            'decoded_bytes': self.decoded_bytes,
+        }
+
+
+def _format_ts(ts):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)) if ts else '-'
+
+
+def print_report(report: dict):
+    print(f"📅 时间范围: {_format_ts(report['first'])} ~ {_format_ts(report['last'])}")
+    if not report['runs']:
+        print("ℹ️ 时间窗口内没有签到记录")
+        return
+    rate = f"{report['success_rate']:.1%}" if report['success_rate'] is not None else '-'
+    print(f"📊 签到 {report['runs']} 次（跳过 {report['skipped']}），成功 {report['success']}，成功率 {rate}")
+    print(f"   结果分布: {report['outcomes']}")
+    if report['failure_reasons']:
+        print("❌ 失败原因:")
+        for reason, count in report['failure_reasons'].items():
+            print(f"   {count:>6}  {reason}")
+    print("⏱️ 耗时 (ms):")
+    print(f"   {'阶段':<10}{'次数':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    rows = list(report['phase_latency_ms'].items()) + [('run', report['run_latency_ms'])]
+    for phase, latency in rows:
+        print(f"   {str(phase):<12}{latency['count']:>8}{latency['p50']:>10}{latency['p95']:>10}"
+              f"{latency['p99']:>10}{latency['max']:>10}")
+    if report['wire_bytes']:
+        print(f"📦 流量: 传输 {report['wire_bytes']} 字节, 解码后 {report['decoded_bytes']} 字节")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='签到运行报告（成功率、失败原因、阶段耗时分位数）')
+    parser.add_argument('files', nargs='*', default=[EVENT_LOG_FILE], help=f'事件文件 (默认: {EVENT_LOG_FILE})')
+    parser.add_argument('--since', type=parse_time, help='起始时间：相对时间(30m/24h/7d)或日期(2025-06-01 [08:00])')
+    parser.add_argument('--until', type=parse_time, help='结束时间（不含），格式同--since')
+    parser.add_argument('--site', type=str, help='只统计指定站点')
+    parser.add_argument('--account', type=str, help='只统计指定账号')
+    parser.add_argument('--json', action='store_true', help='以JSON输出')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    report = RunReport(since=args.since, until=args.until, site=args.site, account=args.account)
+    for event in iter_events(args.files, since=args.since, until=args.until):
+        report.add(event)
+    result = report.to_dict()
+    if args.json:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print_report(result)
+
+
+if __name__ == '__main__':
+    main()
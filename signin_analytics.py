@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+签到统计分析脚本
+从Cookie存储的积分历史（或签到日志中的积分记录）读取每个账号每天的天空石余额，
+整理成 账号×日期 的NumPy矩阵后整体计算每日收益、当前/最长连续签到、漏签天数和收益异常的账号，
+计算量与账号数和天数成正比，但没有按账号、按天的Python循环
+需要安装可选依赖: pip install numpy
+"""
+
+import re
+import json
+import time
+import logging
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from cookie_store import CookieStore, DEFAULT_STORE_PATH
+from page_parser import DEFAULT_CREDIT_NAME
+
+# 收益异常的稳健Z分数阈值（基于中位数和MAD，不受少数异常账号影响）
+ANOMALY_Z_THRESHOLD = 3.5
+LOG_ACCOUNT = 'default'
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError('签到统计分析需要安装numpy: pip install numpy')
+
+
+def parse_log_history(log_path: str, account: str = LOG_ACCOUNT, credit_name: str = DEFAULT_CREDIT_NAME) -> list:
+    """
+    从签到日志中提取积分记录（"✅ 积分信息获取成功: {...}" 和 "✅ 当前天空石数量: N" 行）
+
+    单账号日志中没有账号名，所有记录归属于account；同一天有多条记录时分析时取最后一条
+
+    Returns:
+        list: (账号名, 日期, 余额) 列表，按日志顺序
+    """
+    name = re.escape(credit_name)
+    pattern = re.compile(
+        rf"^(\d{{4}}-\d{{2}}-\d{{2}}) [^\n]*?✅ "
+        rf"(?:积分信息获取成功: [^\n]*?'{name}': (\d+)|当前{name}数量: (\d+))",
+        re.MULTILINE
+    )
+    with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    return [(account, day, int(credit or current)) for day, credit, current in pattern.findall(text)]
+
+
+def _parse_days(text: str):
+    """把首尾相接的 YYYY-MM-DD 日期文本整体转换为datetime64[D]数组（按字节位置计算，不逐个解析字符串）"""
+    digits = np.frombuffer(text.encode('ascii'), dtype=np.uint8).reshape(-1, 10).astype(np.int64) - ord('0')
+    years = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    months = digits[:, 5] * 10 + digits[:, 6]
+    days = digits[:, 8] * 10 + digits[:, 9]
+    month_start = (years - 1970) * 12 + (months - 1)
+    return month_start.astype('datetime64[M]').astype('datetime64[D]') + (days - 1)
+
+
+def columns_from_store(rows):
+    """
+    把CookieStore.load_credit_history()的结果转换为列
+
+    Returns:
+        tuple: (账号名数组, 每条记录的账号下标, 日期数组, 余额数组)
+    """
+    _require_numpy()
+    names = np.array([row[0] for row in rows])
+    counts = np.array([row[1] for row in rows], dtype=np.int64)
+    days = _parse_days(''.join(row[2] for row in rows))
+    balances = np.fromstring(','.join(row[3] for row in rows), dtype=np.float64, sep=',')
+    return names, np.repeat(np.arange(len(names)), counts), days, balances
+
+
+def columns_from_records(records):
+    """
+    把 (账号名, 日期, 余额) 记录（如日志中提取的记录）转换为列
+
+    Returns:
+        tuple: (账号名数组, 每条记录的账号下标, 日期数组, 余额数组)
+    """
+    _require_numpy()
+    accounts, days, balances = zip(*records)
+    names, rows = np.unique(np.asarray(accounts), return_inverse=True)
+    return names, rows, np.asarray(days, dtype='datetime64[D]'), np.asarray(balances, dtype=np.float64)
+
+
+def build_matrix(rows, days, balances, account_count: int, end: str = None):
+    """
+    把列整理为 账号×日期 的余额矩阵
+
+    Args:
+        rows: 每条记录的账号下标
+        days: 每条记录的日期（datetime64[D]）
+        balances: 每条记录的余额
+        account_count: 账号数
+        end: 分析截止日期（YYYY-MM-DD），默认为记录中的最后一天
+
+    Returns:
+        tuple: (起始日期, 余额矩阵)，没有记录的位置为NaN
+    """
+    _require_numpy()
+    start = days.min()
+    last = np.datetime64(end, 'D') if end else days.max()
+    day_count = max(int((last - start).astype(np.int64)) + 1, 0)
+    columns = (days - start).astype(np.int64)
+    keep = columns < day_count
+
+    matrix = np.full((account_count, day_count), np.nan)
+    # 重复的(账号, 日期)按记录顺序后写覆盖先写
+    matrix[rows[keep], columns[keep]] = balances[keep]
+    return start, matrix
+
+
+def _run_lengths(signed):
+    """每个位置为止的连续签到天数（逐行累加，遇到未签到归零）"""
+    counts = np.cumsum(signed, axis=1)
+    resets = np.maximum.accumulate(np.where(signed, 0, counts), axis=1)
+    return counts - resets
+
+
+def analyze(names, start, matrix, z_threshold: float = ANOMALY_Z_THRESHOLD) -> dict:
+    """
+    对余额矩阵做整体计算
+
+    Returns:
+        dict: 各项指标（每个账号一个元素的数组，daily_gain为每天所有账号的合计收益）
+    """
+    _require_numpy()
+    account_count, day_count = matrix.shape
+    if day_count == 0 or account_count == 0:
+        # 分析窗口为空（如--end早于第一条记录）
+        return _empty_result(names, start, account_count)
+    signed = ~np.isnan(matrix)
+
+    # 每个位置之前最近一次有记录的列，用来计算相对上一次余额的收益（漏签的天数不影响）
+    positions = np.where(signed, np.arange(day_count), -1)
+    last_seen = np.maximum.accumulate(positions, axis=1)
+    previous = np.full_like(last_seen, -1)
+    previous[:, 1:] = last_seen[:, :-1]
+    row_index = np.arange(account_count)[:, None]
+    previous_balance = np.where(previous >= 0, matrix[row_index, np.maximum(previous, 0)], np.nan)
+    gains = matrix - previous_balance
+
+    runs = _run_lengths(signed)
+    signed_days = signed.sum(axis=1)
+    has_history = signed_days > 0
+    first_day = np.where(has_history, signed.argmax(axis=1), day_count)
+    missed_days = (day_count - first_day) - signed_days
+
+    gain_days = (~np.isnan(gains)).sum(axis=1)
+    total_gain = np.nansum(gains, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_gain = np.where(gain_days > 0, total_gain / np.maximum(gain_days, 1), np.nan)
+
+    # 稳健Z分数：|0.6745 × (x − 中位数) / MAD|，MAD为0（大家收益都一样）时只有偏离中位数的账号被标记
+    valid = ~np.isnan(mean_gain)
+    z_scores = np.full(account_count, np.nan)
+    if valid.any():
+        median = np.median(mean_gain[valid])
+        mad = np.median(np.abs(mean_gain[valid] - median))
+        deviation = mean_gain[valid] - median
+        if mad > 0:
+            z_scores[valid] = 0.6745 * deviation / mad
+        else:
+            z_scores[valid] = np.where(deviation == 0, 0.0, np.copysign(np.inf, deviation))
+
+    return {
+        'accounts': names,
+        'start': start,
+        'days': day_count,
+        'signed_days': signed_days,
+        'current_streak': runs[:, -1],
+        'longest_streak': runs.max(axis=1),
+        'missed_days': missed_days,
+        'total_gain': total_gain,
+        'mean_gain': mean_gain,
+        'negative_days': (gains < 0).sum(axis=1),
+        'z_score': z_scores,
+        'anomalous': np.abs(np.nan_to_num(z_scores)) > z_threshold,
+        'daily_gain': np.nansum(gains, axis=0),
+        'balance': np.where(has_history, matrix[np.arange(account_count), np.maximum(last_seen[:, -1], 0)], np.nan),
+    }
+
+
+def _empty_result(names, start, account_count: int) -> dict:
+    """没有任何一天可分析时的结果（与analyze()的字段相同）"""
+    zeros = np.zeros(account_count, dtype=np.int64)
+    missing = np.full(account_count, np.nan)
+    return {
+        'accounts': names,
+        'start': start,
+        'days': 0,
+        'signed_days': zeros,
+        'current_streak': zeros,
+        'longest_streak': zeros,
+        'missed_days': zeros,
+        'total_gain': missing,
+        'mean_gain': missing,
+        'negative_days': zeros,
+        'z_score': missing,
+        'anomalous': np.zeros(account_count, dtype=bool),
+        'daily_gain': np.zeros(0),
+        'balance': missing,
+    }
+
+
+def account_rows(stats) -> list:
+    """把分析结果转换为每个账号一个字典（用于输出）"""
+    def number(value):
+        return None if np.isnan(value) else round(float(value), 2)
+
+    return [
+        {
+            'account': str(account),
+            'balance': number(stats['balance'][i]),
+            'signed_days': int(stats['signed_days'][i]),
+            'current_streak': int(stats['current_streak'][i]),
+            'longest_streak': int(stats['longest_streak'][i]),
+            'missed_days': int(stats['missed_days'][i]),
+            'total_gain': number(stats['total_gain'][i]),
+            'mean_gain': number(stats['mean_gain'][i]),
+            'negative_days': int(stats['negative_days'][i]),
+            'anomalous': bool(stats['anomalous'][i]),
+        }
+        for i, account in enumerate(stats['accounts'])
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AcgFun签到统计分析')
+    parser.add_argument('--store', type=str, default=DEFAULT_STORE_PATH,
+                        help=f'Cookie存储文件路径 (默认: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--log', type=str, help='改为从签到日志中提取积分记录（如 logs/cookie_signin.log）')
+    parser.add_argument('--log-account', type=str, default=LOG_ACCOUNT, help='日志记录归属的账号名')
+    parser.add_argument('--credit-name', type=str, default=DEFAULT_CREDIT_NAME, help='日志中的积分名称')
+    parser.add_argument('--since', type=str, help='只分析该日期（YYYY-MM-DD）之后的记录')
+    parser.add_argument('--end', type=str, help='分析截止日期，默认为记录中的最后一天（指定今天时今天未签到也计入漏签）')
+    parser.add_argument('--z-threshold', type=float, default=ANOMALY_Z_THRESHOLD,
+                        help=f'收益异常的稳健Z分数阈值 (默认: {ANOMALY_Z_THRESHOLD})')
+    parser.add_argument('--top', type=int, default=20, help='输出漏签最多的前N个账号 (默认: 20)')
+    parser.add_argument('--json', type=str, help='把每个账号的统计结果写入JSON文件')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    _require_numpy()
+
+    load_start = time.perf_counter()
+    if args.log:
+        records = parse_log_history(args.log, args.log_account, args.credit_name)
+        if args.since:
+            records = [record for record in records if record[1] >= args.since]
+        if not records:
+            print("❌ 没有积分记录")
+            return
+        names, rows, days, balances = columns_from_records(records)
+    else:
+        history = CookieStore(args.store).load_credit_history(since=args.since)
+        if not history:
+            print("❌ 没有积分记录")
+            return
+        names, rows, days, balances = columns_from_store(history)
+    load_elapsed = time.perf_counter() - load_start
+
+    compute_start = time.perf_counter()
+    start, matrix = build_matrix(rows, days, balances, len(names), end=args.end)
+    stats = analyze(names, start, matrix, z_threshold=args.z_threshold)
+    compute_elapsed = time.perf_counter() - compute_start
+    logging.info(
+        f"📊 {len(days)} 条记录，{len(names)} 个账号 × {stats['days']} 天，"
+        f"读取 {load_elapsed * 1000:.0f}ms，计算 {compute_elapsed * 1000:.0f}ms"
+    )
+
+    if not stats['days']:
+        print("❌ 分析窗口内没有积分记录（--end早于第一条记录？）")
+        return
+
+    rows = account_rows(stats)
+    end_day = start + stats['days'] - 1
+    print(f"📅 {start} ~ {end_day}，共 {len(rows)} 个账号")
+    recent = stats['daily_gain'][-7:]
+    print(f"💰 最近 {len(recent)} 天合计收益: {', '.join(f'{gain:.0f}' for gain in recent)}")
+
+    print("\n📉 漏签最多的账号:")
+    for row in sorted(rows, key=lambda row: -row['missed_days'])[:args.top]:
+        print(f"   {row['account']}: 漏签 {row['missed_days']} 天, 当前连续 {row['current_streak']} 天, "
+              f"最长连续 {row['longest_streak']} 天, 余额 {row['balance']}")
+
+    anomalies = [row for row in rows if row['anomalous']]
+    print(f"\n⚠️ 收益异常的账号 ({len(anomalies)} 个):")
+    for row in anomalies[:args.top]:
+        print(f"   {row['account']}: 平均每天 {row['mean_gain']}, 余额减少 {row['negative_days']} 次")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 统计结果已写入 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
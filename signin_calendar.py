@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+签到日历模块
+每个账号每天一位的位图，保存在内存映射的定长文件中：每个账号一行（默认从2020-01-01起4096天，512字节，约11年），
+账号名到行号的映射保存在旁边的索引文件中。每次CookieSignin.run()签到完成后置位，
+漏签、连续签到和每天的签到覆盖数都用位运算和popcount计算，不需要扫描文本日志
+"""
+
+import os
+import mmap
+import time
+import fcntl
+import struct
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+CALENDAR_PATH = os.path.join('logs', 'signin_calendar.bin')
+# 文件头: 魔数, 版本, 保留, 起始日期(距1970-01-01的天数), 每行天数
+_HEADER_FORMAT = '<4sHHII'
+_HEADER_SIZE = 16
+_MAGIC = b'SCAL'
+_VERSION = 1
+ROW_DAYS = 4096
+# 文件按多少行一次扩展，减少新增账号时的扩展和重新映射次数
+GROW_ROWS = 64
+
+_EPOCH = date(1970, 1, 1)
+# 新建文件的起始日期：固定值，补录早于建文件当年的积分历史时不会落在范围之外
+DEFAULT_EPOCH = date(2020, 1, 1)
+
+
+def _popcount(value: int) -> int:
+    # int.bit_count()需要Python 3.10+
+    return bin(value).count('1')
+
+
+def _day_number(day) -> int:
+    """日期（date或YYYY-MM-DD）转换为距1970-01-01的天数"""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return (day - _EPOCH).days
+
+
+def _iter_bits(value: int):
+    """从低到高依次产生value中为1的位的位置（只循环置位的位数次）"""
+    while value:
+        low = value & -value
+        yield low.bit_length() - 1
+        value ^= low
+
+
+class SigninCalendar:
+    """内存映射的签到位图，多个线程和进程可以同时更新不同账号"""
+
+    def __init__(self, path: str = CALENDAR_PATH, epoch=None, row_days: int = ROW_DAYS):
+        """
+        Args:
+            path: 位图文件路径，索引文件为同名的 .idx
+            epoch: 新建文件时的起始日期，默认为DEFAULT_EPOCH（已有文件使用文件头中的值）
+            row_days: 新建文件时每个账号记录的天数，必须是8的倍数
+        """
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + '.idx'
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._accounts = []
+        self._index_offset = 0
+        self._map = None
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._file_lock():
+            if os.fstat(self._fd).st_size < _HEADER_SIZE:
+                epoch_day = _day_number(epoch or DEFAULT_EPOCH)
+                header = struct.pack(_HEADER_FORMAT, _MAGIC, _VERSION, 0, epoch_day, row_days)
+                os.pwrite(self._fd, header, 0)
+            magic, version, _, self.epoch_day, self.row_days = struct.unpack(
+                _HEADER_FORMAT, os.pread(self._fd, _HEADER_SIZE, 0)
+            )
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f'不是签到日历文件: {path}')
+        self.row_bytes = self.row_days // 8
+        self._remap()
+
+    @contextmanager
+    def _file_lock(self):
+        """新增账号和扩展文件时的跨进程互斥（flock作用在位图文件上）"""
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _remap(self):
+        """文件被其他进程扩展后重新映射"""
+        size = os.fstat(self._fd).st_size
+        if self._map is not None and len(self._map) == size:
+            return
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._fd, size)
+
+    def _load_index(self):
+        """读取索引文件中新增的账号（索引只追加，从上次读到的位置继续）"""
+        try:
+            with open(self.index_path, 'rb') as f:
+                f.seek(self._index_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # 只处理完整的行，写了一半的行留到下次
+        complete = data[:data.rfind(b'\n') + 1]
+        self._index_offset += len(complete)
+        for line in complete.splitlines():
+            account = line.decode('utf-8')
+            self._rows.setdefault(account, len(self._accounts))
+            self._accounts.append(account)
+
+    def _row_offset(self, row: int) -> int:
+        return _HEADER_SIZE + row * self.row_bytes
+
+    def _find_row(self, account: str, create: bool = False):
+        """账号的行号，create为True时为新账号分配一行"""
+        with self._lock:
+            row = self._rows.get(account)
+            if row is None:
+                self._load_index()
+                row = self._rows.get(account)
+            if row is None and create:
+                with self._file_lock():
+                    self._load_index()
+                    row = self._rows.get(account)
+                    if row is None:
+                        row = len(self._accounts)
+                        needed = self._row_offset(row + 1)
+                        if os.fstat(self._fd).st_size < needed:
+                            os.ftruncate(self._fd, self._row_offset(row + GROW_ROWS))
+                        with open(self.index_path, 'ab') as f:
+                            f.write(account.encode('utf-8') + b'\n')
+                            f.flush()
+                            os.fsync(f.fileno())
+                        self._load_index()
+            if row is not None and self._row_offset(row + 1) > len(self._map):
+                self._remap()
+            return row
+
+    def _column(self, day) -> int:
+        """日期在行中的位置，超出文件记录范围时返回None"""
+        column = _day_number(day) - self.epoch_day
+        return column if 0 <= column < self.row_days else None
+
+    def covers(self, day) -> bool:
+        """日期是否在文件的记录范围内"""
+        return self._column(day) is not None
+
+    def mark(self, account: str, day=None) -> bool:
+        """
+        记录账号在某天已签到
+
+        Args:
+            day: 日期（date或YYYY-MM-DD），默认为今天
+
+        Returns:
+            bool: 是否记录成功（日期超出文件范围时返回False）
+        """
+        day = day or date.today()
+        column = self._column(day)
+        if column is None:
+            first, last = self._day(0), self._day(self.row_days - 1)
+            logging.warning(f"⚠️ {account} 的签到日期 {day} 超出签到日历的记录范围 {first} ~ {last}，未记录")
+            return False
+        offset = self._row_offset(self._find_row(account, create=True)) + column // 8
+        # 每个账号独占自己的字节，同一账号同时只有一个进程在处理（账号锁），置位不需要跨进程加锁；
+        # 线程锁只防止其他线程同时重新映射
+        with self._lock:
+            self._map[offset] |= 1 << (column % 8)
+        return True
+
+    def bits(self, account: str) -> int:
+        """账号的整行位图（第i位表示起始日期后第i天），账号不存在时为0"""
+        row = self._find_row(account)
+        if row is None:
+            return 0
+        offset = self._row_offset(row)
+        with self._lock:
+            return int.from_bytes(self._map[offset:offset + self.row_bytes], 'little')
+
+    def accounts(self) -> list:
+        """所有记录过的账号"""
+        with self._lock:
+            self._load_index()
+            return list(self._accounts)
+
+    def _range(self, since, until):
+        """日期范围对应的(起始位置, 结束位置, 范围掩码)，超出文件范围的部分被截掉"""
+        start = max(_day_number(since) - self.epoch_day, 0)
+        end = min(_day_number(until) - self.epoch_day, self.row_days - 1)
+        if end < start:
+            return start, end, 0
+        return start, end, ((1 << (end - start + 1)) - 1) << start
+
+    def _day(self, column: int) -> str:
+        return (_EPOCH + timedelta(days=self.epoch_day + column)).isoformat()
+
+    def signed_days(self, account: str, since, until) -> int:
+        """范围内签到的天数"""
+        _, _, mask = self._range(since, until)
+        return _popcount(self.bits(account) & mask)
+
+    def missed_days(self, account: str, since, until) -> list:
+        """范围内漏签的日期"""
+        _, _, mask = self._range(since, until)
+        return [self._day(column) for column in _iter_bits(~self.bits(account) & mask)]
+
+    def current_streak(self, account: str, day=None) -> int:
+        """
+        截至day的连续签到天数；day当天还没签到时按截至前一天计算（当天结束前连续记录仍然有效）
+        """
+        column = self._column(day or date.today())
+        if column is None:
+            return 0
+        bits = self.bits(account)
+        if not bits >> column & 1:
+            column -= 1
+        if column < 0:
+            return 0
+        mask = (1 << (column + 1)) - 1
+        gaps = ~bits & mask
+        # 最高的一个0位之上到column都是1
+        return column + 1 if gaps == 0 else column - (gaps.bit_length() - 1)
+
+    def longest_streak(self, account: str, since=None, until=None) -> int:
+        """范围内（默认为全部）最长的连续签到天数"""
+        bits = self.bits(account)
+        if since or until:
+            _, _, mask = self._range(since or self._day(0), until or self._day(self.row_days - 1))
+            bits &= mask
+        # 每段连续的1的起点和终点各是一位，按顺序两两配对
+        starts = _iter_bits(bits & ~(bits << 1))
+        ends = _iter_bits(bits & ~(bits >> 1))
+        return max((end - start + 1 for start, end in zip(starts, ends)), default=0)
+
+    def daily_coverage(self, since, until) -> list:
+        """
+        范围内每天签到的账号数
+
+        用按位的竖式加法累加所有账号的位图（第i个计数器保存每天计数的第i位），
+        每个账号只做几次整行的位运算，最后按天读出计数
+
+        Returns:
+            list: (日期, 签到账号数) 列表
+        """
+        start, end, mask = self._range(since, until)
+        counters = []
+        for account in self.accounts():
+            carry = self.bits(account) & mask
+            for i, counter in enumerate(counters):
+                if not carry:
+                    break
+                counters[i], carry = counter ^ carry, counter & carry
+            if carry:
+                counters.append(carry)
+        return [
+            (self._day(column), sum(((counter >> column) & 1) << i for i, counter in enumerate(counters)))
+            for column in range(start, end + 1)
+        ]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        os.close(self._fd)
+
+
+_default_calendar = None
+_default_lock = threading.Lock()
+
+
+def default_calendar() -> SigninCalendar:
+    """进程内共享的默认签到日历（批量运行时所有签到器共用一个映射）"""
+    global _default_calendar
+    with _default_lock:
+        if _default_calendar is None:
+            _default_calendar = SigninCalendar()
+        return _default_calendar
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AcgFun签到日历查询')
+    parser.add_argument('--calendar', type=str, default=CALENDAR_PATH, help=f'签到日历文件 (默认: {CALENDAR_PATH})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    missed_parser = subparsers.add_parser('missed', help='列出范围内漏签的账号')
+    missed_parser.add_argument('--since', type=str, help='起始日期，默认为本月1日')
+    missed_parser.add_argument('--until', type=str, help='截止日期，默认为昨天（今天可能还没运行）')
+
+    streak_parser = subparsers.add_parser('streaks', help='每个账号的当前和最长连续签到天数')
+    streak_parser.add_argument('--day', type=str, help='计算到哪一天，默认为今天')
+
+    coverage_parser = subparsers.add_parser('coverage', help='每天签到的账号数')
+    coverage_parser.add_argument('--since', type=str, help='起始日期，默认为本月1日')
+    coverage_parser.add_argument('--until', type=str, help='截止日期，默认为今天')
+
+    backfill_parser = subparsers.add_parser('backfill', help='从Cookie存储的积分历史补录签到记录')
+    backfill_parser.add_argument('--store', type=str, help='Cookie存储文件路径')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    calendar = SigninCalendar(args.calendar)
+    today = date.today()
+    start = time.perf_counter()
+    try:
+        if args.command == 'missed':
+            since = args.since or today.replace(day=1).isoformat()
+            until = args.until or (today - timedelta(days=1)).isoformat()
+            count = 0
+            for account in calendar.accounts():
+                missed = calendar.missed_days(account, since, until)
+                if missed:
+                    count += 1
+                    print(f"{account}\t漏签 {len(missed)} 天: {', '.join(missed)}")
+            print(f"📉 {since} ~ {until} 共 {count} 个账号漏签")
+        elif args.command == 'streaks':
+            for account in calendar.accounts():
+                print(f"{account}\t当前连续 {calendar.current_streak(account, args.day)} 天\t"
+                      f"最长连续 {calendar.longest_streak(account)} 天")
+        elif args.command == 'coverage':
+            since = args.since or today.replace(day=1).isoformat()
+            for day, count in calendar.daily_coverage(since, args.until or today.isoformat()):
+                print(f"{day}\t{count}")
+        elif args.command == 'backfill':
+            from cookie_store import CookieStore, DEFAULT_STORE_PATH
+            history = CookieStore(args.store or DEFAULT_STORE_PATH).load_credit_history()
+            marked = skipped = 0
+            for account, count, days, _ in history:
+                for i in range(count):
+                    day = days[i * 10:(i + 1) * 10]
+                    # 超出范围的日期只在最后汇总提示，不逐条警告
+                    if calendar.covers(day):
+                        marked += calendar.mark(account, day)
+                    else:
+                        skipped += 1
+            print(f"✅ 已补录 {marked} 条签到记录")
+            if skipped:
+                print(f"⚠️ {skipped} 条记录超出签到日历的记录范围 {calendar._day(0)} ~ "
+                      f"{calendar._day(calendar.row_days - 1)}，未补录")
+    finally:
+        calendar.close()
+    logging.info(f"⏱️ 查询耗时 {(time.perf_counter() - start) * 1000:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+站点配置模块
+k_misign签到插件和spacecp积分页是Discuz的标准组件，不同论坛只有地址、页面文字、编码和积分名称不同；
+内置acgfun.art的配置，其他论坛可以在config/sites.json中添加
+"""
+
+import os
+import json
+import logging
+from urllib.parse import urlparse
+
+from response_decoder import SITE_ENCODINGS
+
+SITES_FILE = os.path.join('config', 'sites.json')
+DEFAULT_SITE = 'acgfun'
+
+
+class SiteProfile:
+    """一个Discuz站点的签到配置"""
+
+    def __init__(self, name: str, base_url: str,
+                 signin_path: str = '/plugin.php?id=k_misign:sign',
+                 profile_path: str = '/home.php?mod=space&do=profile',
+                 credit_path: str = '/home.php?mod=spacecp&ac=credit&showcredit=1',
+                 encoding: str = 'utf-8',
+                 credit_name: str = '天空石',
+                 already_signed_marker: str = '您今天已经签到过了',
+                 not_signed_marker: str = '您今天还没有签到',
+                 max_rate: float = 5.0):
+        """
+        Args:
+            name: 站点名（用于账号归属、限速状态文件名等）
+            base_url: 站点地址，如 https://acgfun.art
+            signin_path: k_misign签到页路径
+            profile_path: 个人资料页路径（验证登录）
+            credit_path: 积分页路径
+            encoding: 页面编码（Discuz通常为utf-8或gbk）
+            credit_name: 签到奖励的积分名称
+            already_signed_marker: 签到页中表示今天已签到的文字
+            not_signed_marker: 签到页中表示今天未签到的文字
+            max_rate: 对该站点的每秒最大请求数
+        """
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.signin_path = signin_path
+        self.profile_path = profile_path
+        self.credit_path = credit_path
+        self.encoding = encoding
+        self.credit_name = credit_name
+        self.already_signed_marker = already_signed_marker
+        self.not_signed_marker = not_signed_marker
+        self.max_rate = max_rate
+
+    @property
+    def signin_url(self) -> str:
+        return self.base_url + self.signin_path
+
+    @property
+    def profile_url(self) -> str:
+        return self.base_url + self.profile_path
+
+    @property
+    def credit_url(self) -> str:
+        return self.base_url + self.credit_path
+
+    @property
+    def cookie_domain(self) -> str:
+        return urlparse(self.base_url).hostname or ''
+
+    @property
+    def rate_limit_path(self) -> str:
+        """该站点共享令牌桶的状态文件（默认站点沿用单站点时的文件，两种运行方式共用一个限速）"""
+        if self.name == DEFAULT_SITE:
+            return os.path.join('logs', 'rate_limit.state')
+        return os.path.join('logs', f'rate_limit_{self.name}.state')
+
+
+SITE_PROFILES = {
+    DEFAULT_SITE: SiteProfile(DEFAULT_SITE, 'https://acgfun.art'),
+}
+
+
+def register_site(profile: SiteProfile):
+    """注册站点配置，同时登记其页面编码供响应解码使用"""
+    SITE_PROFILES[profile.name] = profile
+    SITE_ENCODINGS[profile.cookie_domain] = profile.encoding
+
+
+def load_site_profiles(path: str = SITES_FILE) -> dict:
+    """
+    从JSON文件加载额外的站点配置（文件不存在时只有内置站点）
+
+    文件格式: {"站点名": {"base_url": "https://...", "credit_name": "金币", ...}, ...}
+
+    Returns:
+        dict: 站点名到SiteProfile的映射
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return SITE_PROFILES
+    except Exception as e:
+        logging.error(f"❌ 读取站点配置失败 {path}: {e}")
+        return SITE_PROFILES
+
+    for name, options in entries.items():
+        try:
+            register_site(SiteProfile(name, **options))
+        except TypeError as e:
+            logging.error(f"❌ 站点配置无效 {name}: {e}")
+    return SITE_PROFILES
+
+
+def get_site_profile(name: str = None) -> SiteProfile:
+    """按名称获取站点配置，未指定时返回默认站点"""
+    name = name or DEFAULT_SITE
+    if name not in SITE_PROFILES:
+        load_site_profiles()
+    if name not in SITE_PROFILES:
+        raise KeyError(f'未配置的站点: {name}')
+    return SITE_PROFILES[name]
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多站点批量签到脚本
+Cookie存储中的账号按所属站点分组，每个站点在自己的线程中运行一个有界窗口的批量签到，
+并拥有独立的连接池、限速令牌桶和熔断器：一个论坛变慢或宕机只会占用它自己的窗口，其他站点照常签到
+"""
+
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from cookie_signin import CookieSignin
+from cookie_store import CookieStore, DEFAULT_STORE_PATH
+from checkpoint_journal import CheckpointJournal, default_journal_path
+from run_lock import SharedRateLimiter
+from batch_runner import run_batch
+from bandwidth import format_bytes
+from event_log import event_log, add_event_log_argument
+from circuit_breaker import CircuitBreaker
+from adaptive_concurrency import AdaptiveConcurrency
+from connection_warmer import shared_adapter, prewarm
+from site_profiles import SITES_FILE, load_site_profiles, get_site_profile
+
+
+def run_site(profile, accounts, window: int = 8, parse_pool=None, cookie_store=None, max_rate: float = None,
+             failure_threshold: int = 5, cooldown: float = 60.0, prewarm_connections: int = 0,
+             refresh_credit: bool = False, adaptive: bool = False, on_result=None) -> dict:
+    """
+    运行一个站点的所有账号，连接池、限速器和熔断器只属于该站点
+
+    Args:
+        profile: 站点配置(SiteProfile)
+        accounts: 该站点的账号迭代器，产生 (账号名, Cookie字符串)
+        window: 该站点同时运行的最大账号数
+        parse_pool: 页面解析进程池，可在站点间共享
+        cookie_store: Cookie存储
+        max_rate: 该站点每秒最大请求数，为None时使用站点配置，0表示不限速
+        failure_threshold: 连续失败多少次请求后熔断
+        cooldown: 熔断持续的秒数
+        prewarm_connections: 开始前预热的keep-alive连接数
+        refresh_credit: 总是请求积分页
+        adaptive: 按AIMD自适应调整该站点同时进行的请求数，window作为上限
+        on_result: 每个账号完成时的回调
+
+    Returns:
+        dict: 该站点的汇总统计
+    """
+    rate = profile.max_rate if max_rate is None else max_rate
+    adapter = shared_adapter(max(window, prewarm_connections))
+    rate_limiter = SharedRateLimiter(rate, path=profile.rate_limit_path) if rate > 0 else None
+    breaker = CircuitBreaker(profile.name, failure_threshold=failure_threshold, cooldown=cooldown)
+    concurrency = AdaptiveConcurrency(max_limit=window) if adaptive else None
+
+    def signin_factory():
+        return CookieSignin(parse_pool=parse_pool, cookie_store=cookie_store, rate_limiter=rate_limiter,
+                            adapter=adapter, refresh_credit=refresh_credit, site=profile,
+                            circuit_breaker=breaker, concurrency=concurrency)
+
+    try:
+        if prewarm_connections > 0:
+            try:
+                prewarm(adapter, prewarm_connections, base_url=profile.base_url)
+            except Exception as e:
+                logging.warning(f"⚠️ 站点 {profile.name} 连接预热失败: {e}")
+        start = time.perf_counter()
+        summary = run_batch(accounts, window=window, signin_factory=signin_factory, on_result=on_result)
+        summary['elapsed'] = round(time.perf_counter() - start, 1)
+        if concurrency is not None:
+            summary['concurrency'] = concurrency.report()
+        return summary
+    finally:
+        if rate_limiter is not None:
+            rate_limiter.close()
+        adapter.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Discuz多站点批量签到')
+    parser.add_argument('--store', type=str, default=DEFAULT_STORE_PATH,
+                        help=f'Cookie存储文件路径 (默认: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--sites-file', type=str, default=SITES_FILE, help=f'站点配置文件 (默认: {SITES_FILE})')
+    parser.add_argument('--site', action='append', help='只运行指定站点（可重复），默认运行存储中出现的所有站点')
+    parser.add_argument('--window', type=int, default=8, help='每个站点同时运行的最大账号数 (默认: 8)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='每个站点按AIMD自适应调整同时进行的请求数，--window作为上限')
+    parser.add_argument('--parse-workers', type=int, default=0, help='页面解析进程数，所有站点共享，0表示在线程中解析 (默认: 0)')
+    parser.add_argument('--max-rate', type=float, help='每个站点的每秒最大请求数，0表示不限速 (默认: 站点配置中的max_rate)')
+    parser.add_argument('--failure-threshold', type=int, default=5, help='站点连续失败多少次请求后熔断 (默认: 5)')
+    parser.add_argument('--cooldown', type=float, default=60.0, help='熔断后暂停请求的秒数 (默认: 60)')
+    parser.add_argument('--prewarm', type=int, default=0, help='每个站点开始前预热的keep-alive连接数 (默认: 0)')
+    parser.add_argument('--refresh-credit', action='store_true', help='总是请求积分页获取积分数量')
+    parser.add_argument('--journal', type=str, help='检查点日志路径 (默认: logs/signin_journal_<日期>.log)')
+    parser.add_argument('--resume', action='store_true', help='重放检查点日志，只处理上次运行中未完成的账号')
+    add_event_log_argument(parser)
+
+    args = parser.parse_args()
+    event_log.configure(args.event_log)
+
+    load_site_profiles(args.sites_file)
+    cookie_store = CookieStore(args.store)
+    site_names = args.site or cookie_store.iter_sites()
+    profiles = []
+    for name in site_names:
+        try:
+            profiles.append(get_site_profile(name))
+        except KeyError as e:
+            logging.error(f"❌ {e}，该站点的账号将被跳过")
+    if not profiles:
+        print("❌ 没有可运行的站点")
+        return
+
+    parse_pool = None
+    if args.parse_workers > 0:
+        from page_parser import ParsePool
+        parse_pool = ParsePool(args.parse_workers)
+
+    journal_path = args.journal or default_journal_path()
+    completed = CheckpointJournal.replay(journal_path) if args.resume else {}
+    if args.resume:
+        logging.info(f"⏩ 检查点日志中已完成 {len(completed)} 个账号，继续处理剩余账号")
+    journal = CheckpointJournal(journal_path, resume=args.resume)
+
+    def on_result(result):
+        # 被其他进程锁定或站点熔断的账号不是本次运行的最终结果，不写入检查点
+        if result['outcome'] not in ('locked', 'circuit_open'):
+            journal.record(result['account'], result['outcome'])
+
+    def site_accounts(profile):
+        return ((account_id, None) for account_id in cookie_store.iter_account_ids(site=profile.name)
+                if account_id not in completed)
+
+    summaries = {}
+    try:
+        with ThreadPoolExecutor(max_workers=len(profiles)) as executor:
+            futures = {
+                profile.name: executor.submit(
+                    run_site, profile, site_accounts(profile),
+                    window=args.window,
+                    parse_pool=parse_pool,
+                    cookie_store=cookie_store,
+                    max_rate=args.max_rate,
+                    failure_threshold=args.failure_threshold,
+                    cooldown=args.cooldown,
+                    prewarm_connections=args.prewarm,
+                    refresh_credit=args.refresh_credit,
+                    adaptive=args.adaptive,
+                    on_result=on_result,
+                )
+                for profile in profiles
+            }
+            for name, future in futures.items():
+                try:
+                    summaries[name] = future.result()
+                except Exception as e:
+                    logging.error(f"❌ 站点 {name} 运行失败: {e}")
+    finally:
+        journal.close()
+        if parse_pool is not None:
+            parse_pool.shutdown()
+
+    for name, summary in summaries.items():
+        event_log.emit('batch', site=name, total=summary['total'], success=summary['success'],
+                       failed=summary['failed'], outcomes=summary['outcomes'],
+                       duration_ms=round(summary['elapsed'] * 1000, 1),
+                       wire_bytes=summary['wire_bytes'], decoded_bytes=summary['decoded_bytes'],
+                       concurrency=summary.get('concurrency'))
+        logging.info(
+            f"📊 站点 {name}: 共 {summary['total']} 个账号, 成功 {summary['success']}, "
+            f"失败 {summary['failed']}, 耗时 {summary['elapsed']}s, "
+            f"流量 {format_bytes(summary['wire_bytes'])} (解码后 {format_bytes(summary['decoded_bytes'])})"
+        )
+        print(f"✅ {name}: 成功 {summary['success']} / {summary['total']}，结果分布: {summary['outcomes']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+签到步骤依赖图
+互不依赖的请求（如登录验证和签到状态）在线程中同时执行，单账号耗时接近最长依赖链；
+前置步骤失败时取消依赖它的步骤
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def _always_ok(result):
+    return True
+
+
+class TaskGraph:
+    """按依赖关系并发执行的小型任务图"""
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Args:
+            max_workers: 同时执行的最大任务数
+        """
+        self.max_workers = max_workers
+        self._tasks = {}
+        self.results = {}
+        self.failed = set()
+        self.cancelled = set()
+
+    def add(self, name: str, func, requires=(), guards=(), ok=_always_ok):
+        """
+        添加任务
+
+        Args:
+            name: 任务名
+            func: 任务函数，参数依次为requires中各任务的结果
+            requires: 必须先完成的任务（其结果作为参数传入）
+            guards: 可以同时执行、但失败时取消本任务的任务
+            ok: 判断任务结果是否成功，返回False时依赖或受其保护的任务被取消；抛出异常也视为失败
+        """
+        for dependency in tuple(requires) + tuple(guards):
+            if dependency not in self._tasks:
+                raise ValueError(f'未知的前置任务: {dependency}')
+        self._tasks[name] = (func, tuple(requires), tuple(guards), ok)
+        return self
+
+    def _blocked(self, name) -> bool:
+        """前置任务中是否有失败或被取消的"""
+        _, requires, guards, _ = self._tasks[name]
+        return any(dep in self.failed or dep in self.cancelled for dep in requires + guards)
+
+    def run(self) -> dict:
+        """
+        执行所有任务直到完成或被取消
+
+        已经开始的任务被取消时无法中断，会等它结束但丢弃其结果
+
+        Returns:
+            dict: 成功完成的任务名到结果的映射（失败和被取消的任务不在其中）
+        """
+        pending = list(self._tasks)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name in list(pending):
+                    func, requires, _, _ = self._tasks[name]
+                    if self._blocked(name):
+                        pending.remove(name)
+                        self.cancelled.add(name)
+                    elif all(dep in self.results for dep in requires):
+                        pending.remove(name)
+                        args = [self.results[dep] for dep in requires]
+                        running[executor.submit(func, *args)] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if name in self.cancelled:
+                        continue
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logging.error(f"❌ 步骤 {name} 执行失败: {e}")
+                        self.failed.add(name)
+                        continue
+                    if self._tasks[name][3](result):
+                        self.results[name] = result
+                    else:
+                        self.failed.add(name)
+
+                # 正在执行但前置任务已失败的任务，结果作废
+                for future, name in running.items():
+                    if name not in self.cancelled and self._blocked(name):
+                        self.cancelled.add(name)
+                        future.cancel()
+        return self.results
@@ -6,9 +6,30 @@ AcgFun 签到状态验证脚本
 验证当前的签到状态
 """
 
+import os
+import json
+import time
 import requests
 import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from response_decoder import decode_response, response_contains
+from cookie_store import CookieStore, DEFAULT_STORE_PATH, load_cookie_file
+from retry_policy import RETRYABLE_STATUS, MAX_RETRY_AFTER, retry_after_seconds, backoff_delay
+from site_profiles import get_site_profile
+
+# 登录墙探测使用需要登录的最轻页面，并在读到判定标记后立即断开
+PROBE_PATH = '/home.php?mod=spacecp&ac=credit'
+LOGGED_IN_MARKERS = [b'action=logout']
+LOGIN_WALL_MARKERS = [
+    '您需要先登录才能继续本操作'.encode('utf-8'),
+    b'mod=logging&amp;action=login',
+    b'mod=logging&action=login',
+]
+PROBE_CHUNK_SIZE = 4096
+HEALTH_REPORT_PATH = os.path.join('logs', 'cookie_health.jsonl')
 
 # 配置日志
 logging.basicConfig(
@@ -17,9 +38,20 @@ logging.basicConfig(
 )
 
 class SigninVerifier:
-    def __init__(self):
+    def __init__(self, adapter=None, site=None):
+        """
+        初始化签到验证器
+        
+        Args:
+            adapter: 共享的HTTPAdapter，批量检查时多个账号复用同一个连接池
+            site: 站点配置(SiteProfile)，默认为acgfun.art
+        """
+        self.site = site or get_site_profile()
         self.session = requests.Session()
         self.session.verify = False
+        if adapter is not None:
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
         
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -27,7 +59,9 @@ class SigninVerifier:
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
         })
         
-        self.signin_url = 'https://acgfun.art/plugin.php?id=k_misign:sign'
+        self.base_url = self.site.base_url
+        self.cookie_domain = self.site.cookie_domain
+        self.signin_url = self.site.signin_url
         
         # 禁用SSL警告
         import urllib3
@@ -36,25 +70,33 @@ class SigninVerifier:
     def load_cookies_from_file(self, cookie_file):
         """从文件加载Cookie"""
         try:
-            with open(cookie_file, 'r', encoding='utf-8') as f:
-                cookie_string = f.read().strip()
-            
-            cookies = {}
-            for cookie in cookie_string.split('; '):
-                if '=' in cookie:
-                    name, value = cookie.split('=', 1)
-                    cookies[name] = value
-            
-            for name, value in cookies.items():
-                self.session.cookies.set(name, value, domain='acgfun.art')
+            self._apply_cookies(load_cookie_file(cookie_file))
+            return True
             
-            logging.info(f"✅ Cookie加载成功")
+        except Exception as e:
+            logging.error(f"❌ Cookie加载失败: {e}")
+            return False
+
+    def load_cookies_from_store(self, store, account_id):
+        """从Cookie存储加载指定账号的Cookie"""
+        try:
+            cookies = store.get(account_id)
+            if cookies is None:
+                logging.error(f"❌ Cookie存储中没有账号: {account_id}")
+                return False
+            self._apply_cookies(cookies)
             return True
             
         except Exception as e:
             logging.error(f"❌ Cookie加载失败: {e}")
             return False
 
+    def _apply_cookies(self, cookies):
+        """把Cookie设置到session中"""
+        for name, value in cookies.items():
+            self.session.cookies.set(name, value, domain=self.cookie_domain)
+        logging.info(f"✅ Cookie加载成功")
+
     def check_signin_status(self):
         """检查签到状态"""
         try:
@@ -65,19 +107,19 @@ class SigninVerifier:
                 logging.error(f"❌ 访问签到页面失败: {response.status_code}")
                 return False
             
-            # 检查页面内容
-            if "您今天已经签到过了" in response.text:
+            # 检查页面内容（直接匹配字节，无需解码）
+            if response_contains(response, self.site.already_signed_marker):
                 logging.info("✅ 验证成功：今天已经签到过了！")
                 return True
-            elif "您今天还没有签到" in response.text:
+            elif response_contains(response, self.site.not_signed_marker):
                 logging.warning("⚠️ 显示还没有签到")
                 return False
             else:
                 # 更详细的分析
-                soup = BeautifulSoup(response.text, 'html.parser')
+                page_text = decode_response(response)
+                soup = BeautifulSoup(page_text, 'html.parser')
                 
                 # 查找签到相关的文本
-                page_text = response.text
                 if "已签到" in page_text or "签到成功" in page_text:
                     logging.info("✅ 验证成功：检测到已签到状态！")
                     return True
@@ -93,11 +135,179 @@ class SigninVerifier:
             logging.error(f"❌ 检查签到状态失败: {e}")
             return False
 
+    def probe_login(self, max_retries=3):
+        """
+        用最轻的请求判断Cookie是否仍然有效
+        流式读取响应，读到已登录或登录墙标记后立即断开，不下载整个页面
+        
+        Returns:
+            str: valid / expired / unknown
+        """
+        markers = [(marker, 'valid') for marker in LOGGED_IN_MARKERS]
+        markers += [(marker, 'expired') for marker in LOGIN_WALL_MARKERS]
+        overlap = max(len(marker) for marker, _ in markers) - 1
+        
+        for attempt in range(max_retries):
+            try:
+                response = self.session.get(
+                    f'{self.base_url}{PROBE_PATH}', timeout=15, stream=True, allow_redirects=False
+                )
+                try:
+                    # 未登录时Discuz会跳转到登录页
+                    if response.is_redirect and 'logging' in response.headers.get('Location', ''):
+                        return 'expired'
+                    if response.status_code != 200:
+                        if response.status_code in RETRYABLE_STATUS and attempt < max_retries - 1:
+                            delay = retry_after_seconds(response)
+                            if delay is None:
+                                delay = backoff_delay(attempt)
+                            if delay <= MAX_RETRY_AFTER:
+                                time.sleep(delay)
+                                continue
+                        return 'unknown'
+                    
+                    tail = b''
+                    for chunk in response.iter_content(PROBE_CHUNK_SIZE):
+                        window = tail + chunk
+                        # 以最先出现的标记为准（页头工具栏在页面最前面）
+                        found = [(window.find(marker), status) for marker, status in markers]
+                        found = [item for item in found if item[0] >= 0]
+                        if found:
+                            return min(found)[1]
+                        tail = window[-overlap:]
+                    return 'unknown'
+                finally:
+                    response.close()
+                    
+            except requests.exceptions.RequestException as e:
+                logging.warning(f"探测请求失败 (尝试 {attempt + 1}/{max_retries}): {e}")
+                if attempt < max_retries - 1:
+                    time.sleep(backoff_delay(attempt))
+                    continue
+                raise
+        
+        return 'unknown'
+
+
+def check_account_health(store, account_id, adapter=None, verifier_factory=SigninVerifier):
+    """
+    检查单个账号的Cookie健康状态
+    
+    Returns:
+        dict: 账号、状态(valid/expired/unknown)、耗时(毫秒)和错误信息
+    """
+    # 按账号所属站点探测，Cookie只发往它自己的站点
+    try:
+        site, error = get_site_profile(store.get_site(account_id)), ''
+    except KeyError as e:
+        site, error = None, str(e)
+    verifier = verifier_factory(adapter=adapter, site=site)
+    start = time.perf_counter()
+    status = 'unknown'
+    try:
+        cookies = None if error else store.get(account_id)
+        if cookies is not None:
+            for name, value in cookies.items():
+                verifier.session.cookies.set(name, value, domain=verifier.cookie_domain)
+            status = verifier.probe_login()
+        elif not error:
+            error = 'account not found'
+    except Exception as e:
+        error = str(e)
+    finally:
+        # 共享的连接池在bulk_verify结束时统一关闭，Session.close()会关闭所有挂载的adapter
+        if adapter is not None:
+            verifier.session.adapters.clear()
+        verifier.session.close()
+    return {
+        'account': account_id,
+        'status': status,
+        'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+        'error': error,
+        'checked_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def bulk_verify(store, workers=32, report_path=HEALTH_REPORT_PATH, verifier_factory=SigninVerifier):
+    """
+    并发检查存储中所有账号的Cookie，每检查完一个账号就写入一行JSON报告
+    
+    Args:
+        store: Cookie存储(CookieStore)
+        workers: 并发数
+        report_path: JSON Lines报告路径
+        verifier_factory: 创建验证器的函数，接收adapter和site参数
+    
+    Returns:
+        dict: 各状态的账号数
+    """
+    summary = {'valid': 0, 'expired': 0, 'unknown': 0}
+    # 所有账号共享一个连接池，避免每个账号重新建立TLS连接
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    
+    directory = os.path.dirname(report_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    with open(report_path, 'w', encoding='utf-8') as report, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        
+        def drain(limit):
+            nonlocal in_flight
+            while len(in_flight) > limit:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    summary[result['status']] += 1
+                    report.write(json.dumps(result, ensure_ascii=False) + '\n')
+        
+        for account_id in store.iter_account_ids():
+            drain(workers * 2)
+            in_flight.add(executor.submit(
+                check_account_health, store, account_id, adapter, verifier_factory
+            ))
+        drain(0)
+    
+    adapter.close()
+    return summary
+
+
 def main():
-    verifier = SigninVerifier()
+    parser = argparse.ArgumentParser(description='AcgFun签到状态验证')
+    parser.add_argument('--file', type=str, default='config/cookies.txt', help='Cookie文件路径 (默认: config/cookies.txt)')
+    parser.add_argument('--account', type=str, help='从Cookie存储中加载指定账号')
+    parser.add_argument('--store', type=str, default=DEFAULT_STORE_PATH, help='Cookie存储文件路径')
+    parser.add_argument('--bulk', action='store_true', help='并发检查Cookie存储中所有账号的Cookie是否有效')
+    parser.add_argument('--workers', type=int, default=32, help='批量检查的并发数 (默认: 32)')
+    parser.add_argument('--report', type=str, default=HEALTH_REPORT_PATH, help=f'批量检查报告路径 (默认: {HEALTH_REPORT_PATH})')
+    
+    args = parser.parse_args()
+    
+    if args.bulk:
+        start = time.perf_counter()
+        summary = bulk_verify(CookieStore(args.store), workers=args.workers, report_path=args.report)
+        total = sum(summary.values())
+        print(f"📊 共检查 {total} 个账号，耗时 {time.perf_counter() - start:.1f}s："
+              f"有效 {summary['valid']}，失效 {summary['expired']}，未知 {summary['unknown']}")
+        print(f"📄 报告已写入: {args.report}")
+        return
+    
+    # 从存储加载的账号使用它所属的站点
+    store = CookieStore(args.store) if args.account else None
+    try:
+        site = get_site_profile(store.get_site(args.account) if args.account else None)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        return
+    verifier = SigninVerifier(site=site)
     
     # 加载Cookie
-    if not verifier.load_cookies_from_file('cookies.txt'):
+    if args.account:
+        loaded = verifier.load_cookies_from_store(store, args.account)
+    else:
+        loaded = verifier.load_cookies_from_file(args.file)
+    if not loaded:
         print("❌ Cookie加载失败")
         return
     